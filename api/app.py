@@ -0,0 +1,264 @@
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from langchain_core.messages import BaseMessage
+
+from src.utils import load_config
+from src.agent_component.graph_builder import get_insurance_agent_graph
+from src.agent_component.circuit_breaker import circuit_breaker_states
+from src.rag_component.connection_pool import get_retriever_pool
+from src.rag_component.semantic_cache import get_semantic_cache
+
+from tracing.tracer import get_tracer
+from logger.custom_logger import CustomLogger
+from exception.custom_exception import CustomException, error_counts
+
+from contextlib import asynccontextmanager
+import asyncio, json, sys, time
+
+logging = CustomLogger().get_logger(__file__)
+
+API = load_config('config/config.yaml')['api']
+
+# Nodes whose answers never go through the LLM, so they only show up as state updates
+SHORT_CIRCUIT_NODES = ("catalog_lookup", "semantic_cache_lookup")
+
+
+class ChatRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=2000)
+
+
+class BatchChatRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1)
+
+
+class AdmissionController:
+    """
+    Bounds the chats a worker processes at once and the chats allowed to wait for a slot.
+
+    A chat beyond `max_queue` waiting ones, or one that waits longer than `queue_timeout`, is
+    rejected with 503 so a traffic spike sheds load instead of piling up on the event loop.
+    """
+
+    def __init__(self, max_concurrency:int, max_queue:int, queue_timeout:float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self.completed = 0
+
+    async def acquire(self, count:int=1):
+        if self.queued + count > self.max_queue:
+            self.rejected += count
+            raise HTTPException(status_code=503, detail="Server busy, request queue is full", headers={"Retry-After": "1"})
+
+        self.queued += count
+        acquired = 0
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        try:
+            for _ in range(count):
+                await asyncio.wait_for(self._slots.acquire(), max(0.0, deadline - loop.time()))
+                acquired += 1
+        except asyncio.TimeoutError:
+            for _ in range(acquired):
+                self._slots.release()
+            self.rejected += count
+            raise HTTPException(status_code=503, detail="Server busy, timed out waiting for a slot", headers={"Retry-After": "1"})
+        except BaseException:
+            # Cancelled while waiting (client gone, shutdown): hand back the slots of a partly admitted batch
+            for _ in range(acquired):
+                self._slots.release()
+            raise
+        finally:
+            self.queued -= count
+        self.in_flight += count
+
+    def release(self, count:int=1):
+        for _ in range(count):
+            self._slots.release()
+        self.in_flight -= count
+        self.completed += count
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "completed": self.completed,
+        }
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    Streaming response that holds an admission slot until it is done being sent.
+
+    The slot is released however sending ends, including when the client disconnects before the
+    body iterator was ever started, in which case a `finally` inside the iterator would not run.
+    """
+
+    def __init__(self, content, admission:AdmissionController, **kwargs):
+        super().__init__(content, **kwargs)
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                self.admission.release()
+
+
+def answer_text(answer) -> str:
+    """Returns the text of a graph answer, which is either a message or a plain string."""
+    if isinstance(answer, BaseMessage):
+        return answer.content
+    return answer or ""
+
+
+def sse(event:str, data:dict) -> str:
+    """Formats one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@asynccontextmanager
+async def lifespan(app:FastAPI):
+    # Building the graph warms the retriever pool and the LLM clients, so do it off the event loop
+    app.state.graph = await asyncio.to_thread(get_insurance_agent_graph)
+    if app.state.graph is None:
+        raise RuntimeError("Failed to build insurance agent graph")
+    app.state.admission = AdmissionController(API["max_concurrency"], API["max_queue"], API["queue_timeout"])
+    app.state.started_at = time.time()
+    logging.info("Insurance agent API ready")
+    yield
+
+
+app = FastAPI(title="Bajaj Allianz Insurance AI Assistant", lifespan=lifespan)
+
+
+async def run_chat(graph, query:str) -> dict:
+    """Runs one chat through the graph and returns the answer with its cache flags."""
+    with get_tracer().span("chat", **{"chat.streaming": False}):
+        state = await graph.ainvoke({"query": query})
+    return {
+        "query": query,
+        "answer": answer_text(state.get("answer")),
+        "cached": bool(state.get("cached")),
+        "catalog_hit": bool(state.get("catalog_hit")),
+    }
+
+
+@app.post("/chat")
+async def chat(body:ChatRequest, request:Request):
+    """
+    Streams the answer to a query as server-sent events.
+
+    Emits `token` events while the insurance agent generates, a single `token` event for answers
+    served from the document catalog or the semantic cache, then an `end` event (or `error`).
+    A `reset` event means the model streaming the answer failed mid-way and the tokens so far
+    should be dropped; the answer of the next model follows.
+    """
+    admission:AdmissionController = request.app.state.admission
+    await admission.acquire()
+
+    async def events():
+        start = time.perf_counter()
+        first_token = None
+        message_id = None
+        with get_tracer().span("chat", **{"chat.streaming": True}) as span:
+            try:
+                async for mode, chunk in request.app.state.graph.astream(
+                    {"query": body.query}, stream_mode=["messages", "updates"]
+                ):
+                    if mode == "messages":
+                        message, metadata = chunk
+                        if metadata["langgraph_node"] != "insurance_agent" or not message.content:
+                            continue
+                        if message_id not in (None, message.id):
+                            yield sse("reset", {})
+                        message_id = message.id
+                        content = message.content
+                    else:
+                        content = next(
+                            (answer_text(chunk[node].get("answer")) for node in SHORT_CIRCUIT_NODES if (chunk.get(node) or {}).get("answer")),
+                            None,
+                        )
+                        if not content:
+                            continue
+
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                        span.set_attribute("chat.time_to_first_token", first_token)
+                    yield sse("token", {"content": content})
+
+                yield sse("end", {"first_token_seconds": first_token, "total_seconds": time.perf_counter() - start})
+            except Exception as e:
+                span.record_error(e)
+                app_exc = CustomException(e, sys)
+                logging.error("Error while streaming chat response")
+                logging.error(app_exc)
+                yield sse("error", {"detail": "Failed to generate response"})
+
+    return AdmittedStreamingResponse(
+        events(), admission, media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/chat/batch")
+async def chat_batch(body:BatchChatRequest, request:Request):
+    """Answers up to `max_batch_size` queries concurrently and returns them in request order."""
+    if len(body.queries) > API["max_batch_size"]:
+        raise HTTPException(status_code=413, detail=f"At most {API['max_batch_size']} queries per batch")
+
+    # A batch holds at most `max_concurrency` slots and runs its queries within them
+    admission:AdmissionController = request.app.state.admission
+    slots = min(len(body.queries), admission.max_concurrency)
+    await admission.acquire(slots)
+    try:
+        limit = asyncio.Semaphore(slots)
+
+        async def bounded(query:str) -> dict:
+            async with limit:
+                return await run_chat(request.app.state.graph, query)
+
+        results = await asyncio.gather(*(bounded(query) for query in body.queries), return_exceptions=True)
+    finally:
+        admission.release(slots)
+
+    responses = []
+    for query, result in zip(body.queries, results):
+        if isinstance(result, Exception):
+            logging.error(CustomException(result, result))
+            responses.append({"query": query, "error": "Failed to generate response"})
+        else:
+            responses.append(result)
+    return {"results": responses}
+
+
+@app.get("/health")
+async def health(request:Request):
+    """Reports readiness, admission queue, model circuit breakers, cache counters and error counts per code."""
+    semantic_cache = get_semantic_cache()
+    return {
+        "status": "ok" if getattr(request.app.state, "graph", None) is not None else "starting",
+        "uptime_seconds": time.time() - request.app.state.started_at,
+        "admission": request.app.state.admission.stats(),
+        "models": circuit_breaker_states(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache else {},
+        "embedding_cache": get_retriever_pool().cache_stats(),
+        "errors": error_counts(),
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency, model attempt, token and cost metrics in the Prometheus text format."""
+    return PlainTextResponse(get_tracer().render_prometheus(), media_type="text/plain; version=0.0.4")
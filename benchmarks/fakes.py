@@ -0,0 +1,343 @@
+"""
+Local stand-ins for the Jina embeddings, the vector store and the Groq chat models.
+
+They let the full insurance agent graph run without credentials or network access, with
+deterministic embeddings and chat models whose latency, jitter, failure rate and streaming speed
+are configurable, so benchmark and load-test numbers measure the pipeline itself.
+"""
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph.state import CompiledStateGraph
+from pydantic import PrivateAttr
+
+import numpy as np
+
+from src.agent_component import CIRCUIT_BREAKER, HEDGING, LLM_MODELS
+from src.agent_component.agent import Agents
+from src.agent_component.graph_builder import build_insurance_agent_graph
+from src.agent_component.llm_registry import LLMRegistry
+from src.rag_component.hybrid_retriever import HybridRetriever
+from src.rag_component.incremental_ingestion import chunk_id
+from src.rag_component.lexical_index import BM25Index
+from src.rag_component.local_index import LocalIndex
+from src.rag_component.query_analyzer import load_catalog, parse_plan_key
+from src.rag_component.semantic_cache import SemanticCache
+
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator
+import asyncio, hashlib, random, re, tempfile, time, zlib
+
+WORD_PATTERN = re.compile(r"\w+")
+
+ANSWER_VOCABULARY = (
+    "the plan covers hospitalisation expenses pre and post hospitalisation day care procedures "
+    "subject to the sum insured waiting period of thirty days applies to illnesses except accidents "
+    "pre-existing diseases are covered after thirty six months of continuous coverage as per the policy wordings"
+).split()
+
+CHUNK_TEMPLATES = {
+    "Brochure": [
+        "{plan} for {state} is a health insurance plan that covers in-patient hospitalisation, day care procedures and ambulance charges up to the sum insured.",
+        "Key benefits of {plan} ({state}) include cashless treatment at network hospitals, a cumulative bonus for claim-free years and tax benefits under section 80D.",
+    ],
+    "Customer Information Sheet": [
+        "Customer Information Sheet of {plan} ({state}): a waiting period of 30 days applies to all illnesses except accidents; pre-existing diseases are covered after 36 months.",
+        "Exclusions under {plan} ({state}) include cosmetic treatment, self-inflicted injuries and expenses not medically necessary, as listed in the CIS.",
+    ],
+    "Policy Wordings": [
+        "Policy wordings of {plan} ({state}) define the sum insured, the policy period and the conditions for renewal, cancellation and free look.",
+        "Claims under {plan} ({state}) must be intimated within 48 hours of emergency hospitalisation; reimbursement documents are due within 30 days of discharge.",
+    ],
+    "Proposal Form": [
+        "The proposal form of {plan} ({state}) asks for the insured members, their age, medical history and the nominee; it can be filled digitally.",
+        "Documents for a {plan} ({state}) proposal: identity proof, address proof, age proof and a recent photograph of each insured member.",
+    ],
+}
+
+QUERY_TEMPLATES = (
+    "What does the {plan} plan cover in {state}?",
+    "What is the waiting period for pre-existing diseases under {plan}?",
+    "What are the exclusions of the {plan} health insurance in {state}?",
+    "How do I file a claim under {plan} for {state}?",
+    "Which documents are needed for the {plan} proposal form?",
+)
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic embeddings from hashed words and word pairs (feature hashing).
+
+    Texts sharing words get similar vectors, so retrieval, metadata filters and the semantic cache
+    behave plausibly, and the same text embeds identically across processes and runs.
+    """
+
+    def __init__(self, dim:int=256, latency:float=0.0):
+        """
+        Args:
+            dim (int): Embedding size. Defaults to 256.
+            latency (float): Seconds each embedding request sleeps, to mimic the remote API. Defaults to 0.
+        """
+        self.dim = dim
+        self.latency = latency
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _feature(feature:str) -> int:
+        return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def _vector(self, text:str) -> list[float]:
+        words = WORD_PATTERN.findall(text.lower())
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = self._feature(feature)
+            vector[digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts:list[str]) -> list[list[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text:str) -> list[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts:list[str]) -> list[list[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text:str) -> list[float]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._vector(text)
+
+
+class FakeModelError(Exception):
+    """Injected model failure, reported like an unavailable upstream (HTTP 503)."""
+
+    status_code = 503
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that streams a deterministic answer with a configurable delay before the first
+    token, a token rate and a failure rate. It reports token usage like a real provider.
+    """
+
+    model_name: str = "fake"
+    latency: float = 0.3
+    """Seconds before the first token."""
+    jitter: float = 0.1
+    """Maximum seconds added to or taken from `latency`, drawn uniformly per call."""
+    failure_rate: float = 0.0
+    """Share of calls that fail with `FakeModelError` after `latency`."""
+    tokens_per_second: float = 200.0
+    """Streaming speed after the first token; 0 streams the whole answer at once."""
+    answer_tokens: int = 60
+    seed: int = 0
+
+    _random: random.Random = PrivateAttr(default_factory=random.Random)
+
+    def model_post_init(self, __context:Any):
+        self._random.seed(f"{self.seed}:{self.model_name}")
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    @staticmethod
+    def _prompt_text(messages:list[BaseMessage]) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    def _plan(self, messages:list[BaseMessage]) -> tuple[float, bool, list[str], dict]:
+        """Draws the delay and outcome of one call and the answer tokens, which depend only on the prompt."""
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        fails = self._random.random() < self.failure_rate
+        prompt = self._prompt_text(messages)
+        answer = random.Random(zlib.crc32(prompt.encode("utf-8")))
+        tokens = [f"{answer.choice(ANSWER_VOCABULARY)} " for _ in range(self.answer_tokens)]
+        usage = {"input_tokens": -(-len(prompt) // 4), "output_tokens": len(tokens), "total_tokens": -(-len(prompt) // 4) + len(tokens)}
+        return delay, fails, tokens, usage
+
+    def _token_interval(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(
+            self, messages:list[BaseMessage], stop:list[str]|None=None,
+            run_manager:CallbackManagerForLLMRun|None=None, **kwargs
+        ) -> ChatResult:
+        delay, fails, tokens, usage = self._plan(messages)
+        time.sleep(delay + self._token_interval() * max(0, len(tokens) - 1))
+        if fails:
+            raise FakeModelError(f"Injected failure of {self.model_name}")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens), usage_metadata=usage))])
+
+    async def _agenerate(
+            self, messages:list[BaseMessage], stop:list[str]|None=None,
+            run_manager:AsyncCallbackManagerForLLMRun|None=None, **kwargs
+        ) -> ChatResult:
+        delay, fails, tokens, usage = self._plan(messages)
+        await asyncio.sleep(delay + self._token_interval() * max(0, len(tokens) - 1))
+        if fails:
+            raise FakeModelError(f"Injected failure of {self.model_name}")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens), usage_metadata=usage))])
+
+    def _stream(
+            self, messages:list[BaseMessage], stop:list[str]|None=None,
+            run_manager:CallbackManagerForLLMRun|None=None, **kwargs
+        ) -> Iterator[ChatGenerationChunk]:
+        delay, fails, tokens, usage = self._plan(messages)
+        time.sleep(delay)
+        if fails:
+            raise FakeModelError(f"Injected failure of {self.model_name}")
+        interval = self._token_interval()
+        for index, token in enumerate(tokens):
+            if index and interval:
+                time.sleep(interval)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    async def _astream(
+            self, messages:list[BaseMessage], stop:list[str]|None=None,
+            run_manager:AsyncCallbackManagerForLLMRun|None=None, **kwargs
+        ) -> AsyncIterator[ChatGenerationChunk]:
+        delay, fails, tokens, usage = self._plan(messages)
+        await asyncio.sleep(delay)
+        if fails:
+            raise FakeModelError(f"Injected failure of {self.model_name}")
+        interval = self._token_interval()
+        for index, token in enumerate(tokens):
+            if index and interval:
+                await asyncio.sleep(interval)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+
+class FakeLLMRegistry(LLMRegistry):
+    """`LLMRegistry` handing out `FakeChatModel`s, with a behaviour profile per model name."""
+
+    def __init__(self, default_profile:dict|None=None, profiles:dict[str, dict]|None=None):
+        """
+        Args:
+            default_profile (dict, optional): `FakeChatModel` settings (`latency`, `jitter`, `failure_rate`,
+                `tokens_per_second`, `answer_tokens`, `seed`) shared by every model.
+            profiles (dict[str, dict], optional): Settings overriding the default per model name.
+        """
+        super().__init__(provider="fake")
+        self.default_profile = dict(default_profile or {})
+        self.profiles = {model: dict(profile) for model, profile in (profiles or {}).items()}
+
+    def profile(self, model_name:str) -> dict:
+        return {**self.default_profile, **self.profiles.get(model_name, {})}
+
+    def _create_llm(self, model_name:str, temperature:float, max_tokens:int) -> BaseChatModel:
+        return FakeChatModel(model_name=model_name, **self.profile(model_name))
+
+    def set_profile(self, model_name:str, **changes):
+        """Changes a model's behaviour at runtime, including on the clients already handed out (fault injection)."""
+        with self._lock:
+            self.profiles[model_name] = {**self.profiles.get(model_name, {}), **changes}
+            for llm in self._llms.values():
+                if isinstance(llm, FakeChatModel) and llm.model_name == model_name:
+                    for key, value in changes.items():
+                        setattr(llm, key, value)
+
+
+def synthetic_corpus(catalog:dict[str, dict[str, list[str]]]|None=None, chunks_per_document:int=4) -> list[Document]:
+    """
+    Builds chunks for every plan and document category of the statewise catalog, with the
+    `plan`, `state`, `category`, `page` and `source` metadata that ingestion attaches.
+
+    Args:
+        catalog (dict, optional): Statewise catalog. Defaults to the configured dataset.
+        chunks_per_document (int): Chunks per catalog document. Defaults to 4.
+
+    Returns:
+        list[Document]: The chunks, with stable ids.
+    """
+    documents = []
+    for plan_key, categories in (catalog or load_catalog()).items():
+        plan, state, _ = parse_plan_key(plan_key)
+        for category, urls in categories.items():
+            templates = CHUNK_TEMPLATES.get(category) or [f"{{plan}} ({{state}}) {category.lower()} document."]
+            for page in range(chunks_per_document):
+                text = templates[page % len(templates)].format(plan=plan, state=state)
+                documents.append(Document(
+                    id=chunk_id(urls[0], page, 0), page_content=text,
+                    metadata={"plan": plan, "state": state, "category": category, "page": page, "source": urls[0]},
+                ))
+    return documents
+
+
+def plan_queries(catalog:dict[str, dict[str, list[str]]]|None=None) -> list[str]:
+    """Returns coverage, claim and proposal questions about every plan of the catalog."""
+    queries = []
+    for plan_key in catalog or load_catalog():
+        plan, state, _ = parse_plan_key(plan_key)
+        queries += [template.format(plan=plan, state=state) for template in QUERY_TEMPLATES]
+    return queries
+
+
+def build_offline_agent(
+        registry:FakeLLMRegistry, embeddings:Embeddings|None=None, retrieval:str="hybrid",
+        chunks_per_document:int=4, semantic_cache:bool=False, hedging:dict=HEDGING,
+        circuit_breaker:dict=CIRCUIT_BREAKER, llm_models:list=LLM_MODELS
+    ) -> Agents:
+    """
+    Builds an `Agents` on an in-memory local index of the synthetic corpus and fake chat models.
+
+    Args:
+        registry (FakeLLMRegistry): Registry providing the fake chat models.
+        embeddings (Embeddings, optional): Query and chunk embeddings. Defaults to `HashEmbeddings()`.
+        retrieval (str): "vector" or "hybrid" (vector fused with BM25). Defaults to "hybrid".
+        chunks_per_document (int): Corpus chunks per catalog document. Defaults to 4.
+        semantic_cache (bool): Use a private semantic cache; off by default so every request runs the full pipeline.
+        hedging (dict): Hedged fallback settings. Defaults to config.yaml.
+        circuit_breaker (dict): Circuit breaker settings. Defaults to config.yaml.
+        llm_models (list): The fallback list of models. Defaults to config.yaml.
+
+    Returns:
+        Agents: The agent, nothing of which touches the network or the artifact directory.
+    """
+    documents = synthetic_corpus(chunks_per_document=chunks_per_document)
+    with tempfile.TemporaryDirectory() as index_path:
+        vector_db = LocalIndex(index_path=index_path, embeddings=embeddings or HashEmbeddings(), quantization="none")
+    vector_db.vector_store.add_texts(
+        [doc.page_content for doc in documents], metadatas=[doc.metadata for doc in documents], ids=[doc.id for doc in documents]
+    )
+    if retrieval == "hybrid":
+        vector_db = HybridRetriever(vector_db, BM25Index.from_documents(documents))
+
+    return Agents(
+        llm_models=llm_models, vector_db=vector_db, llm_registry=registry, hedging=hedging,
+        circuit_breaker=circuit_breaker, semantic_cache=SemanticCache() if semantic_cache else None,
+    )
+
+
+def build_offline_graph(registry:FakeLLMRegistry, **kwargs) -> CompiledStateGraph:
+    """
+    Compiles the insurance agent graph on the stand-ins of `build_offline_agent`, with warmed-up model clients.
+
+    Args:
+        registry (FakeLLMRegistry): Registry providing the fake chat models.
+        **kwargs: Further arguments of `build_offline_agent`.
+
+    Returns:
+        CompiledStateGraph: The compiled graph.
+    """
+    agent = build_offline_agent(registry, **kwargs)
+    agent.warm_up()
+    return build_insurance_agent_graph(warm_up=False, agent=agent)
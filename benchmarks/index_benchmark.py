@@ -0,0 +1,97 @@
+"""
+Compares the float32 local index with its memory-mapped float16/int8 variants.
+
+Reports on-disk size, load time, mean query latency and recall@k against exact float32 search,
+using synthetic clustered embeddings so it runs without any API credentials.
+
+Usage:
+    python -m benchmarks.index_benchmark --rows 50000 --dim 768 --k 5
+"""
+import numpy as np
+
+from src.rag_component.numpy_store import NumpyVectorStore
+from src.rag_component.quantized_index import MmapVectorStore, write_quantized
+
+import argparse, json, os, shutil, tempfile, time
+
+
+def synthetic_embeddings(rows:int, dim:int, clusters:int=64, seed:int=0) -> np.ndarray:
+    """Generates clustered unit vectors, closer to real document embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.6 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def file_size(path:str, *names:str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in names if os.path.exists(os.path.join(path, name)))
+
+
+def run_queries(store:NumpyVectorStore, queries:np.ndarray, k:int) -> tuple[list[set], float]:
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append({doc.id for doc, _ in store.similarity_search_with_score_by_vector(query, k=k)})
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def benchmark(rows:int, dim:int, queries:int, k:int, rescore_factor:int) -> list[dict]:
+    path = tempfile.mkdtemp(prefix="index_benchmark_")
+    try:
+        vectors = synthetic_embeddings(rows, dim)
+        store = NumpyVectorStore(embedding=None)
+        store.add_embeddings([f"chunk {i}" for i in range(rows)], vectors, ids=[str(i) for i in range(rows)])
+        store.save(path)
+
+        probes = synthetic_embeddings(queries, dim, seed=1)
+        start = time.perf_counter()
+        exact_store = NumpyVectorStore.load(path, embedding=None)
+        float32_load = time.perf_counter() - start
+        exact, float32_latency = run_queries(exact_store, probes, k)
+
+        report = [{
+            "variant": "float32",
+            "scan_bytes": file_size(path, "embeddings.npy"),
+            "load_seconds": float32_load,
+            "query_ms": 1000 * float32_latency,
+            f"recall@{k}": 1.0,
+        }]
+
+        for quantization in ("float16", "int8"):
+            write_quantized(path, quantization)
+            for factor in sorted({1, rescore_factor}):
+                start = time.perf_counter()
+                mmap_store = MmapVectorStore.load(path, embedding=None, rescore_factor=factor)
+                load_seconds = time.perf_counter() - start
+                found, latency = run_queries(mmap_store, probes, k)
+                report.append({
+                    "variant": f"{quantization} (rescore x{factor})",
+                    "scan_bytes": file_size(path, "quantized.npy", "scales.npy"),
+                    "load_seconds": load_seconds,
+                    "query_ms": 1000 * latency,
+                    f"recall@{k}": float(np.mean([len(a & b) / k for a, b in zip(found, exact)])),
+                })
+        return report
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark quantized memory-mapped local index against float32.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--output", help="Optional path to write the report as JSON.")
+    args = parser.parse_args()
+
+    report = benchmark(args.rows, args.dim, args.queries, args.k, args.rescore_factor)
+    for row in report:
+        print(
+            f"{row['variant']:<22} scan={row['scan_bytes'] / 2**20:8.2f} MiB  load={row['load_seconds'] * 1000:8.2f} ms  "
+            f"query={row['query_ms']:7.3f} ms  recall@{args.k}={row[f'recall@{args.k}']:.3f}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,462 @@
+"""
+Open-loop load generator for the insurance agent, in process or against the HTTP service.
+
+Requests arrive as a Poisson process whose rate follows a list of phases (constant or linearly
+ramped), independently of how fast earlier requests complete, so queueing and tail latency under
+bursts show up instead of being hidden by a closed loop. Queries are drawn from a weighted mix of
+the quick queries, per-plan questions and document-link requests built from the statewise catalog.
+Fault hooks change a fake model's behaviour during a time window, e.g. to fail one model of the
+fallback list. Latency is measured from the scheduled arrival, so a stalled generator cannot hide
+queueing delay.
+
+Targets:
+    offline  the graph on the local stand-ins of `benchmarks.fakes` (default, no credentials)
+    graph    the configured graph from `get_insurance_agent_graph` (live models and vector store)
+    http     a running API, through the `/chat` server-sent-event stream and `/metrics`
+
+Usage:
+    python -m benchmarks.load_test --phase 20:1:10 --phase 60:10 --output load.json
+    python -m benchmarks.load_test --phase 90:8 --fault meta-llama/llama-guard-4-12b:30:60:failure_rate=1
+    python -m benchmarks.load_test --target http --url http://localhost:8000 --phase 60:5
+"""
+import httpx
+import numpy as np
+
+from src.agent_component.agent import FALLBACK_ANSWER
+from src.rag_component import QUICK_QUERIES
+from src.rag_component.query_analyzer import load_catalog, parse_plan_key
+from benchmarks.fakes import FakeLLMRegistry, build_offline_graph, plan_queries
+from benchmarks.pipeline_benchmark import git_commit, percentiles, rss_mb, stage_breakdown
+
+from tracing.tracer import InMemorySink, get_tracer
+from logger.custom_logger import CustomLogger
+
+from typing import Callable, Iterator
+import argparse, asyncio, json, platform, random, re, time
+
+logging = CustomLogger().get_logger(__file__)
+
+SHORT_CIRCUIT_NODES = ("catalog_lookup", "semantic_cache_lookup")
+
+HISTOGRAM_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+DOCUMENT_TEMPLATES = (
+    "Give me the {category} link for {plan} in {state}",
+    "Where can I download the {category} of the {plan} plan?",
+)
+
+DEFAULT_MIX = {"quick": 0.3, "plan": 0.5, "document": 0.2}
+
+SPAN_METRIC = re.compile(r'^insurance_agent_span_duration_seconds_(sum|count)\{span="([^"]+)"\} (\S+)$')
+
+
+def document_queries(catalog:dict[str, dict[str, list[str]]]|None=None) -> list[str]:
+    """Returns download requests for every plan and document category of the catalog."""
+    queries = []
+    for plan_key, categories in (catalog or load_catalog()).items():
+        plan, state, _ = parse_plan_key(plan_key)
+        for category in categories:
+            queries += [template.format(category=category.lower(), plan=plan, state=state) for template in DOCUMENT_TEMPLATES]
+    return queries
+
+
+class QueryMix:
+    """Weighted mix of query classes: `quick` (the UI's quick queries), `plan` questions and `document` link requests."""
+
+    def __init__(self, weights:dict[str, float], seed:int=0):
+        """
+        Args:
+            weights (dict[str, float]): Relative weight per query class.
+            seed (int): Seed of the sampling. Defaults to 0.
+        """
+        catalog = load_catalog()
+        queries = {"quick": list(QUICK_QUERIES), "plan": plan_queries(catalog), "document": document_queries(catalog)}
+        unknown = set(weights) - set(queries)
+        if unknown:
+            raise ValueError(f"Unknown query classes {sorted(unknown)}, expected {sorted(queries)}")
+        self.classes = [name for name, weight in weights.items() if weight > 0]
+        self.weights = [weights[name] for name in self.classes]
+        self.queries = queries
+        self._random = random.Random(seed)
+
+    def sample(self) -> tuple[str, str]:
+        """Returns a (query class, query) pair."""
+        name = self._random.choices(self.classes, self.weights)[0]
+        return name, self._random.choice(self.queries[name])
+
+
+class Phase:
+    """A period of the test with an arrival rate that is constant or ramps linearly from `start_rps` to `end_rps`."""
+
+    def __init__(self, duration:float, start_rps:float, end_rps:float|None=None):
+        self.duration = duration
+        self.start_rps = start_rps
+        self.end_rps = start_rps if end_rps is None else end_rps
+
+    @classmethod
+    def parse(cls, spec:str) -> "Phase":
+        """Parses `SECONDS:RPS` or `SECONDS:START_RPS:END_RPS`."""
+        values = [float(value) for value in spec.split(":")]
+        if len(values) not in (2, 3):
+            raise argparse.ArgumentTypeError(f"Invalid phase {spec!r}, expected SECONDS:RPS[:END_RPS]")
+        return cls(*values)
+
+    def rate(self, elapsed:float) -> float:
+        return self.start_rps + (self.end_rps - self.start_rps) * min(1.0, elapsed / self.duration)
+
+    def to_dict(self) -> dict:
+        return {"duration": self.duration, "start_rps": self.start_rps, "end_rps": self.end_rps}
+
+
+def arrivals(phases:list[Phase], rng:random.Random) -> Iterator[tuple[float, int]]:
+    """
+    Yields (offset in seconds, phase index) of Poisson arrivals following the phase rates.
+
+    Ramps are sampled by thinning: candidates arrive at the phase's peak rate and each is kept
+    with probability `rate(t) / peak`.
+    """
+    offset = 0.0
+    for index, phase in enumerate(phases):
+        peak = max(phase.start_rps, phase.end_rps)
+        t = offset
+        while peak > 0:
+            t += rng.expovariate(peak)
+            if t >= offset + phase.duration:
+                break
+            if rng.random() * peak <= phase.rate(t - offset):
+                yield t, index
+        offset += phase.duration
+
+
+class FaultSchedule:
+    """Runs callbacks at offsets into the load test, e.g. to degrade a model and later restore it."""
+
+    def __init__(self):
+        self._events: list[tuple[float, str, Callable[[], None]]] = []
+        self.log: list[dict] = []
+
+    def at(self, seconds:float, label:str, callback:Callable[[], None]):
+        self._events.append((seconds, label, callback))
+
+    def add_model_fault(self, registry:FakeLLMRegistry, model:str, start:float, end:float, changes:dict):
+        """Applies `changes` to a fake model's profile from `start` to `end` seconds, then restores the previous values."""
+        previous = {key: registry.profile(model).get(key) for key in changes}
+        self.at(start, f"{model}: {changes}", lambda: registry.set_profile(model, **changes))
+        self.at(end, f"{model}: restored {previous}", lambda: registry.set_profile(model, **previous))
+
+    @staticmethod
+    def parse(spec:str) -> tuple[str, float, float, dict]:
+        """Parses `MODEL:START:END:key=value[,key=value]`, e.g. `llama-3.1-8b-instant:30:60:failure_rate=1,latency=4`."""
+        try:
+            model, start, end, changes = spec.rsplit(":", 3)
+            return model, float(start), float(end), {
+                key.strip(): float(value) for key, value in (change.split("=") for change in changes.split(","))
+            }
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid fault {spec!r}, expected MODEL:START:END:key=value[,key=value]")
+
+    async def run(self, started:float):
+        for seconds, label, callback in sorted(self._events, key=lambda event: event[0]):
+            await asyncio.sleep(max(0.0, started + seconds - time.perf_counter()))
+            callback()
+            self.log.append({"offset": round(time.perf_counter() - started, 3), "event": label})
+            logging.warning("Load test fault at %.1fs: %s", seconds, label)
+
+
+class GraphTarget:
+    """Sends queries through an in-process compiled graph, streaming them like the `/chat` endpoint."""
+
+    def __init__(self, graph, timeout:float):
+        self.graph = graph
+        self.timeout = timeout
+        self.sink = InMemorySink(max_spans=1_000_000)
+        get_tracer().set_sink(self.sink)
+
+    async def _stream(self, query:str, started:float, result:dict):
+        content, message_id = [], None
+        with get_tracer().span("chat", **{"chat.streaming": True}):
+            async for mode, chunk in self.graph.astream({"query": query}, stream_mode=["messages", "updates"]):
+                if mode == "messages":
+                    message, metadata = chunk
+                    if metadata["langgraph_node"] != "insurance_agent" or not message.content:
+                        continue
+                    # The next model's answer replaces the partial answer of a model that failed mid-stream
+                    if message_id not in (None, message.id):
+                        content.clear()
+                    message_id = message.id
+                    text = message.content
+                else:
+                    text = next((chunk[node]["answer"] for node in SHORT_CIRCUIT_NODES if (chunk.get(node) or {}).get("answer")), None)
+                    if not text:
+                        continue
+                if result["ttft"] is None:
+                    result["ttft"] = time.perf_counter() - started
+                content.append(str(getattr(text, "content", text)))
+        result["outcome"] = "fallback" if "".join(content) == FALLBACK_ANSWER else "ok"
+
+    async def send(self, query:str) -> dict:
+        result = {"outcome": "error", "ttft": None}
+        try:
+            await asyncio.wait_for(self._stream(query, time.perf_counter(), result), self.timeout)
+        except asyncio.TimeoutError:
+            result["outcome"] = "timeout"
+        return result
+
+    async def stages(self) -> dict:
+        return stage_breakdown(self.sink)
+
+    async def close(self):
+        pass
+
+
+class HttpTarget:
+    """Sends queries to a running API over `/chat` and reads the per-stage latency from `/metrics`."""
+
+    def __init__(self, url:str, timeout:float):
+        self.url = url.rstrip("/")
+        self.client = httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=None, max_keepalive_connections=64))
+        self._baseline: dict | None = None
+
+    async def _span_totals(self) -> dict[str, dict[str, float]]:
+        try:
+            response = await self.client.get(f"{self.url}/metrics")
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return {}
+        totals: dict[str, dict[str, float]] = {}
+        for line in response.text.splitlines():
+            match = SPAN_METRIC.match(line)
+            if match:
+                totals.setdefault(match.group(2), {})[match.group(1)] = float(match.group(3))
+        return totals
+
+    async def start(self):
+        self._baseline = await self._span_totals()
+
+    async def send(self, query:str) -> dict:
+        result = {"outcome": "error", "ttft": None}
+        started = time.perf_counter()
+        content, event = [], None
+        try:
+            async with self.client.stream("POST", f"{self.url}/chat", json={"query": query}) as response:
+                if response.status_code == 503:
+                    result["outcome"] = "rejected"
+                    return result
+                if response.status_code != 200:
+                    return result
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        if event == "reset":
+                            content.clear()
+                    elif line.startswith("data: ") and event == "token":
+                        if result["ttft"] is None:
+                            result["ttft"] = time.perf_counter() - started
+                        content.append(json.loads(line[len("data: "):])["content"])
+                    elif line.startswith("data: ") and event == "end":
+                        result["outcome"] = "fallback" if "".join(content) == FALLBACK_ANSWER else "ok"
+        except httpx.TimeoutException:
+            result["outcome"] = "timeout"
+        except httpx.HTTPError:
+            result["outcome"] = "error"
+        return result
+
+    async def stages(self) -> dict:
+        """Mean latency per span over the test, from the difference of the server's span histograms."""
+        baseline, totals = self._baseline or {}, await self._span_totals()
+        stages = {}
+        for name, values in sorted(totals.items()):
+            count = values.get("count", 0) - baseline.get(name, {}).get("count", 0)
+            if count > 0:
+                total = values.get("sum", 0) - baseline.get(name, {}).get("sum", 0)
+                stages[name] = {"count": int(count), "mean": 1000 * total / count}
+        return stages
+
+    async def close(self):
+        await self.client.aclose()
+
+
+async def run_load(target, mix:QueryMix, phases:list[Phase], schedule:FaultSchedule, max_in_flight:int, seed:int) -> list[dict]:
+    """
+    Drives the target with the phases' arrivals and returns one record per arrival.
+
+    Arrivals beyond `max_in_flight` outstanding requests are recorded as `dropped` instead of sent,
+    which bounds the generator's own memory when the target falls far behind.
+    """
+    records = []
+    tasks = set()
+    in_flight = 0
+    started = time.perf_counter()
+
+    async def request(offset:float, phase:int, name:str, query:str):
+        nonlocal in_flight
+        in_flight += 1
+        lag = time.perf_counter() - started - offset
+        record = {"offset": offset, "phase": phase, "class": name, "in_flight": in_flight}
+        try:
+            record.update(await target.send(query))
+        except Exception as e:
+            record.update(outcome="error", ttft=None, error=type(e).__name__)
+        finally:
+            in_flight -= 1
+        # Measured from the scheduled arrival, so generator lag counts as queueing delay
+        record["latency"] = time.perf_counter() - started - offset
+        if record["ttft"] is not None:
+            record["ttft"] += max(0.0, lag)
+        records.append(record)
+
+    faults = asyncio.create_task(schedule.run(started))
+    try:
+        for offset, phase in arrivals(phases, random.Random(seed)):
+            await asyncio.sleep(max(0.0, started + offset - time.perf_counter()))
+            name, query = mix.sample()
+            if in_flight >= max_in_flight:
+                records.append({"offset": offset, "phase": phase, "class": name, "outcome": "dropped", "latency": None, "ttft": None})
+                continue
+            task = asyncio.create_task(request(offset, phase, name, query))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    finally:
+        faults.cancel()
+    return sorted(records, key=lambda record: record["offset"])
+
+
+def summarize(records:list[dict]) -> dict:
+    """Outcome counts and latency/TTFT percentiles (ms) of answered requests."""
+    outcomes: dict[str, int] = {}
+    for record in records:
+        outcomes[record["outcome"]] = outcomes.get(record["outcome"], 0) + 1
+    answered = [record for record in records if record["outcome"] in ("ok", "fallback")]
+    return {
+        "requests": len(records),
+        "outcomes": outcomes,
+        "latency_ms": percentiles([record["latency"] for record in answered]),
+        "ttft_ms": percentiles([record["ttft"] for record in answered if record["ttft"] is not None]),
+    }
+
+
+def histogram(latencies:list[float]) -> list[dict]:
+    """Counts latencies into `HISTOGRAM_BUCKETS_MS` (upper bounds, plus overflow)."""
+    counts = np.bincount(np.searchsorted(HISTOGRAM_BUCKETS_MS, 1000 * np.asarray(latencies), side="left"), minlength=len(HISTOGRAM_BUCKETS_MS) + 1)
+    return [{"le_ms": bound, "count": int(count)} for bound, count in zip([*HISTOGRAM_BUCKETS_MS, "inf"], counts)]
+
+
+def timeline(records:list[dict], window:float=1.0) -> list[dict]:
+    """Per-window arrivals, outcome counts, p95 latency and peak in-flight requests, by arrival time."""
+    windows: dict[int, list[dict]] = {}
+    for record in records:
+        windows.setdefault(int(record["offset"] // window), []).append(record)
+    rows = []
+    for index in range(max(windows, default=-1) + 1):
+        bucket = windows.get(index, [])
+        latencies = [record["latency"] for record in bucket if record["outcome"] in ("ok", "fallback")]
+        rows.append({
+            "start": index * window,
+            "arrivals": len(bucket),
+            "ok": sum(record["outcome"] == "ok" for record in bucket),
+            "failed": sum(record["outcome"] != "ok" for record in bucket),
+            "p95_ms": float(np.percentile(1000 * np.asarray(latencies), 95)) if latencies else None,
+            "max_in_flight": max((record.get("in_flight", 0) for record in bucket), default=0),
+        })
+    return rows
+
+
+def print_histogram(rows:list[dict], width:int=50):
+    peak = max((row["count"] for row in rows), default=0) or 1
+    for row in rows:
+        label = f"<= {row['le_ms']} ms" if row["le_ms"] != "inf" else f"> {HISTOGRAM_BUCKETS_MS[-1]} ms"
+        print(f"{label:>12} {row['count']:7d} {'#' * round(width * row['count'] / peak)}")
+
+
+async def load_test(args:argparse.Namespace) -> dict:
+    schedule = FaultSchedule()
+    if args.target == "http":
+        target = HttpTarget(args.url, args.timeout)
+        await target.start()
+    elif args.target == "graph":
+        from src.agent_component.graph_builder import get_insurance_agent_graph
+        target = GraphTarget(await asyncio.to_thread(get_insurance_agent_graph), args.timeout)
+    else:
+        registry = FakeLLMRegistry({
+            "latency": args.latency, "jitter": args.jitter, "failure_rate": args.failure_rate,
+            "tokens_per_second": args.tokens_per_second, "answer_tokens": args.answer_tokens, "seed": args.seed,
+        })
+        target = GraphTarget(build_offline_graph(registry, semantic_cache=args.semantic_cache), args.timeout)
+        for model, start, end, changes in args.fault:
+            schedule.add_model_fault(registry, model, start, end, changes)
+    if args.fault and args.target != "offline":
+        logging.warning("Fault injection needs the offline target's fake models; --fault is ignored")
+
+    try:
+        records = await run_load(target, QueryMix(args.mix, args.seed), args.phase, schedule, args.max_in_flight, args.seed)
+        stages = await target.stages()
+    finally:
+        await target.close()
+
+    answered = [record["latency"] for record in records if record["outcome"] in ("ok", "fallback")]
+    duration = sum(phase.duration for phase in args.phase)
+    return {
+        "meta": {"commit": git_commit(), "python": platform.python_version(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")},
+        "settings": {
+            **{key: value for key, value in vars(args).items() if key not in ("phase", "fault", "output")},
+            "phases": [phase.to_dict() for phase in args.phase],
+        },
+        "faults": schedule.log,
+        "summary": {**summarize(records), "offered_rps": len(records) / duration, "answered_rps": len(answered) / duration, "rss_mb": rss_mb()},
+        "phases": [summarize([record for record in records if record["phase"] == index]) for index in range(len(args.phase))],
+        "classes": {name: summarize([record for record in records if record["class"] == name]) for name in args.mix},
+        "histogram": histogram(answered),
+        "timeline": timeline(records, args.window),
+        "stages": stages,
+    }
+
+
+def parse_mix(spec:str) -> dict[str, float]:
+    """Parses `quick=0.3,plan=0.5,document=0.2`."""
+    try:
+        return {name.strip(): float(weight) for name, weight in (part.split("=") for part in spec.split(","))}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid mix {spec!r}, expected class=weight[,class=weight]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load test of the insurance agent.")
+    parser.add_argument("--target", choices=["offline", "graph", "http"], default="offline")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL of the http target.")
+    parser.add_argument("--phase", type=Phase.parse, action="append", help="SECONDS:RPS or SECONDS:START_RPS:END_RPS; repeat for several phases.")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Query class weights, e.g. quick=0.3,plan=0.5,document=0.2.")
+    parser.add_argument("--fault", type=FaultSchedule.parse, action="append", default=[], help="MODEL:START:END:key=value[,...]; offline target only.")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Outstanding requests beyond which arrivals are dropped.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a request counts as timed out.")
+    parser.add_argument("--window", type=float, default=1.0, help="Seconds per timeline row.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Offline target: seconds before a model's first token.")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Offline target: uniform +- seconds around --latency.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Offline target: share of model calls that fail.")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Offline target: model streaming speed.")
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--semantic-cache", action="store_true", help="Offline target: serve repeated queries from a semantic cache.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Optional path to write the report as JSON.")
+    args = parser.parse_args()
+    args.phase = args.phase or [Phase(10, 1, 5), Phase(30, 5)]
+
+    CustomLogger().logger.setLevel(args.log_level)
+
+    report = asyncio.run(load_test(args))
+    summary = report["summary"]
+    latency, ttft = summary["latency_ms"], summary["ttft_ms"]
+    print(f"requests={summary['requests']} outcomes={summary['outcomes']} offered={summary['offered_rps']:.2f} rps answered={summary['answered_rps']:.2f} rps")
+    if latency["p50"] is not None:
+        print(f"latency p50={latency['p50']:.1f} p95={latency['p95']:.1f} p99={latency['p99']:.1f} ms  ttft p50={ttft['p50'] or 0:.1f} p95={ttft['p95'] or 0:.1f} ms")
+    for index, phase in enumerate(report["phases"]):
+        print(f"phase {index}: {phase['requests']} requests {phase['outcomes']} p95={phase['latency_ms']['p95'] or 0:.1f} ms")
+    print_histogram(report["histogram"])
+    for name, stage in report["stages"].items():
+        print(f"{name:<28} count={stage['count']:6d} mean={stage['mean']:9.2f} ms")
+    for fault in report["faults"]:
+        print(f"fault at {fault['offset']:.1f}s: {fault['event']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,231 @@
+"""
+End-to-end latency and throughput of the insurance agent graph on local stand-ins.
+
+The graph built by `build_insurance_agent_graph` runs against hash embeddings, an in-memory
+local index of a synthetic statewise corpus and fake chat models with configurable latency,
+jitter, failure rate and streaming speed, so it needs no API credentials. For every concurrency
+level, a closed loop of workers sends the requests and the report gives p50/p95/p99 latency,
+requests/sec, memory and a per-stage breakdown from the tracing spans. Reports are written as
+JSON and can be compared with a report of an earlier commit.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --concurrency 1 8 32 --requests 200 --output report.json
+    python -m benchmarks.pipeline_benchmark --latency 0.5 --failure-rate 0.2 --compare baseline.json
+"""
+import numpy as np
+
+from src.agent_component.agent import FALLBACK_ANSWER
+from src.rag_component import QUICK_QUERIES
+from benchmarks.fakes import FakeLLMRegistry, build_offline_graph, plan_queries
+
+from tracing.tracer import InMemorySink, get_tracer
+from logger.custom_logger import CustomLogger
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse, asyncio, json, os, platform, subprocess, sys, time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentiles(values:list[float]) -> dict:
+    """Returns p50/p95/p99, mean and max of latencies in seconds, in milliseconds."""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    array = 1000 * np.asarray(values)
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "mean": float(array.mean()), "max": float(array.max())}
+
+
+def rss_mb() -> float|None:
+    """Current resident set size of the process, where /proc is available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> float|None:
+    """Peak resident set size of the process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def git_commit() -> str|None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def outcome(state:dict) -> str:
+    answer = state.get("answer")
+    text = getattr(answer, "content", answer)
+    return "fallback" if text == FALLBACK_ANSWER else "ok"
+
+
+async def run_async(graph, queries:list[str], concurrency:int) -> list[tuple[float, str]]:
+    """Sends the queries with `ainvoke` from `concurrency` workers; returns (latency, outcome) per request."""
+    pending = iter(queries)
+    results = []
+
+    async def worker():
+        for query in pending:
+            start = time.perf_counter()
+            try:
+                result = outcome(await graph.ainvoke({"query": query}))
+            except Exception:
+                result = "error"
+            results.append((time.perf_counter() - start, result))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def run_sync(graph, queries:list[str], concurrency:int) -> list[tuple[float, str]]:
+    """Sends the queries with `invoke` from `concurrency` threads; returns (latency, outcome) per request."""
+    def timed(query:str) -> tuple[float, str]:
+        start = time.perf_counter()
+        try:
+            result = outcome(graph.invoke({"query": query}))
+        except Exception:
+            result = "error"
+        return time.perf_counter() - start, result
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(timed, queries))
+
+
+def stage_breakdown(sink:InMemorySink) -> dict:
+    """Returns count and latency percentiles of every span name recorded in the sink."""
+    durations: dict[str, list[float]] = {}
+    for span in sink.spans:
+        durations.setdefault(span.name, []).append(span.duration)
+    return {
+        name: {"count": len(values), **{key: value for key, value in percentiles(values).items() if key in ("p50", "p95", "mean")}}
+        for name, values in sorted(durations.items())
+    }
+
+
+def workload(requests:int, seed:int) -> list[str]:
+    """Samples `requests` queries from the quick queries and the per-plan questions."""
+    pool = list(QUICK_QUERIES) + plan_queries()
+    rng = np.random.default_rng(seed)
+    return [pool[index] for index in rng.integers(0, len(pool), requests)]
+
+
+def benchmark(args:argparse.Namespace) -> dict:
+    registry = FakeLLMRegistry({
+        "latency": args.latency, "jitter": args.jitter, "failure_rate": args.failure_rate,
+        "tokens_per_second": args.tokens_per_second, "answer_tokens": args.answer_tokens, "seed": args.seed,
+    })
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    graph = build_offline_graph(
+        registry, retrieval=args.retrieval, chunks_per_document=args.chunks_per_document, semantic_cache=args.semantic_cache
+    )
+    build_seconds = time.perf_counter() - start
+
+    sink = InMemorySink(max_spans=args.requests * 50)
+    get_tracer().set_sink(sink)
+
+    results = []
+    for concurrency in args.concurrency:
+        queries = workload(args.warmup + args.requests, args.seed + concurrency)
+        run = run_sync if args.mode == "sync" else lambda *a: asyncio.run(run_async(*a))
+        run(graph, queries[:args.warmup], concurrency)
+
+        sink.clear()
+        start = time.perf_counter()
+        timings = run(graph, queries[args.warmup:], concurrency)
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for latency, result in timings if result != "error"]
+        results.append({
+            "concurrency": concurrency,
+            "requests": len(timings),
+            "errors": sum(result == "error" for _, result in timings),
+            "fallbacks": sum(result == "fallback" for _, result in timings),
+            "seconds": elapsed,
+            "requests_per_second": len(timings) / elapsed,
+            "latency_ms": percentiles(latencies),
+            "rss_mb": rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stage_breakdown(sink),
+        })
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "setup": {"build_seconds": build_seconds, "rss_before_mb": rss_before, "rss_after_build_mb": rss_mb()},
+        "results": results,
+    }
+
+
+def compare(baseline:dict, report:dict) -> list[str]:
+    """Returns one line per concurrency level with the relative change of latency and throughput against a baseline report."""
+    def change(new, old):
+        return f"{100 * (new - old) / old:+6.1f}%" if new is not None and old else "   n/a"
+
+    previous = {row["concurrency"]: row for row in baseline["results"]}
+    lines = []
+    for row in report["results"]:
+        old = previous.get(row["concurrency"])
+        if old is None:
+            continue
+        lines.append(
+            f"concurrency={row['concurrency']:<4} p50 {change(row['latency_ms']['p50'], old['latency_ms']['p50'])}  "
+            f"p95 {change(row['latency_ms']['p95'], old['latency_ms']['p95'])}  "
+            f"p99 {change(row['latency_ms']['p99'], old['latency_ms']['p99'])}  "
+            f"rps {change(row['requests_per_second'], old['requests_per_second'])}"
+        )
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the insurance agent graph end to end on local stand-ins.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrent requests per run.")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per concurrency level.")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests before each level.")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async", help="Drive the graph with ainvoke or with invoke from threads.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds before a model's first token.")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Uniform +- seconds around --latency.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of model calls that fail.")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Model streaming speed; 0 answers at once.")
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--retrieval", choices=["vector", "hybrid"], default="hybrid")
+    parser.add_argument("--chunks-per-document", type=int, default=4, help="Synthetic corpus chunks per catalog document.")
+    parser.add_argument("--semantic-cache", action="store_true", help="Serve repeated queries from a semantic cache.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING", help="Log level while benchmarking; per-request INFO logs skew results.")
+    parser.add_argument("--output", help="Optional path to write the report as JSON.")
+    parser.add_argument("--compare", help="Optional baseline report to compare against.")
+    args = parser.parse_args()
+
+    CustomLogger().logger.setLevel(args.log_level)
+
+    report = benchmark(args)
+    for row in report["results"]:
+        latency = {key: value or 0.0 for key, value in row["latency_ms"].items()}
+        print(
+            f"concurrency={row['concurrency']:<4} rps={row['requests_per_second']:8.2f}  p50={latency['p50']:8.1f} ms  "
+            f"p95={latency['p95']:8.1f} ms  p99={latency['p99']:8.1f} ms  errors={row['errors']} fallbacks={row['fallbacks']}  "
+            f"rss={row['rss_mb'] or 0:7.1f} MiB"
+        )
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(json.load(f), report)))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
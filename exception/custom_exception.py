@@ -1,17 +1,85 @@
-import sys, traceback
+import sys, threading, traceback
+from collections import Counter
+from logging import DEBUG
 from logger.custom_logger import CustomLogger
 from typing import Optional, cast
 
 logging = CustomLogger().get_logger(__file__)
 
+# Error codes
+TIMEOUT = "timeout"
+RETRIEVAL_TIMEOUT = "retrieval_timeout"
+MODEL_TIMEOUT = "model_timeout"
+RATE_LIMITED = "rate_limited"
+MODEL_UNAVAILABLE = "model_unavailable"
+CONNECTION_ERROR = "connection_error"
+AUTH_ERROR = "auth_error"
+INVALID_REQUEST = "invalid_request"
+INTERNAL = "internal"
+
+# Expected upstream failures: logged as a one-line summary unless DEBUG logging is enabled
+EXPECTED_CODES = {TIMEOUT, RETRIEVAL_TIMEOUT, MODEL_TIMEOUT, RATE_LIMITED, MODEL_UNAVAILABLE, CONNECTION_ERROR}
+
+_counts: Counter = Counter()
+_counts_lock = threading.Lock()
+
+
+def classify(error:BaseException|None, stage:str|None=None) -> str:
+    """
+    Maps an exception to an error code from its type name and HTTP status, without importing client libraries.
+
+    Args:
+        error (BaseException | None): The exception to classify.
+        stage (str, optional): "retrieval" or "model", to tell their timeouts apart.
+
+    Returns:
+        str: One of the module's error codes.
+    """
+    if error is None:
+        return INTERNAL
+    names = [cls.__name__ for cls in type(error).__mro__]
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+
+    if isinstance(error, TimeoutError) or any("Timeout" in name for name in names):
+        return {"retrieval": RETRIEVAL_TIMEOUT, "model": MODEL_TIMEOUT}.get(stage, TIMEOUT)
+    if status == 429 or any("RateLimit" in name for name in names):
+        return RATE_LIMITED
+    if status in (401, 403) or any(name in ("AuthenticationError", "PermissionDeniedError") for name in names):
+        return AUTH_ERROR
+    if isinstance(status, int) and status >= 500 or any(name in ("InternalServerError", "ServiceUnavailableError") for name in names):
+        return MODEL_UNAVAILABLE if stage == "model" else CONNECTION_ERROR
+    if isinstance(error, ConnectionError) or any("Connection" in name for name in names):
+        return MODEL_UNAVAILABLE if stage == "model" else CONNECTION_ERROR
+    if status in (400, 404, 413, 422) or any(name in ("BadRequestError", "NotFoundError", "UnprocessableEntityError") for name in names):
+        return INVALID_REQUEST
+    return INTERNAL
+
+
+def error_counts() -> dict[str, int]:
+    """Returns the number of `CustomException`s raised per error code since the process started."""
+    with _counts_lock:
+        return dict(_counts)
+
+
 class CustomException(Exception):
-    """Custom exception class that captures the stack trace and provides a formatted error message."""
-    def __init__(self, error_message, error_details: Optional[object] = None):
+    """
+    Exception wrapper that captures where an error happened and classifies it with an error code.
+
+    Capturing is cheap: the traceback object is kept and only formatted when the exception is
+    rendered. Expected upstream failures (timeouts, rate limits, unavailable models) render as a
+    one-line summary unless DEBUG logging is enabled; other errors include the full traceback.
+    """
+    def __init__(self, error_message, error_details: Optional[object] = None, code:str|None=None, stage:str|None=None):
+        """
+        Args:
+            error_message: The error, or a message describing it.
+            error_details (optional): `sys` for the exception being handled, or an exception object.
+            code (str, optional): Error code, overriding the classification.
+            stage (str, optional): "retrieval" or "model", to tell their timeouts apart.
+        """
         # Normalize message
-        if isinstance(error_message, BaseException):
-            norm_msg = str(error_message)
-        else:
-            norm_msg = str(error_message)
+        norm_msg = str(error_message)
 
         # Resolve exc_info (supports: sys module, Exception object, or current context)
         exc_type = exc_value = exc_tb = None
@@ -19,13 +87,14 @@ class CustomException(Exception):
             exc_type, exc_value, exc_tb = sys.exc_info()
         else:
             if hasattr(error_details, "exc_info"):  # e.g., sys
-                #exc_type, exc_value, exc_tb = error_details.exc_info()
                 exc_info_obj = cast(sys, error_details)
                 exc_type, exc_value, exc_tb = exc_info_obj.exc_info()
             elif isinstance(error_details, BaseException):
                 exc_type, exc_value, exc_tb = type(error_details), error_details, error_details.__traceback__
             else:
                 exc_type, exc_value, exc_tb = sys.exc_info()
+        if exc_value is None and isinstance(error_message, BaseException):
+            exc_type, exc_value, exc_tb = type(error_message), error_message, error_message.__traceback__
 
         # Walk to the last frame to report the most relevant location
         last_tb = exc_tb
@@ -35,24 +104,51 @@ class CustomException(Exception):
         self.file_name = last_tb.tb_frame.f_code.co_filename if last_tb else "<unknown>"
         self.lineno = last_tb.tb_lineno if last_tb else -1
         self.error_message = norm_msg
+        self.error_type = exc_type.__name__ if exc_type else type(error_message).__name__
+        self.code = code or classify(exc_value, stage)
+        self.stage = stage
+        self._exc_info = (exc_type, exc_value, exc_tb)
+        self._traceback_str = None
 
-        # Full pretty traceback (if available)
-        if exc_type and exc_tb:
-            self.traceback_str = ''.join(traceback.format_exception(exc_type, exc_value, exc_tb))
-        else:
-            self.traceback_str = ""
+        with _counts_lock:
+            _counts[self.code] += 1
+
+        super().__init__(self.summary())
+
+    @property
+    def traceback_str(self) -> str:
+        """Full pretty traceback, formatted on first access (empty if none is available)."""
+        if self._traceback_str is None:
+            exc_type, exc_value, exc_tb = self._exc_info
+            self._traceback_str = ''.join(traceback.format_exception(exc_type, exc_value, exc_tb)) if exc_type and exc_tb else ""
+        return self._traceback_str
+
+    def summary(self) -> str:
+        """Compact one-line message without the traceback."""
+        return f"[{self.code}] Error in [{self.file_name}] at line [{self.lineno}] | Message: {self.error_message}"
 
-        super().__init__(self.__str__())
+    def to_dict(self) -> dict:
+        """Structured fields of the error, e.g. for JSON logs or API responses."""
+        return {
+            "code": self.code,
+            "stage": self.stage,
+            "type": self.error_type,
+            "message": self.error_message,
+            "file": self.file_name,
+            "line": self.lineno,
+        }
 
     def __str__(self):
         # Compact, logger-friendly message (no leading spaces)
-        base = f"Error in [{self.file_name}] at line [{self.lineno}] | Message: {self.error_message}"
+        base = self.summary()
+        if self.code in EXPECTED_CODES and not logging.isEnabledFor(DEBUG):
+            return base
         if self.traceback_str:
             return f"{base}\nTraceback:\n{self.traceback_str}"
         return base
 
     def __repr__(self):
-        return f"DocumentPortalException(file={self.file_name!r}, line={self.lineno}, message={self.error_message!r})"
+        return f"CustomException(code={self.code!r}, file={self.file_name!r}, line={self.lineno}, message={self.error_message!r})"
 
 if __name__ == "__main__":
     try:
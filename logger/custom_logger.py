@@ -1,34 +1,184 @@
 import os
+import json
+import yaml
+import atexit
 import logging
-from datetime import datetime
+import itertools
+import threading
+from queue import SimpleQueue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+CONFIG_PATH = os.path.join("config", "config.yaml")
+
+DEFAULT_SETTINGS = {
+    "level": "INFO",
+    "dir": "logs",
+    "file_name": "app.log",
+    "console": True,
+    "json": False,
+    "rotation": "size",         # size | time
+    "max_bytes": 10 * 1024 * 1024,
+    "when": "midnight",
+    "backup_count": 5,
+    "sample_rate": 1.0,         # share of INFO/DEBUG records kept per call site
+    "max_message_chars": 4000,
+}
+
+TEXT_FORMAT = "[ %(asctime)s ] %(levelname)s %(name)s (line:%(lineno)d) - %(message)s"
+
+
+def load_settings(config_path:str=CONFIG_PATH) -> dict:
+    """Returns the `logging` section of config.yaml merged over the defaults."""
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(config_path):
+        with open(config_path, "r") as file:
+            settings.update((yaml.safe_load(file) or {}).get("logging") or {})
+    return settings
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every `1 / sample_rate` INFO and DEBUG records per call site; warnings and errors always pass.
+
+    Counting per (logger, line) rather than sampling randomly keeps every call site represented,
+    including rare ones, while high-volume per-request lines are thinned out.
+    """
+
+    def __init__(self, sample_rate:float):
+        super().__init__()
+        self.every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self._counters: dict[tuple, itertools.count] = {}
+
+    def filter(self, record:logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.every == 1:
+            return True
+        if not self.every:
+            return False
+        counter = self._counters.get((record.name, record.lineno))
+        if counter is None:
+            counter = self._counters.setdefault((record.name, record.lineno), itertools.count())
+        return next(counter) % self.every == 0
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues records as they are, so message interpolation and traceback formatting happen on the
+    listener thread instead of the request thread. The queue never leaves the process, so records
+    need not be made picklable.
+    """
+
+    def prepare(self, record:logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class TruncatingFormatter(logging.Formatter):
+    """Text formatter that caps the rendered message, so long queries and contexts do not flood the log."""
+
+    def __init__(self, fmt:str, max_message_chars:int):
+        super().__init__(fmt)
+        self.max_message_chars = max_message_chars
+
+    def formatMessage(self, record:logging.LogRecord) -> str:
+        if self.max_message_chars and len(record.message) > self.max_message_chars:
+            record.message = f"{record.message[:self.max_message_chars]}... [{len(record.message)} chars]"
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def __init__(self, max_message_chars:int):
+        super().__init__()
+        self.max_message_chars = max_message_chars
+
+    def format(self, record:logging.LogRecord) -> str:
+        message = record.getMessage()
+        if self.max_message_chars and len(message) > self.max_message_chars:
+            message = f"{message[:self.max_message_chars]}... [{len(message)} chars]"
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": message,
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
 
 class CustomLogger:
-    def __init__(self, log_dir="logs"):
-        self.logs_dir = os.path.join(os.getcwd(), log_dir)
-        os.makedirs(self.logs_dir, exist_ok=True)
+    """
+    Process-wide logging setup, configured once on first use.
+
+    Loggers only put records on an in-memory queue; a `QueueListener` thread formats them and
+    writes the rotating log file and the console, so log I/O stays off the request path. Settings
+    come from the `logging` section of config.yaml.
+    """
 
-        log_file = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-        log_file_path = os.path.join(self.logs_dir, log_file)
+    _lock = threading.Lock()
+    _listener: QueueListener | None = None
 
-        # Create a logger
+    def __init__(self, log_dir:str|None=None, settings:dict|None=None):
+        """
+        Args:
+            log_dir (str, optional): Log directory, overriding `logging.dir` of config.yaml.
+            settings (dict, optional): Logging settings, overriding config.yaml entirely.
+        """
+        if CustomLogger._listener is None:
+            with CustomLogger._lock:
+                if CustomLogger._listener is None:
+                    settings = dict(settings or load_settings())
+                    if log_dir:
+                        settings["dir"] = log_dir
+                    self._configure(settings)
         self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
 
-        # Formatter
-        formatter = logging.Formatter("[ %(asctime)s ] %(levelname)s %(name)s (line:%(lineno)d) - %(message)s")
+    @staticmethod
+    def _configure(settings:dict):
+        logs_dir = os.path.join(os.getcwd(), settings["dir"])
+        os.makedirs(logs_dir, exist_ok=True)
+        log_file_path = os.path.join(logs_dir, settings["file_name"])
+
+        if settings["json"]:
+            formatter = JsonFormatter(settings["max_message_chars"])
+        else:
+            formatter = TruncatingFormatter(TEXT_FORMAT, settings["max_message_chars"])
+
+        if settings["rotation"] == "time":
+            file_handler = TimedRotatingFileHandler(
+                log_file_path, when=settings["when"], backupCount=settings["backup_count"], encoding="utf-8", delay=True
+            )
+        else:
+            file_handler = RotatingFileHandler(
+                log_file_path, maxBytes=settings["max_bytes"], backupCount=settings["backup_count"], encoding="utf-8", delay=True
+            )
+        handlers = [file_handler]
+        if settings["console"]:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        queue_handler = DeferredQueueHandler(SimpleQueue())
+        if settings["sample_rate"] < 1:
+            queue_handler.addFilter(SamplingFilter(settings["sample_rate"]))
 
-        # File Handler
-        file_handler = logging.FileHandler(log_file_path)
-        file_handler.setFormatter(formatter)
+        root = logging.getLogger()
+        root.setLevel(settings["level"])
+        root.addHandler(queue_handler)
 
-        # Stream Handler
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
+        listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(CustomLogger.shutdown)
+        CustomLogger._listener = listener
 
-        # Add handlers if not already added
-        if not self.logger.handlers:
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(stream_handler)
+    @staticmethod
+    def shutdown():
+        """Flushes the queued records and stops the writer thread; later records are dropped."""
+        listener = CustomLogger._listener
+        if listener is not None and listener._thread is not None:
+            listener.stop()
 
     def get_logger(self, name=__file__):
         return logging.getLogger(os.path.basename(name))
@@ -36,4 +186,4 @@ class CustomLogger:
 # Usage example
 if __name__ == "__main__":
     logger = CustomLogger().get_logger(__file__)
-    logger.info("Custom logger initialized - file + console logging enabled.")
+    logger.info("Custom logger initialized - queued file + console logging enabled.")
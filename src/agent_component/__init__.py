@@ -4,4 +4,7 @@ config = load_config('config/config.yaml')
 
 # TOOL_MODELS = config['tools']
 LLM_MODELS = config['llm']
-TOP_K = config["astradb"]["top_k"]
\ No newline at end of file
+TOP_K = config["astradb"]["top_k"]
+HEDGING = config['hedging']
+CIRCUIT_BREAKER = config['circuit_breaker']
+CONTEXT_BUDGET = config['context_budget']
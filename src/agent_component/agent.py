@@ -1,32 +1,52 @@
 
-from langchain.chat_models import init_chat_model
-from langchain_core.messages import BaseMessage, AIMessage, SystemMessage
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import  RunnablePassthrough, Runnable
+from langchain_core.runnables.config import ContextThreadPoolExecutor, RunnableConfig
 
 from prompt.prompt_library import create_chat_prompt, SYS_REASONER_PROMPT, REASONER_AGENT
 
-from typing import TypedDict,Annotated
+from typing import Callable, TypedDict,Annotated
 from operator import add
 
 from src.utils import result_template
-from src.agent_component import LLM_MODELS, TOP_K #,TOOL_MODELS
+from src.agent_component import LLM_MODELS, TOP_K, HEDGING, CIRCUIT_BREAKER, CONTEXT_BUDGET #,TOOL_MODELS
+from src.agent_component.context_builder import ContextBuilder
+from src.agent_component.circuit_breaker import CircuitBreaker, Permit, build_circuit_breaker, get_circuit_breaker, circuit_breaker_states
+from src.agent_component.llm_registry import LLMRegistry, get_llm_registry
+from src.agent_component.stream_gate import StreamGate, gated_config
 from src.agent_component.tools import retriever
 from src.rag_component.astradb import AstraDB
+from src.rag_component.connection_pool import get_vector_db
+from src.rag_component.semantic_cache import SemanticCache, get_semantic_cache
+from src.rag_component.query_analyzer import get_query_analyzer
+from src.rag_component.document_catalog import DocumentCatalog, get_document_catalog
 
+from tracing.tracer import UsageCallback, get_tracer, with_callback
 from logger.custom_logger import CustomLogger
 from exception.custom_exception import CustomException
 
-import sys
+import asyncio, sys, time, queue, threading
 
 print(__file__)
 logging = CustomLogger().get_logger(__file__)
+tracer = get_tracer()
+
+FALLBACK_ANSWER = "Unable to generate response for this following query"
+
+# Defaults of `Agents(semantic_cache=..., document_catalog=...)`, so that passing None can disable them
+SHARED_SEMANTIC_CACHE = object()
+SHARED_DOCUMENT_CATALOG = object()
 
 class AgentState(TypedDict):
     query: str
     # chat_history: list[BaseMessage]
     context: str
+    context_blocks: list[str]
     answer: str
+    cached: bool
+    catalog_hit: bool
+    generation_time: float
     # messages: Annotated[list[BaseMessage], add]
     # tool_calls: dict[str,dict] = {}
 
@@ -35,7 +55,14 @@ class Agents:
     def __init__(
             self, 
             # tool_models :list[dict[str,str]] = TOOL_MODELS,
-            llm_models :list[dict[str,str]] = LLM_MODELS
+            llm_models :list[dict[str,str]] = LLM_MODELS,
+            vector_db :AstraDB|None = None,
+            semantic_cache :SemanticCache|None = SHARED_SEMANTIC_CACHE,
+            document_catalog :DocumentCatalog|None = SHARED_DOCUMENT_CATALOG,
+            hedging :dict = HEDGING,
+            circuit_breaker :dict = CIRCUIT_BREAKER,
+            llm_registry :LLMRegistry|None = None,
+            context_budget :dict = CONTEXT_BUDGET
         ):
         """
         Initializes the AI agent with a model name and a system prompt.
@@ -43,40 +70,268 @@ class Agents:
         Args:
             model_name (str): Name of the model to load (e.g., "mixtral-8x7b-32768").
             system_prompt (str): Instruction message to guide the assistant’s behavior.
+            vector_db (AstraDB, optional): Vector store client to retrieve from. Defaults to the shared pooled client.
+            semantic_cache (SemanticCache, optional): Answer cache to consult before retrieval, None to disable it. Defaults to the shared cache.
+            document_catalog (DocumentCatalog, optional): Catalog that answers document/link requests directly, None to disable it. Defaults to the shared catalog.
+            hedging (dict, optional): Hedged fallback settings (`enabled`, `first_token_deadline`, `max_parallel`). Defaults to config.yaml.
+            circuit_breaker (dict, optional): Per-model circuit breaker settings. With the config.yaml settings the breakers are shared process-wide; other settings get breakers of this agent's own. Defaults to config.yaml.
+            llm_registry (LLMRegistry, optional): Registry of initialized chat model clients and chains. Defaults to the shared registry.
+            context_budget (dict, optional): Context deduplication and per-model token budget settings. Defaults to config.yaml.
         """
         # self.tool_models = tool_models
         logging.info("Initializing Agents with LLM models: %s", llm_models)
         self.llm_models = llm_models
         self.parser = StrOutputParser()
+        self.vector_db = vector_db
+        self.semantic_cache = get_semantic_cache() if semantic_cache is SHARED_SEMANTIC_CACHE else semantic_cache
+        self.document_catalog = get_document_catalog() if document_catalog is SHARED_DOCUMENT_CATALOG else document_catalog
+        self.hedging = hedging
+        self.executor = ContextThreadPoolExecutor(max_workers=4 * hedging["max_parallel"]) if hedging["enabled"] else None
+        self.circuit_breaker = circuit_breaker
+        self._breakers: dict[str, CircuitBreaker]|None = None if circuit_breaker == CIRCUIT_BREAKER else {}
+        self._breakers_lock = threading.Lock()
+        self.llm_registry = llm_registry or get_llm_registry()
+        self.context_builder = ContextBuilder(context_budget) if context_budget["enabled"] else None
+
+    @staticmethod
+    def model_name(model:str|dict[str,str]) -> str:
+        """Returns the model name of a plain name or a `{model_name: max_tokens}` entry."""
+        return list(model.keys())[0] if isinstance(model, dict) else model
+
+    def breaker(self, model:str|dict[str,str]) -> CircuitBreaker|None:
+        """Returns the circuit breaker of a model, or None when circuit breaking is disabled."""
+        if not self.circuit_breaker["enabled"]:
+            return None
+        if self._breakers is None:
+            return get_circuit_breaker(self.model_name(model))
+        with self._breakers_lock:
+            name = self.model_name(model)
+            if name not in self._breakers:
+                self._breakers[name] = build_circuit_breaker(name, self.circuit_breaker)
+            return self._breakers[name]
+
+    def model_health(self) -> dict[str, dict]:
+        """Returns the circuit breaker state, error rate and latency of every model for monitoring."""
+        if self._breakers is None:
+            return circuit_breaker_states()
+        with self._breakers_lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
+    def warm_up(self):
+        """Initializes the chat clients `insurance_agent` uses, so the first request does not pay for it."""
+        self.llm_registry.warm_up(self.llm_models, temperature=0.1)
 
 
     def get_llm(self, model_name:str, temperature:float=0.2, max_tokens:int=-1):
 
         """
-        Returns the initialized LLM model.
+        Returns the initialized LLM model, shared across requests through the LLM registry.
 
         Args:
             model_name (str): Name of the model to load (e.g., "mixtral-8x7b-32768").
             temperature (float): The temperature to use for the model.
             max_tokens (int): Maximum number of tokens to generate. If -1, no limit is applied.
         """
-
-        if max_tokens == -1:
-            logging.info(f"Loading model: {model_name.capitalize()} with temperature: {temperature} and no max_tokens limit")
-            return init_chat_model(model=f"groq:{model_name}", temperature=temperature, max_retries=3)
-        
-        logging.info(f"Loading model: {model_name.capitalize()} with temperature: {temperature} and max_tokens: {max_tokens}")
-        return init_chat_model(model=f"groq:{model_name}", temperature=temperature, max_tokens=max_tokens, max_retries=3)
+        return self.llm_registry.get_llm(model_name, temperature=temperature, max_tokens=max_tokens)
     
 
+    def build_chain(
+            self, model:str|dict[str,str], previous_chain:Runnable|Callable[[str|dict[str,str]], Runnable], next_chain:Runnable,
+            temperature:float=0.2, max_tokens:int=-1, tools:list|None=None
+        ) -> Runnable:
+        """
+        Returns the cached `previous_chain | llm | next_chain` pipeline for one entry of the model list.
+
+        Args:
+            model (str | dict[str,str]): Model name, or a `{model_name: max_tokens}` entry from config.yaml.
+            previous_chain (Runnable | Callable): The chain to run before the model, or a function returning it for
+                the model entry (e.g. a prompt fitted to the model's context budget). The returned chain must be
+                cached by the function, since the registry keys chains by its identity.
+            next_chain (Runnable): The chain to run after the model.
+            temperature (float, optional): The temperature to use. Defaults to 0.2.
+            max_tokens (int, optional): Token limit for plain model names. Defaults to -1.
+            tools (list, optional): Tools to bind to the model. Defaults to None.
+
+        Returns:
+            Runnable: The pipeline.
+        """
+        if not isinstance(previous_chain, Runnable):
+            previous_chain = previous_chain(model)
+        model_name, max_tokens = list(model.items())[0] if isinstance(model, dict) else (model, max_tokens)
+        return self.llm_registry.get_chain(
+            model_name, previous_chain, next_chain, temperature=temperature, max_tokens=max_tokens, tools=tools
+        )
+
+    @staticmethod
+    def invoke_config(config:dict, run_config:RunnableConfig|None=None) -> RunnableConfig:
+        """
+        Builds the config a model chain is invoked with.
+
+        The calling node's config is passed on explicitly: on Python < 3.11 it does not reach
+        chains invoked from a node through context variables when the graph runs with
+        `ainvoke`/`astream`, and without its callbacks no tokens reach `stream_mode="messages"`.
+        """
+        run_config = run_config or {}
+        return {**run_config, "configurable": {**run_config.get("configurable", {}), **config, "max_retries": 3}}
+
+    def _stream_attempt(
+            self, index:int, chain:Runnable, query, run_config:dict, cancel:threading.Event, events:queue.Queue,
+            breaker:CircuitBreaker|None=None, model:str="unknown", permit:Permit|None=None
+        ):
+        """
+        Streams one hedged attempt, reporting its first token, result or error on `events`.
+
+        A cancelled attempt stops at its next chunk and closes its stream, which closes the
+        model's connection; its breaker call is released rather than counted.
+        """
+        start = time.perf_counter()
+        with tracer.span("llm.attempt", **{"llm.model": model}) as span:
+            stream = chain.stream(query, config=with_callback(run_config, UsageCallback(span)))
+            try:
+                response = None
+                for chunk in stream:
+                    if cancel.is_set():
+                        break
+                    if response is None:
+                        span.set_attribute("llm.time_to_first_token", span.elapsed())
+                        events.put(("first_token", index, None))
+                        response = chunk
+                    else:
+                        response = response + chunk
+                if cancel.is_set():
+                    if breaker: breaker.release(permit)
+                    span.set_attribute("llm.outcome", "cancelled")
+                    events.put(("cancelled", index, None))
+                    return
+                if response is None:
+                    raise ValueError("Model returned an empty response")
+                if breaker: breaker.record_success(time.perf_counter() - start)
+                span.set_attribute("llm.outcome", "success")
+                events.put(("done", index, response))
+            except Exception as e:
+                if cancel.is_set():
+                    if breaker: breaker.release(permit)
+                    span.set_attribute("llm.outcome", "cancelled")
+                    events.put(("cancelled", index, None))
+                    return
+                if breaker: breaker.record_failure(time.perf_counter() - start, e)
+                span.set_attribute("llm.outcome", "error")
+                span.record_error(e)
+                events.put(("error", index, e))
+            finally:
+                stream.close()
+
+    def hedged_response(
+            self,query:dict,models:list[str] | list[dict[str,str]],
+            previous_chain:Runnable = RunnablePassthrough(), next_chain:Runnable  = RunnablePassthrough(), 
+            temperature:float=0.2, max_tokens:int=-1, config:dict={}, run_config:RunnableConfig|None=None, **kwargs
+        )->BaseMessage|str|None:
+        """
+        Runs a query against a list of models with hedging.
+
+        The first model is started right away. If no model has produced a first token within
+        `first_token_deadline` seconds, the next model is started alongside it (up to
+        `max_parallel` at once); a failed attempt starts the next model immediately. The first
+        model to stream a token wins and the others are cancelled. Every attempt streams behind
+        a `StreamGate`, so only the winner's tokens reach the graph's message stream. If the
+        winner fails mid-answer, the next model's answer streams as a new message. Models whose
+        circuit breaker is open are skipped without being started.
+
+        Args:
+            Same as `response_llm_manager`.
+
+        Returns:
+            BaseMessage | str | None: The winning response, or None if every model failed.
+        """
+        events = queue.Queue()
+        pending = list(enumerate(models))
+        active: dict[int, threading.Event] = {}
+        gates: dict[int, StreamGate|None] = {}
+        winner = None
+        run_config = self.invoke_config(config, run_config)
+
+        def launch():
+            """Starts the next model that can be started, skipping open breakers and chains that fail to build."""
+            while pending:
+                index, model = pending.pop(0)
+                breaker = self.breaker(model)
+                permit = breaker.allow() if breaker else None
+                if breaker and not permit:
+                    logging.info(f"Skipping model {model}, circuit breaker is {breaker.state}")
+                    continue
+                logging.info(f"Invoking LLM with model: {model}, temperature: {temperature}, max_tokens: {max_tokens}")
+                try:
+                    chain = self.build_chain(model, previous_chain, next_chain, temperature, max_tokens, kwargs.get('tools', None))
+                except Exception as e:
+                    if breaker: breaker.record_failure(0.0, e)
+                    app_exc = CustomException(e, sys, stage="model")
+                    logging.error(f"Failed to invoke LLM with model {model}")
+                    logging.error(app_exc)
+                    continue
+                tracer.current_span().increment("llm.attempts")
+                attempt_config, gates[index] = gated_config(run_config)
+                active[index] = threading.Event()
+                self.executor.submit(
+                    self._stream_attempt, index, chain, query, attempt_config, active[index], events, breaker, self.model_name(model), permit
+                )
+                return
+
+        def settle(index:int):
+            """Lets the winner's tokens through and cancels every other attempt."""
+            if gates.get(index): gates[index].open()
+            for other, cancel in active.items():
+                if other != index:
+                    cancel.set()
+                    if gates.get(other): gates[other].discard()
+
+        while active or pending:
+            if not active:
+                launch()
+                continue
+
+            can_hedge = winner is None and pending and len(active) < self.hedging["max_parallel"]
+            try:
+                kind, index, payload = events.get(timeout=self.hedging["first_token_deadline"] if can_hedge else None)
+            except queue.Empty:
+                logging.info(f"No first token after {self.hedging['first_token_deadline']}s, hedging with model: {pending[0][1]}")
+                tracer.set_attribute("llm.hedged", True)
+                launch()
+                continue
+
+            if kind == "first_token" and winner is None:
+                winner = index
+                settle(index)
+
+            elif kind == "done" and winner in (None, index):
+                settle(index)
+                logging.info(f"LLM invocation successful with model: {models[index]} with response length: {len(payload.content) if isinstance(payload, BaseMessage) else len(payload)}")
+                tracer.set_attribute("llm.model", self.model_name(models[index]))
+                return payload
+
+            elif kind == "error":
+                app_exc = CustomException(payload, payload, stage="model")
+                logging.error(f"Failed to invoke LLM with model {models[index]}")
+                logging.error(app_exc)
+                active.pop(index, None)
+                if gates.get(index): gates[index].discard()
+                if winner == index:
+                    winner = None
+
+            elif kind in ("cancelled", "done"):
+                active.pop(index, None)
+
+        return None
+
+    @tracer.traced("llm.generate")
     def response_llm_manager(
             self,query:dict,models:list[str] | list[dict[str,str]],
             previous_chain:Runnable = RunnablePassthrough(), next_chain:Runnable  = RunnablePassthrough(), 
-            temperature:float=0.2, max_tokens:int=-1, config:dict={}, **kwargs
+            temperature:float=0.2, max_tokens:int=-1, config:dict={}, run_config:RunnableConfig|None=None, **kwargs
         )->BaseMessage|str: 
 
         """
-        Runs a query against a list of models.
+        Runs a query against a list of models, skipping models whose circuit breaker is open.
 
         Args:
             query (dict): The query to run.
@@ -86,62 +341,451 @@ class Agents:
             temperature (float, optional): The temperature to use. Defaults to 0.2.
             max_tokens (int, optional): The maximum number of tokens to generate. Defaults to -1.
             config (dict, optional): Additional configuration. Defaults to {}.
+            run_config (RunnableConfig, optional): The calling node's config, so callbacks such as the graph's message stream reach the model. Defaults to None.
             **kwargs: Additional keyword arguments.
 
         Returns:
             BaseMessage: The response from the model.
         """
-        for model in models:
-            logging.info(f"Invoking LLM with model: {model}, temperature: {temperature}, max_tokens: {max_tokens}")
-            # print(f"Invoking LLM with model: {model}, temperature: {temperature}, max_tokens: {max_tokens}")
+        if self.executor is not None and len(models) > 1:
+            response = self.hedged_response(
+                query, models, previous_chain=previous_chain, next_chain=next_chain,
+                temperature=temperature, max_tokens=max_tokens, config=config, run_config=run_config, **kwargs
+            )
+            if response is not None:
+                return response
+
+        else:
+            generation = tracer.current_span()
+            for model in models:
+                breaker = self.breaker(model)
+                permit = breaker.allow() if breaker else None
+                if breaker and not permit:
+                    logging.info(f"Skipping model {model}, circuit breaker is {breaker.state}")
+                    continue
+                logging.info(f"Invoking LLM with model: {model}, temperature: {temperature}, max_tokens: {max_tokens}")
+                # print(f"Invoking LLM with model: {model}, temperature: {temperature}, max_tokens: {max_tokens}")
+                start = time.perf_counter()
+                generation.increment("llm.attempts")
+                with tracer.span("llm.attempt", **{"llm.model": self.model_name(model)}) as span:
+                    try:
+                        chain = self.build_chain(model, previous_chain, next_chain, temperature, max_tokens, kwargs.get('tools', None))
+
+                        response = chain.invoke(query, config=with_callback(self.invoke_config(config, run_config), UsageCallback(span)))
+                        if breaker: breaker.record_success(time.perf_counter() - start)
+                        span.set_attribute("llm.outcome", "success")
+                        generation.set_attribute("llm.model", self.model_name(model))
+                        logging.info(f"LLM invocation successful with model: {model} with response length: {len(response.content) if isinstance(response, BaseMessage) else len(response)}")
+                        return response
+                
+                    except Exception as e:
+                        if breaker: breaker.record_failure(time.perf_counter() - start, e)
+                        span.set_attribute("llm.outcome", "error")
+                        span.record_error(e)
+                        app_exc = CustomException(e, sys, stage="model")
+                        logging.error(f"Failed to invoke LLM with model {model}")
+                        logging.error(app_exc)
+
+        logging.error("All models failed, returning None.")
+        tracer.set_attribute("llm.fallback", True)
+        return AIMessage(content=FALLBACK_ANSWER)
+    
+    async def _astream_attempt(
+            self, index:int, chain:Runnable, query, run_config:dict, events:asyncio.Queue,
+            breaker:CircuitBreaker|None=None, model:str="unknown", permit:Permit|None=None
+        ):
+        """Async version of `_stream_attempt`; losing attempts are cancelled as tasks, which closes their stream."""
+        start = time.perf_counter()
+        with tracer.span("llm.attempt", **{"llm.model": model}) as span:
             try:
-                llm = (
-                    self.get_llm(list(model.keys())[0], temperature=temperature, max_tokens=list(model.values())[0])
-                    if isinstance(model, dict) else
-                    self.get_llm(model, temperature=temperature, max_tokens=max_tokens)
-                )
+                response = None
+                async for chunk in chain.astream(query, config=with_callback(run_config, UsageCallback(span))):
+                    if response is None:
+                        span.set_attribute("llm.time_to_first_token", span.elapsed())
+                        events.put_nowait(("first_token", index, None))
+                        response = chunk
+                    else:
+                        response = response + chunk
+                if response is None:
+                    raise ValueError("Model returned an empty response")
+                if breaker: breaker.record_success(time.perf_counter() - start)
+                span.set_attribute("llm.outcome", "success")
+                events.put_nowait(("done", index, response))
+            except asyncio.CancelledError:
+                if breaker: breaker.release(permit)
+                span.set_attribute("llm.outcome", "cancelled")
+                raise
+            except Exception as e:
+                if breaker: breaker.record_failure(time.perf_counter() - start, e)
+                span.set_attribute("llm.outcome", "error")
+                span.record_error(e)
+                events.put_nowait(("error", index, e))
 
-                if kwargs.get('tools', None):llm = llm.bind_tools(kwargs['tools'])
+    async def ahedged_response(
+            self,query:dict,models:list[str] | list[dict[str,str]],
+            previous_chain:Runnable = RunnablePassthrough(), next_chain:Runnable  = RunnablePassthrough(), 
+            temperature:float=0.2, max_tokens:int=-1, config:dict={}, run_config:RunnableConfig|None=None, **kwargs
+        )->BaseMessage|str|None:
+        """
+        Async version of `hedged_response`, racing the attempts as tasks on the running event loop.
 
-                chain = previous_chain | llm | next_chain
+        Args:
+            Same as `response_llm_manager`.
 
-                response = chain.invoke(
-                    query,
-                    config={
-                        "configurable": { **config ,"max_retries": 3 }        
-                    }
+        Returns:
+            BaseMessage | str | None: The winning response, or None if every model failed.
+        """
+        events = asyncio.Queue()
+        pending = list(enumerate(models))
+        active: dict[int, asyncio.Task] = {}
+        gates: dict[int, StreamGate|None] = {}
+        winner = None
+        getter = None
+        run_config = self.invoke_config(config, run_config)
+
+        def launch():
+            """Starts the next model that can be started, skipping open breakers and chains that fail to build."""
+            while pending:
+                index, model = pending.pop(0)
+                breaker = self.breaker(model)
+                permit = breaker.allow() if breaker else None
+                if breaker and not permit:
+                    logging.info(f"Skipping model {model}, circuit breaker is {breaker.state}")
+                    continue
+                logging.info(f"Invoking LLM with model: {model}, temperature: {temperature}, max_tokens: {max_tokens}")
+                try:
+                    chain = self.build_chain(model, previous_chain, next_chain, temperature, max_tokens, kwargs.get('tools', None))
+                except Exception as e:
+                    if breaker: breaker.record_failure(0.0, e)
+                    app_exc = CustomException(e, sys, stage="model")
+                    logging.error(f"Failed to invoke LLM with model {model}")
+                    logging.error(app_exc)
+                    continue
+                tracer.current_span().increment("llm.attempts")
+                attempt_config, gates[index] = gated_config(run_config)
+                active[index] = asyncio.create_task(
+                    self._astream_attempt(index, chain, query, attempt_config, events, breaker, self.model_name(model), permit)
                 )
-                logging.info(f"LLM invocation successful with model: {model} with response length: {len(response.content) if isinstance(response, BaseMessage) else len(response)}")
+                return
+
+        try:
+            while active or pending:
+                if not active:
+                    launch()
+                    continue
+
+                can_hedge = winner is None and pending and len(active) < self.hedging["max_parallel"]
+                # A long-lived getter, so a timeout never drops an event that arrives at the same moment
+                getter = getter or asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({getter}, timeout=self.hedging["first_token_deadline"] if can_hedge else None)
+                if not done:
+                    logging.info(f"No first token after {self.hedging['first_token_deadline']}s, hedging with model: {pending[0][1]}")
+                    tracer.set_attribute("llm.hedged", True)
+                    launch()
+                    continue
+                kind, index, payload = getter.result()
+                getter = None
+
+                if index not in active:
+                    continue
+
+                if kind == "first_token" and winner is None:
+                    winner = index
+                    if gates[index]: gates[index].open()
+                    for other in [other for other in active if other != index]:
+                        active.pop(other).cancel()
+                        if gates[other]: gates[other].discard()
+
+                elif kind == "done":
+                    active.pop(index)
+                    if gates[index]: gates[index].open()
+                    logging.info(f"LLM invocation successful with model: {models[index]} with response length: {len(payload.content) if isinstance(payload, BaseMessage) else len(payload)}")
+                    tracer.set_attribute("llm.model", self.model_name(models[index]))
+                    return payload
+
+                elif kind == "error":
+                    app_exc = CustomException(payload, payload, stage="model")
+                    logging.error(f"Failed to invoke LLM with model {models[index]}")
+                    logging.error(app_exc)
+                    active.pop(index)
+                    if gates[index]: gates[index].discard()
+                    if winner == index:
+                        winner = None
+
+            return None
+        finally:
+            if getter is not None:
+                getter.cancel()
+            for index, task in active.items():
+                task.cancel()
+                if gates[index]: gates[index].discard()
+
+    @tracer.traced("llm.generate")
+    async def aresponse_llm_manager(
+            self,query:dict,models:list[str] | list[dict[str,str]],
+            previous_chain:Runnable = RunnablePassthrough(), next_chain:Runnable  = RunnablePassthrough(), 
+            temperature:float=0.2, max_tokens:int=-1, config:dict={}, run_config:RunnableConfig|None=None, **kwargs
+        )->BaseMessage|str: 
+        """
+        Async version of `response_llm_manager`, for driving the graph with `ainvoke`/`astream`.
+
+        Args:
+            Same as `response_llm_manager`.
+
+        Returns:
+            BaseMessage: The response from the model.
+        """
+        if self.hedging["enabled"] and len(models) > 1:
+            response = await self.ahedged_response(
+                query, models, previous_chain=previous_chain, next_chain=next_chain,
+                temperature=temperature, max_tokens=max_tokens, config=config, run_config=run_config, **kwargs
+            )
+            if response is not None:
                 return response
-            
-            except Exception as e:
-                app_exc = CustomException(e, sys)
-                logging.error(f"Failed to invoke LLM with model {model}")
-                logging.error(app_exc)
+
+        else:
+            generation = tracer.current_span()
+            for model in models:
+                breaker = self.breaker(model)
+                permit = breaker.allow() if breaker else None
+                if breaker and not permit:
+                    logging.info(f"Skipping model {model}, circuit breaker is {breaker.state}")
+                    continue
+                logging.info(f"Invoking LLM with model: {model}, temperature: {temperature}, max_tokens: {max_tokens}")
+                start = time.perf_counter()
+                generation.increment("llm.attempts")
+                with tracer.span("llm.attempt", **{"llm.model": self.model_name(model)}) as span:
+                    try:
+                        chain = self.build_chain(model, previous_chain, next_chain, temperature, max_tokens, kwargs.get('tools', None))
+
+                        response = await chain.ainvoke(query, config=with_callback(self.invoke_config(config, run_config), UsageCallback(span)))
+                        if breaker: breaker.record_success(time.perf_counter() - start)
+                        span.set_attribute("llm.outcome", "success")
+                        generation.set_attribute("llm.model", self.model_name(model))
+                        logging.info(f"LLM invocation successful with model: {model} with response length: {len(response.content) if isinstance(response, BaseMessage) else len(response)}")
+                        return response
+
+                    except asyncio.CancelledError:
+                        if breaker: breaker.release(permit)
+                        span.set_attribute("llm.outcome", "cancelled")
+                        raise
+                    except Exception as e:
+                        if breaker: breaker.record_failure(time.perf_counter() - start, e)
+                        span.set_attribute("llm.outcome", "error")
+                        span.record_error(e)
+                        app_exc = CustomException(e, sys, stage="model")
+                        logging.error(f"Failed to invoke LLM with model {model}")
+                        logging.error(app_exc)
 
         logging.error("All models failed, returning None.")
-        return AIMessage(content="Unable to generate response for this following query")
+        tracer.set_attribute("llm.fallback", True)
+        return AIMessage(content=FALLBACK_ANSWER)
     
-    def rag_retriever(self,state: AgentState) -> AgentState:
+    def catalog_lookup(self, state: AgentState) -> AgentState:
+        """
+        Answers "where do I download X" requests straight from the statewise document catalog.
+
+        Args:
+            state (AgentState): The state of the conversation.
+
+        Returns:
+            AgentState: The catalog answer with `catalog_hit=True`, or `catalog_hit=False` when RAG is needed.
+        """
+        if self.document_catalog is None:
+            return AgentState(query=state["query"], catalog_hit=False)
 
         try:
-            logging.info("Invoking RAG Retriever for query: %s", state["query"])
-            vector_db = AstraDB()
-            docs = vector_db.rag_retrieve(state["query"], k=TOP_K)
+            answer = self.document_catalog.resolve(state["query"])
+            if answer is None:
+                return AgentState(query=state["query"], catalog_hit=False)
+
+            logging.info("Document catalog answered query: %s", state["query"])
+            return AgentState(query=state["query"], context=answer, answer=answer, catalog_hit=True)
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Error in Document Catalog lookup")
+            logging.error(app_exc)
+            return AgentState(query=state["query"], catalog_hit=False)
+
+    async def acatalog_lookup(self, state: AgentState) -> AgentState:
+        """Async version of `catalog_lookup`; the lookup is in-memory, so it runs inline on the event loop."""
+        return self.catalog_lookup(state)
+
+    def _cache_hit(self, state: AgentState, entry: dict|None) -> AgentState:
+        if entry is None:
+            return AgentState(query=state["query"], cached=False)
+
+        logging.info("Semantic cache hit with similarity %.3f for query: %s", entry["similarity"], state["query"])
+        return AgentState(
+            query=state["query"],
+            context=entry["context"],
+            answer=entry["answer"],
+            cached=True,
+        )
+
+    @staticmethod
+    def cache_entities(query:str) -> dict[str, list[str]]:
+        """Returns the plans, states and document categories of a query, which a cached answer must share to be reused."""
+        analysis = get_query_analyzer().analyze(query)
+        return {key: analysis[key] for key in ("plans", "states", "categories")}
+
+    def semantic_cache_lookup(self, state: AgentState) -> AgentState:
+        """
+        Looks up a previously answered query that is semantically close to the current one.
 
-            formatted_docs = "/n/n".join(
-                f"**Metadata**: {doc.metadata}\n**Content**: {doc.page_content}"
-                for doc in docs
+        Args:
+            state (AgentState): The state of the conversation.
+
+        Returns:
+            AgentState: The cached answer and context with `cached=True`, or `cached=False` on a miss.
+        """
+        if self.semantic_cache is None:
+            return AgentState(query=state["query"], cached=False)
+
+        try:
+            vector_db = self.vector_db or get_vector_db()
+            embedding = vector_db.embeddings.embed_query(state["query"])
+            return self._cache_hit(state, self.semantic_cache.lookup(embedding, self.cache_entities(state["query"])))
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Error in Semantic Cache lookup")
+            logging.error(app_exc)
+            return AgentState(query=state["query"], cached=False)
+
+    async def asemantic_cache_lookup(self, state: AgentState) -> AgentState:
+        """Async version of `semantic_cache_lookup`."""
+        if self.semantic_cache is None:
+            return AgentState(query=state["query"], cached=False)
+
+        try:
+            vector_db = self.vector_db or get_vector_db()
+            embedding = await vector_db.embeddings.aembed_query(state["query"])
+            return self._cache_hit(state, self.semantic_cache.lookup(embedding, self.cache_entities(state["query"])))
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Error in Semantic Cache lookup")
+            logging.error(app_exc)
+            return AgentState(query=state["query"], cached=False)
+
+    def _cacheable_answer(self, state: AgentState) -> str|None:
+        answer = state.get("answer")
+        answer = answer.content if isinstance(answer, BaseMessage) else answer
+        if self.semantic_cache is None or state.get("cached") or not answer or answer == FALLBACK_ANSWER or not state.get("context"):
+            return None
+        return answer
+
+    def semantic_cache_store(self, state: AgentState) -> AgentState:
+        """
+        Caches a freshly generated answer together with the context it was grounded on.
+
+        Args:
+            state (AgentState): The state of the conversation.
+
+        Returns:
+            AgentState: The unchanged query.
+        """
+        answer = self._cacheable_answer(state)
+        if answer is None:
+            return AgentState(query=state["query"])
+
+        try:
+            vector_db = self.vector_db or get_vector_db()
+            self.semantic_cache.store(
+                vector_db.embeddings.embed_query(state["query"]),
+                query=state["query"],
+                answer=answer,
+                context=state["context"],
+                latency=state.get("generation_time", 0.0),
+                entities=self.cache_entities(state["query"]),
+            )
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Error in Semantic Cache store")
+            logging.error(app_exc)
+        return AgentState(query=state["query"])
+
+    async def asemantic_cache_store(self, state: AgentState) -> AgentState:
+        """Async version of `semantic_cache_store`."""
+        answer = self._cacheable_answer(state)
+        if answer is None:
+            return AgentState(query=state["query"])
+
+        try:
+            vector_db = self.vector_db or get_vector_db()
+            self.semantic_cache.store(
+                await vector_db.embeddings.aembed_query(state["query"]),
+                query=state["query"],
+                answer=answer,
+                context=state["context"],
+                latency=state.get("generation_time", 0.0),
+                entities=self.cache_entities(state["query"]),
             )
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Error in Semantic Cache store")
+            logging.error(app_exc)
+        return AgentState(query=state["query"])
+
+    @staticmethod
+    def format_docs(docs:list) -> str:
+        """Formats retrieved documents into the context passed to the insurance agent."""
+        return "\n\n".join(
+            f"**Metadata**: {doc.metadata}\n**Content**: {doc.page_content}"
+            for doc in docs
+        )
+
+    def build_context(self, query:str, docs:list) -> AgentState:
+        """
+        Assembles retrieved documents into the retriever's state update.
+
+        With the context builder enabled, near-duplicate chunks are dropped and the remaining
+        blocks are kept in `context_blocks`, so `insurance_agent` can pack them into each model's
+        budget; `context` holds them packed into the largest budget.
+        """
+        if self.context_builder is None:
+            return AgentState(context=self.format_docs(docs), query=query)
+
+        budget = max(self.context_builder.budget(model) for model in self.llm_models)
+        blocks, context = self.context_builder.build(docs, budget)
+        return AgentState(context=context, context_blocks=blocks, query=query)
+
+    def rag_retriever(self,state: AgentState) -> AgentState:
+
+        try:
+            logging.info("Invoking RAG Retriever for query: %s", state["query"])
+            vector_db = self.vector_db or get_vector_db()
+            with tracer.span("retrieval.search", **{"retrieval.k": TOP_K}) as span:
+                docs = vector_db.rag_retrieve(state["query"], k=TOP_K, filter=get_query_analyzer().to_filter(state["query"]))
+                span.set_attribute("retrieval.documents", len(docs))
 
             logging.info("RAG Retriever found %d documents for query: %s", len(docs), state["query"])
 
+            with tracer.span("context.assemble"):
+                return self.build_context(state["query"], docs)
+        except Exception as e:
+            app_exc = CustomException(e, sys, stage="retrieval")
+            logging.error("Error in RAG Retriever")
+            logging.error(app_exc)
             return AgentState(
-                context=formatted_docs,
+                context="",
                 query=state["query"],
             )
+
+    async def arag_retriever(self, state: AgentState) -> AgentState:
+        """Async version of `rag_retriever`, using `arag_retrieve` of the vector store client."""
+        try:
+            logging.info("Invoking RAG Retriever for query: %s", state["query"])
+            vector_db = self.vector_db or get_vector_db()
+            with tracer.span("retrieval.search", **{"retrieval.k": TOP_K}) as span:
+                docs = await vector_db.arag_retrieve(state["query"], k=TOP_K, filter=get_query_analyzer().to_filter(state["query"]))
+                span.set_attribute("retrieval.documents", len(docs))
+
+            logging.info("RAG Retriever found %d documents for query: %s", len(docs), state["query"])
+
+            with tracer.span("context.assemble"):
+                return self.build_context(state["query"], docs)
         except Exception as e:
-            app_exc = CustomException(e, sys)
+            app_exc = CustomException(e, sys, stage="retrieval")
             logging.error("Error in RAG Retriever")
             logging.error(app_exc)
             return AgentState(
@@ -149,49 +793,77 @@ class Agents:
                 query=state["query"],
             )
 
-    def insurance_agent(self, state: AgentState)-> AgentState:
+    def _agent_request(self, state: AgentState, config: RunnableConfig = None) -> dict:
+        """Returns the `response_llm_manager` arguments for the insurance agent."""
+        if state['context']:
+            logging.info("Insurance agent got context with length %d for query: %s", len(state['context']), state["query"])
+            return dict(
+                query={"query": state["query"], "context": state["context"], "context_blocks": state.get("context_blocks")},
+                models=self.llm_models,
+                previous_chain=(
+                    (lambda model: self.context_builder.prompt_for(model, REASONER_AGENT))
+                    if self.context_builder is not None else REASONER_AGENT
+                ),
+                next_chain=self.parser,
+                temperature=0.1,
+                run_config=config,
+            )
+
+        logging.info("Insurance agent got no context for query: %s", state["query"])
+        return dict(
+            query=[SystemMessage(content=f"Close the final answer for query: {state['query']} "), HumanMessage(content=state["query"])],
+            models=self.llm_models,
+            temperature=0, 
+            max_tokens=500,
+            run_config=config,
+        )
+
+    def _agent_answer(self, state: AgentState, answer, start:float) -> AgentState:
+        logging.info("Insurance agent generated answer with length %d for query: %s", len(answer.content) if isinstance(answer, BaseMessage) else len(answer), state["query"])
+        return AgentState(
+            query=state["query"],
+            context=state["context"],
+            answer=answer,
+            generation_time=time.perf_counter() - start,
+            # messages=state["messages"] + [response],
+            # tool_calls=state["tool_calls"]
+        )
+
+    def insurance_agent(self, state: AgentState, config: RunnableConfig = None)-> AgentState:
         """
         Reasoner agent that takes the messages from the other agents and 
         generate a final answer based on the tool calls from the other agents.
         
         Args:
             state (AgentState): The state of the conversation.
+            config (RunnableConfig, optional): The node config injected by LangGraph.
             
         Returns:
             dict: A dictionary containing the messages, tool calls and agent message.
         """
 
         try:
-
-            if state['context']:
-                logging.info("Insurance agent got context with length %d for query: %s", len(state['context']), state["query"])
-                answer = self.response_llm_manager(
-                    query={"query": state["query"], "context": state["context"]},
-                    models=self.llm_models,
-                    previous_chain=REASONER_AGENT,
-                    next_chain=self.parser,
-                    temperature=0.1,
-                )
-
-
-            else:
-                print("issues")
-                logging.info("Insurance agent got no context for query: %s", state["query"])
-                answer = self.response_llm_manager(
-                    query=[SystemMessage(content=f"Close the final answer for query: {state['query']} ")] + state["messages"],
-                    models=self.llm_models,
-                    temperature=0, 
-                    max_tokens=500,
-                )
-
-            logging.info("Insurance agent generated answer with length %d for query: %s", len(answer.content) if isinstance(answer, BaseMessage) else len(answer), state["query"])
+            start = time.perf_counter()
+            answer = self.response_llm_manager(**self._agent_request(state, config))
+            return self._agent_answer(state, answer, start)
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Error in Insurance Agent")
+            logging.error(app_exc)
             return AgentState(
                 query=state["query"],
                 context=state["context"],
-                answer=answer
-                # messages=state["messages"] + [response],
+                answer="",
+                # messages=state["messages"] + [AIMessage(content="Unable to generate response for this following query")],
                 # tool_calls=state["tool_calls"]
             )
+
+    async def ainsurance_agent(self, state: AgentState, config: RunnableConfig = None)-> AgentState:
+        """Async version of `insurance_agent`, generating through `aresponse_llm_manager`."""
+        try:
+            start = time.perf_counter()
+            answer = await self.aresponse_llm_manager(**self._agent_request(state, config))
+            return self._agent_answer(state, answer, start)
         except Exception as e:
             app_exc = CustomException(e, sys)
             logging.error("Error in Insurance Agent")
@@ -200,6 +872,4 @@ class Agents:
                 query=state["query"],
                 context=state["context"],
                 answer="",
-                # messages=state["messages"] + [AIMessage(content="Unable to generate response for this following query")],
-                # tool_calls=state["tool_calls"]
-            )
\ No newline at end of file
+            )
@@ -0,0 +1,189 @@
+from src.agent_component import CIRCUIT_BREAKER
+
+from logger.custom_logger import CustomLogger
+
+from collections import deque
+import threading, time
+
+logging = CustomLogger().get_logger(__file__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class Permit:
+    """A call allowed by `CircuitBreaker.allow`; `probe` is the half-open period it was admitted as a probe in."""
+    __slots__ = ("probe",)
+
+    def __init__(self, probe:int|None=None):
+        self.probe = probe
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker for one model of the fallback list.
+
+    The breaker is closed while the model behaves. It opens after `consecutive_failures`
+    failures in a row, or once the error rate over the last `window` calls reaches
+    `error_rate_threshold` (calls slower than `slow_call_seconds` count as failures). An open
+    breaker rejects calls for `open_seconds`, then half-opens and lets `half_open_max_calls`
+    probes through: a successful probe closes it again, a failed one re-opens it.
+    """
+
+    def __init__(
+            self, name:str, window:int=20, min_calls:int=5, error_rate_threshold:float=0.5,
+            consecutive_failures:int=3, open_seconds:float=30, half_open_max_calls:int=1,
+            slow_call_seconds:float|None=None
+        ):
+        """
+        Args:
+            name (str): Model name, used in logs and monitoring.
+            window (int): Number of recent calls the error rate and latency are computed over. Defaults to 20.
+            min_calls (int): Calls needed in the window before the error rate can open the breaker. Defaults to 5.
+            error_rate_threshold (float): Error rate that opens the breaker. Defaults to 0.5.
+            consecutive_failures (int): Failures in a row that open the breaker. Defaults to 3.
+            open_seconds (float): How long an open breaker rejects calls before probing. Defaults to 30.
+            half_open_max_calls (int): Concurrent probes allowed while half-open. Defaults to 1.
+            slow_call_seconds (float, optional): Latency above which a successful call counts as a failure. Defaults to None.
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.consecutive_failures = consecutive_failures
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.slow_call_seconds = slow_call_seconds
+
+        self._lock = threading.Lock()
+        self._calls: deque[tuple[bool, float]] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._failure_streak = 0
+        self._probes = 0
+        self._half_open_period = 0
+        self.rejected = 0
+        self.last_error = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def _advance(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            logging.info(f"Circuit breaker for {self.name} half-open, probing recovery")
+            self._state = HALF_OPEN
+            self._probes = 0
+            self._half_open_period += 1
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
+        logging.warning(f"Circuit breaker for {self.name} opened for {self.open_seconds}s: {self.last_error}")
+
+    def allow(self) -> Permit|None:
+        """
+        Returns a permit if a call to the model may go ahead, reserving a probe slot when half-open,
+        or None if the breaker rejects it.
+
+        Every allowed call must be followed by `record_success`, `record_failure` or `release`.
+        """
+        with self._lock:
+            self._advance()
+            if self._state == CLOSED:
+                return Permit()
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return Permit(probe=self._half_open_period)
+            self.rejected += 1
+            return None
+
+    def release(self, permit:Permit|None):
+        """
+        Frees the probe slot of an allowed call that was abandoned without an outcome.
+
+        Only a probe of the current half-open period holds a slot; calls admitted while the breaker
+        was closed, or probes of an earlier period, release nothing.
+        """
+        if permit is None or permit.probe is None:
+            return
+        with self._lock:
+            if self._state == HALF_OPEN and permit.probe == self._half_open_period and self._probes:
+                self._probes -= 1
+            permit.probe = None
+
+    def record_success(self, latency:float):
+        """Records a completed call; slow calls are counted as failures."""
+        if self.slow_call_seconds and latency > self.slow_call_seconds:
+            self.record_failure(latency, f"slow call ({latency:.2f}s > {self.slow_call_seconds}s)")
+            return
+
+        with self._lock:
+            self._calls.append((True, latency))
+            self._failure_streak = 0
+            if self._state == HALF_OPEN:
+                logging.info(f"Circuit breaker for {self.name} closed after successful probe")
+                self._state = CLOSED
+                self._calls.clear()
+                self._calls.append((True, latency))
+
+    def record_failure(self, latency:float, error:BaseException|str|None=None):
+        """Records a failed call and opens the breaker when a threshold is crossed."""
+        with self._lock:
+            self._calls.append((False, latency))
+            self._failure_streak += 1
+            self.last_error = str(error) if error is not None else None
+
+            if self._state == HALF_OPEN:
+                self._open()
+            elif self._state == CLOSED and (
+                self._failure_streak >= self.consecutive_failures
+                or (len(self._calls) >= self.min_calls and self._error_rate() >= self.error_rate_threshold)
+            ):
+                self._open()
+
+    def _error_rate(self) -> float:
+        return sum(1 for ok, _ in self._calls if not ok) / len(self._calls) if self._calls else 0.0
+
+    def snapshot(self) -> dict:
+        """Returns the breaker state, rolling error rate and latency for monitoring."""
+        with self._lock:
+            self._advance()
+            latencies = sorted(latency for _, latency in self._calls)
+            return {
+                "state": self._state,
+                "calls": len(self._calls),
+                "error_rate": self._error_rate(),
+                "failure_streak": self._failure_streak,
+                "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+                "latency_p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0,
+                "rejected": self.rejected,
+                "retry_in": max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)) if self._state == OPEN else 0.0,
+                "last_error": self.last_error,
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def build_circuit_breaker(model_name:str, settings:dict=CIRCUIT_BREAKER) -> CircuitBreaker:
+    """Creates a circuit breaker from a `circuit_breaker` config section; `enabled` is not a breaker setting."""
+    return CircuitBreaker(model_name, **{key: value for key, value in settings.items() if key != "enabled"})
+
+
+def get_circuit_breaker(model_name:str) -> CircuitBreaker:
+    """Returns the process-wide circuit breaker of a model, creating it from config.yaml on first use."""
+    breaker = _breakers.get(model_name)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.get(model_name)
+            if breaker is None:
+                breaker = _breakers[model_name] = build_circuit_breaker(model_name)
+    return breaker
+
+
+def circuit_breaker_states() -> dict[str, dict]:
+    """Returns a snapshot of every model's circuit breaker, keyed by model name."""
+    return {name: breaker.snapshot() for name, breaker in list(_breakers.items())}
@@ -0,0 +1,151 @@
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from src.agent_component import CONTEXT_BUDGET
+
+from logger.custom_logger import CustomLogger
+
+import os, re, threading
+
+logging = CustomLogger().get_logger(__file__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class ContextBuilder:
+    """
+    Assembles retrieved chunks into the context of the reasoner prompt.
+
+    Chunks are kept in retrieval (relevance) order, near-duplicates are dropped (the regional
+    brochure and prospectus often repeat the same text), and each chunk is rendered with a
+    one-line header instead of its full metadata dict. The rendered blocks are packed into a
+    token budget per model, so smaller models get a shorter prompt rather than a rate-limit error.
+    """
+
+    def __init__(self, settings:dict=CONTEXT_BUDGET):
+        """
+        Args:
+            settings (dict): `context_budget` section of config.yaml (`enabled`, `context_fraction`,
+                `default_tokens`, `chars_per_token`, `dedup_threshold`, `shingle_size`).
+        """
+        self.settings = settings
+        self._prompts: dict[tuple, Runnable] = {}
+        self._lock = threading.Lock()
+
+    def estimate_tokens(self, text:str) -> int:
+        """Approximates the token count from the character count; cheap enough for every chunk."""
+        return -(-len(text) // self.settings["chars_per_token"])
+
+    def budget(self, model:str|dict[str,str]) -> int:
+        """Returns the context token budget of a model entry, a share of its configured token limit."""
+        limit = list(model.values())[0] if isinstance(model, dict) else -1
+        if limit is None or int(limit) <= 0:
+            return self.settings["default_tokens"]
+        return int(int(limit) * self.settings["context_fraction"])
+
+    @staticmethod
+    def header(metadata:dict) -> str:
+        """Renders metadata as e.g. `Tuhade Lai, Punjab | Brochure | p. 3`."""
+        plan = ", ".join(str(metadata[key]) for key in ("plan", "state") if metadata.get(key))
+        parts = [plan, metadata.get("category")]
+        if metadata.get("page") is not None:
+            parts.append(f"p. {metadata['page']}")
+        if not any(parts) and metadata.get("source"):
+            parts.append(os.path.basename(str(metadata["source"])))
+        return " | ".join(str(part) for part in parts if part)
+
+    def _shingles(self, text:str) -> set[int]:
+        words = WORD_PATTERN.findall(text.lower())
+        size = self.settings["shingle_size"]
+        if len(words) < size:
+            return {hash(tuple(words))}
+        return {hash(tuple(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+    def deduplicate(self, docs:list[Document]) -> list[Document]:
+        """
+        Drops chunks that near-duplicate an earlier, more relevant chunk.
+
+        Similarity is the share of the smaller chunk's word shingles found in the other one, so a
+        chunk contained in a longer one counts as a duplicate as well as a lightly reworded copy.
+        """
+        kept, kept_shingles = [], []
+        for doc in docs:
+            shingles = self._shingles(doc.page_content)
+            if any(
+                len(shingles & other) / min(len(shingles), len(other)) >= self.settings["dedup_threshold"]
+                for other in kept_shingles
+            ):
+                continue
+            kept.append(doc)
+            kept_shingles.append(shingles)
+        if len(kept) < len(docs):
+            logging.info("Context builder dropped %d near-duplicate chunks", len(docs) - len(kept))
+        return kept
+
+    def blocks(self, docs:list[Document]) -> list[str]:
+        """Returns the deduplicated chunks rendered as context blocks, most relevant first."""
+        blocks = []
+        for doc in self.deduplicate(docs):
+            header = self.header(doc.metadata)
+            blocks.append(f"[{header}]\n{doc.page_content.strip()}" if header else doc.page_content.strip())
+        return blocks
+
+    def pack(self, blocks:list[str], budget_tokens:int) -> str:
+        """
+        Packs blocks into a token budget in relevance order.
+
+        A block that does not fit is skipped so a shorter, less relevant one can still be used;
+        the most relevant block is always kept, truncated if it alone exceeds the budget.
+
+        Args:
+            blocks (list[str]): Context blocks, most relevant first.
+            budget_tokens (int): Token budget of the context.
+
+        Returns:
+            str: The packed context.
+        """
+        packed, used = [], 0
+        for block in blocks:
+            tokens = self.estimate_tokens(block) + 1
+            if used + tokens <= budget_tokens:
+                packed.append(block)
+                used += tokens
+        if blocks and not packed:
+            packed.append(blocks[0][:budget_tokens * self.settings["chars_per_token"]])
+        return "\n\n".join(packed)
+
+    def build(self, docs:list[Document], budget_tokens:int) -> tuple[list[str], str]:
+        """Returns the context blocks of retrieved documents and the context packed into `budget_tokens`."""
+        blocks = self.blocks(docs)
+        return blocks, self.pack(blocks, budget_tokens)
+
+    def fit(self, inputs:dict, budget_tokens:int) -> dict:
+        """Re-packs `context_blocks` of a prompt input into `budget_tokens`; inputs without blocks pass through."""
+        blocks = inputs.get("context_blocks")
+        if not blocks:
+            return {key: value for key, value in inputs.items() if key != "context_blocks"}
+        return {
+            **{key: value for key, value in inputs.items() if key != "context_blocks"},
+            "context": self.pack(blocks, budget_tokens),
+        }
+
+    def prompt_for(self, model:str|dict[str,str], prompt:Runnable) -> Runnable:
+        """
+        Returns `fit | prompt` for a model's budget, cached so the LLM registry reuses the chain built on it.
+
+        Args:
+            model (str | dict[str,str]): Model name, or a `{model_name: max_tokens}` entry from config.yaml.
+            prompt (Runnable): The prompt the fitted inputs are formatted with.
+
+        Returns:
+            Runnable: The budgeted prompt.
+        """
+        budget = self.budget(model)
+        key = (budget, id(prompt))
+        runnable = self._prompts.get(key)
+        if runnable is None:
+            with self._lock:
+                runnable = self._prompts.setdefault(
+                    key, RunnableLambda(lambda inputs: self.fit(inputs, budget), name=f"fit_context_{budget}") | prompt
+                )
+        return runnable
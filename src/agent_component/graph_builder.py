@@ -1,29 +1,77 @@
 from src.agent_component.agent import Agents, AgentState
-from langgraph.graph import StateGraph
+from src.rag_component.connection_pool import get_retriever_pool
+from langgraph.graph import StateGraph, END
+from langgraph.graph.state import CompiledStateGraph
+from langchain_core.runnables import RunnableLambda
 
+from tracing.tracer import get_tracer
 from logger.custom_logger import CustomLogger
 from exception.custom_exception import CustomException
-import sys
+import argparse, os, sys, threading
 
 logging = CustomLogger().get_logger(__file__)
 
-def build_insurance_agent_graph() -> StateGraph:
+def node(func, afunc) -> tuple[str, RunnableLambda]:
+    """
+    Pairs a sync node with its async version, so the graph runs natively under both invoke and
+    ainvoke. Both run inside a `node.<name>` span; the wrappers keep the signatures, so nodes
+    taking a `config` parameter still receive it.
+    """
+    tracer = get_tracer()
+    return func.__name__, RunnableLambda(
+        tracer.traced(f"node.{func.__name__}")(func),
+        afunc=tracer.traced(f"node.{func.__name__}")(afunc),
+        name=func.__name__,
+    )
 
+def build_insurance_agent_graph(warm_up:bool=True, agent:Agents|None=None) -> CompiledStateGraph:
+    """
+    Builds and compiles the insurance agent graph.
+
+    Prefer `get_insurance_agent_graph`, which compiles the graph once per process.
+
+    Args:
+        warm_up (bool): Warm the retriever pool and the LLM clients before compiling. Defaults to True.
+        agent (Agents, optional): Agent whose nodes make up the graph, e.g. one built on local
+            stand-ins for benchmarking. Defaults to an agent on the shared clients.
+
+    Returns:
+        CompiledStateGraph: The compiled graph, or None if building failed.
+    """
     try:
         logging.info("Intializing insurance agent graph")
-        agent = Agents()
+        if warm_up and agent is None:
+            get_retriever_pool().warm_up()
+        agent = agent or Agents()
+        if warm_up:
+            agent.warm_up()
         graph = StateGraph(AgentState)
 
 
         logging.info("Adding sequence paths to the graph")
-        graph.add_sequence([agent.rag_retriever, agent.insurance_agent])
+        graph.add_node(*node(agent.catalog_lookup, agent.acatalog_lookup))
+        graph.add_node(*node(agent.semantic_cache_lookup, agent.asemantic_cache_lookup))
+        graph.add_sequence([
+            node(agent.rag_retriever, agent.arag_retriever),
+            node(agent.insurance_agent, agent.ainsurance_agent),
+            node(agent.semantic_cache_store, agent.asemantic_cache_store),
+        ])
 
-        graph.set_entry_point(agent.rag_retriever.__name__)
-        graph.set_finish_point(agent.insurance_agent.__name__)
+        graph.set_entry_point(agent.catalog_lookup.__name__)
+        graph.add_conditional_edges(
+            agent.catalog_lookup.__name__,
+            lambda state: END if state.get("catalog_hit") else agent.semantic_cache_lookup.__name__,
+            [agent.semantic_cache_lookup.__name__, END],
+        )
+        graph.add_conditional_edges(
+            agent.semantic_cache_lookup.__name__,
+            lambda state: END if state.get("cached") else agent.rag_retriever.__name__,
+            [agent.rag_retriever.__name__, END],
+        )
+        graph.set_finish_point(agent.semantic_cache_store.__name__)
 
-        logging.info("Compiling the graph and generating workflow image")
+        logging.info("Compiling the graph")
         app = graph.compile()
-        app.get_graph().draw_mermaid_png(output_file_path="static/img/workflow.png")
 
         logging.info("Insurance agent graph initialized successfully")
         return app
@@ -31,4 +79,48 @@ def build_insurance_agent_graph() -> StateGraph:
     except Exception as e:
         app_exc = CustomException(e, sys)
         logging.error("Failed to build insurance agent graph")
-        logging.error(app_exc)
\ No newline at end of file
+        logging.error(app_exc)
+
+
+_graph: CompiledStateGraph | None = None
+_lock = threading.Lock()
+
+
+def get_insurance_agent_graph() -> CompiledStateGraph:
+    """
+    Returns the process-wide compiled insurance agent graph, building it on first use.
+
+    The compiled graph is stateless between runs, so every session, request and thread shares it.
+    A failed build is not cached, so the next call retries.
+    """
+    global _graph
+    if _graph is None:
+        with _lock:
+            if _graph is None:
+                _graph = build_insurance_agent_graph()
+    return _graph
+
+
+def draw_workflow(output_file_path:str="static/img/workflow.png"):
+    """
+    Renders the graph diagram. A `.png` path is rendered through the Mermaid web service; any
+    other extension gets the Mermaid source, which needs no network access.
+
+    Args:
+        output_file_path (str): Where to write the diagram. Defaults to "static/img/workflow.png".
+    """
+    graph = build_insurance_agent_graph(warm_up=False).get_graph()
+    os.makedirs(os.path.dirname(output_file_path) or ".", exist_ok=True)
+    if output_file_path.endswith(".png"):
+        graph.draw_mermaid_png(output_file_path=output_file_path)
+    else:
+        with open(output_file_path, "w", encoding="utf-8") as f:
+            f.write(graph.draw_mermaid())
+    logging.info(f"Workflow diagram written to {output_file_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the insurance agent workflow diagram.")
+    parser.add_argument("--output", default="static/img/workflow.png", help="Output path; .png renders an image, anything else writes Mermaid source.")
+    args = parser.parse_args()
+    draw_workflow(args.output)
@@ -0,0 +1,144 @@
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+
+from logger.custom_logger import CustomLogger
+
+import threading
+
+logging = CustomLogger().get_logger(__file__)
+
+
+def tools_key(tools:list|None) -> tuple:
+    """Returns a hashable key for a list of tools, based on their names."""
+    return tuple(getattr(tool, "name", None) or getattr(tool, "__name__", repr(tool)) for tool in tools or [])
+
+
+class LLMRegistry:
+    """
+    Process-wide registry of initialized chat model clients and the chains built around them.
+
+    Clients are keyed by (model, temperature, max_tokens, bound tools) and chains additionally by
+    the identity of their previous/next runnables, so every request and thread reuses the same
+    client and its HTTP connection pool instead of constructing one per call.
+    """
+
+    def __init__(self, provider:str="groq", max_retries:int=3):
+        """
+        Args:
+            provider (str): `init_chat_model` provider prefix. Defaults to "groq".
+            max_retries (int): Client-level retries per call. Defaults to 3.
+        """
+        self.provider = provider
+        self.max_retries = max_retries
+        self._lock = threading.RLock()
+        self._llms: dict[tuple, BaseChatModel | Runnable] = {}
+        self._chains: dict[tuple, Runnable] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _create_llm(self, model_name:str, temperature:float, max_tokens:int) -> BaseChatModel:
+        if max_tokens == -1:
+            logging.info(f"Loading model: {model_name.capitalize()} with temperature: {temperature} and no max_tokens limit")
+            return init_chat_model(model=f"{self.provider}:{model_name}", temperature=temperature, max_retries=self.max_retries)
+
+        logging.info(f"Loading model: {model_name.capitalize()} with temperature: {temperature} and max_tokens: {max_tokens}")
+        return init_chat_model(
+            model=f"{self.provider}:{model_name}", temperature=temperature, max_tokens=max_tokens, max_retries=self.max_retries
+        )
+
+    def get_llm(self, model_name:str, temperature:float=0.2, max_tokens:int=-1, tools:list|None=None) -> BaseChatModel | Runnable:
+        """
+        Returns the shared client for a model configuration, initializing it on first use.
+
+        Args:
+            model_name (str): Name of the model to load (e.g., "llama-3.3-70b-versatile").
+            temperature (float): The temperature to use for the model.
+            max_tokens (int): Maximum number of tokens to generate. If -1, no limit is applied.
+            tools (list, optional): Tools to bind to the model. Defaults to None.
+
+        Returns:
+            BaseChatModel | Runnable: The client, with tools bound when given.
+        """
+        key = (model_name, temperature, max_tokens, tools_key(tools))
+        llm = self._llms.get(key)
+        if llm is not None:
+            self.hits += 1
+            return llm
+
+        with self._lock:
+            llm = self._llms.get(key)
+            if llm is None:
+                self.misses += 1
+                if tools:
+                    llm = self.get_llm(model_name, temperature, max_tokens).bind_tools(tools)
+                else:
+                    base_key = (model_name, temperature, max_tokens, ())
+                    llm = self._llms.get(base_key) or self._create_llm(model_name, temperature, max_tokens)
+                self._llms[key] = llm
+            else:
+                self.hits += 1
+        return llm
+
+    def get_chain(
+            self, model_name:str, previous_chain:Runnable, next_chain:Runnable,
+            temperature:float=0.2, max_tokens:int=-1, tools:list|None=None
+        ) -> Runnable:
+        """
+        Returns the shared `previous_chain | llm | next_chain` pipeline for a model configuration.
+
+        The cached chain holds references to both runnables, so their ids stay valid as part of the key.
+
+        Args:
+            model_name (str): Name of the model to load.
+            previous_chain (Runnable): The chain to run before the model.
+            next_chain (Runnable): The chain to run after the model.
+            temperature (float): The temperature to use for the model.
+            max_tokens (int): Maximum number of tokens to generate. If -1, no limit is applied.
+            tools (list, optional): Tools to bind to the model. Defaults to None.
+
+        Returns:
+            Runnable: The pipeline.
+        """
+        key = (model_name, temperature, max_tokens, tools_key(tools), id(previous_chain), id(next_chain))
+        chain = self._chains.get(key)
+        if chain is None:
+            llm = self.get_llm(model_name, temperature, max_tokens, tools)
+            with self._lock:
+                chain = self._chains.setdefault(key, previous_chain | llm | next_chain)
+        return chain
+
+    def warm_up(self, models:list[str] | list[dict[str,str]], temperature:float=0.2, max_tokens:int=-1):
+        """
+        Initializes the clients of every model in a fallback list ahead of the first request.
+
+        Args:
+            models (list): Model names or `{model_name: max_tokens}` entries from config.yaml.
+            temperature (float): The temperature the clients will be used with.
+            max_tokens (int): Token limit for plain model names. Defaults to -1.
+        """
+        for model in models:
+            model_name, tokens = (list(model.items())[0] if isinstance(model, dict) else (model, max_tokens))
+            try:
+                self.get_llm(model_name, temperature=temperature, max_tokens=tokens)
+            except Exception as e:
+                logging.warning(f"Could not warm up model {model_name}: {e}")
+        logging.info(f"LLM registry warmed up with {len(self._llms)} clients")
+
+    def stats(self) -> dict:
+        """Returns client cache hits, misses and the number of cached clients and chains."""
+        return {"hits": self.hits, "misses": self.misses, "clients": len(self._llms), "chains": len(self._chains)}
+
+    def clear(self):
+        """Drops every cached client and chain."""
+        with self._lock:
+            self._llms.clear()
+            self._chains.clear()
+
+
+_registry = LLMRegistry()
+
+
+def get_llm_registry() -> LLMRegistry:
+    """Returns the process-wide chat model registry."""
+    return _registry
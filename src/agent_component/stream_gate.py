@@ -0,0 +1,110 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import RunnableConfig
+
+from logger.custom_logger import CustomLogger
+
+import threading
+
+logging = CustomLogger().get_logger(__file__)
+
+try:
+    # Private module: pyproject.toml pins langgraph below the next minor release for it
+    from langgraph.pregel._messages import StreamMessagesHandler
+except ImportError:
+    StreamMessagesHandler = None
+    logging.warning("langgraph's StreamMessagesHandler moved, hedged attempts stream their tokens ungated")
+
+
+class StreamGate(BaseCallbackHandler):
+    """
+    Holds back one hedged attempt's tokens from the graph's message stream until it wins.
+
+    The gate stands in for the graph's `StreamMessagesHandler` in the config of one attempt.
+    Model starts and errors are forwarded right away, so the handler keeps track of the run,
+    while tokens and the final message are buffered. `open` replays the buffer and lets the
+    rest through; `discard` drops it and everything the attempt streams afterwards.
+    """
+    run_inline = True
+
+    def __init__(self, handlers:list[BaseCallbackHandler]):
+        self.handlers = handlers
+        self.state = "closed"
+        self.buffer: list[tuple[str, tuple, dict]] = []
+        self.run_ids = set()
+        self.lock = threading.Lock()
+
+    def _dispatch(self, method:str, *args, **kwargs):
+        with self.lock:
+            if self.state == "closed":
+                self.buffer.append((method, args, kwargs))
+            elif self.state == "open":
+                for handler in self.handlers:
+                    getattr(handler, method)(*args, **kwargs)
+
+    def open(self):
+        """Lets the attempt's tokens through, starting with the ones buffered so far."""
+        with self.lock:
+            if self.state != "closed":
+                return
+            self.state = "open"
+            for method, args, kwargs in self.buffer:
+                for handler in self.handlers:
+                    getattr(handler, method)(*args, **kwargs)
+            self.buffer.clear()
+
+    def discard(self):
+        """Drops the attempt's tokens and stops tracking its model runs."""
+        with self.lock:
+            if self.state == "open":
+                return
+            self.state = "discarded"
+            self.buffer.clear()
+            for handler in self.handlers:
+                for run_id in self.run_ids:
+                    handler.metadata.pop(run_id, None)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        with self.lock:
+            if self.state == "discarded":
+                return
+            self.run_ids.add(run_id)
+            for handler in self.handlers:
+                handler.on_chat_model_start(serialized, messages, run_id=run_id, **kwargs)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        self._dispatch("on_llm_new_token", token, run_id=run_id, **kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._dispatch("on_llm_end", response, run_id=run_id, **kwargs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        for handler in self.handlers:
+            handler.on_llm_error(error, run_id=run_id, **kwargs)
+
+
+def gated_config(run_config:RunnableConfig) -> tuple[RunnableConfig, StreamGate|None]:
+    """
+    Returns a copy of a node's config whose message stream handlers are replaced by a closed gate.
+
+    Returns the config unchanged and no gate when the graph is not streaming messages, or when
+    this langgraph version's message stream handler cannot be imported.
+    """
+    callbacks = run_config.get("callbacks")
+    if callbacks is None or StreamMessagesHandler is None:
+        return run_config, None
+    if isinstance(callbacks, list):
+        handlers = [handler for handler in callbacks if isinstance(handler, StreamMessagesHandler)]
+        if not handlers:
+            return run_config, None
+        gate = StreamGate(handlers)
+        callbacks = [handler for handler in callbacks if handler not in handlers] + [gate]
+    else:
+        handlers = [handler for handler in callbacks.handlers if isinstance(handler, StreamMessagesHandler)]
+        if not handlers:
+            return run_config, None
+        gate = StreamGate(handlers)
+        callbacks = callbacks.copy()
+        for handler in handlers:
+            callbacks.remove_handler(handler)
+        callbacks.add_handler(gate, inherit=True)
+    return {**run_config, "callbacks": callbacks}, gate
@@ -1,12 +1,13 @@
-from src.rag_component.astradb import AstraDB
+from src.agent_component import CONTEXT_BUDGET
+from src.agent_component.context_builder import ContextBuilder
+from src.rag_component.connection_pool import get_vector_db
+from src.rag_component.query_analyzer import get_query_analyzer
 
-def retriever(query: str, k: int = 4) -> list:
-    vector_db = AstraDB()
-    docs = vector_db.rag_retrieve(query, k)
+context_builder = ContextBuilder(CONTEXT_BUDGET)
 
-    formatted_docs = "/n/n".join(
-        f"**Metadata**: {doc.metadata}\n**Content**: {doc.page_content}"
-        for doc in docs
-    )
+def retriever(query: str, k: int = 4) -> str:
+    vector_db = get_vector_db()
+    docs = vector_db.rag_retrieve(query, k, filter=get_query_analyzer().to_filter(query)) or []
 
-    return formatted_docs
\ No newline at end of file
+    # Same rendering as the graph's retriever node: near-duplicates dropped, one-line headers instead of raw metadata
+    return "\n\n".join(context_builder.blocks(docs))
@@ -8,8 +8,18 @@ config = load_config('config/config.yaml')
 
 load_dotenv()
 
+DATASET = config['dataset']
 COLLECTION_NAME = config['astradb']['collection_name']
 EMBEDDING_MODEL = config['astradb']['embedding_model']
+HTTP_POOL = config['astradb']['http_pool']
+VECTOR_STORE = config['vector_store']
+EMBEDDING_CACHE = config['embedding_cache']
+SEMANTIC_CACHE = config['semantic_cache']
+DOCUMENT_CATALOG = config['document_catalog']
+QUICK_QUERIES = config['quick_queries']
+DOWNLOADER = config['downloader']
+CHUNKING = config['chunking']
+INGESTION = config['ingestion']
 
 # os.environ['ASTRA_DB_API_ENDPOINT'] = userdata.get('ASTRA_DB_API_ENDPOINT')
 # os.environ['ASTRA_DB_APPLICATION_TOKEN'] = userdata.get('ASTRA_DB_APPLICATION_TOKEN')
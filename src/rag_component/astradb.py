@@ -1,26 +1,43 @@
 from langchain_astradb import AstraDBVectorStore
 from langchain_community.embeddings import JinaEmbeddings
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
-from src.rag_component import COLLECTION_NAME, EMBEDDING_MODEL
+from src.rag_component import COLLECTION_NAME, EMBEDDING_MODEL, INGESTION, SEMANTIC_CACHE, VECTOR_STORE
+from src.rag_component.batch_ingestion import ingest_in_batches
+from src.rag_component.lexical_index import has_lexical_index, update_lexical_index
+from src.rag_component.semantic_cache import mark_collection_updated
 
 from logger.custom_logger import CustomLogger
 from exception.custom_exception import CustomException
 
+from typing import Callable, Iterable
 import sys
 
 logging = CustomLogger().get_logger(__file__)
 
 class AstraDB:
     def __init__(
-            self, collection_name:str=COLLECTION_NAME, embedding_model:str=EMBEDDING_MODEL
+            self, collection_name:str=COLLECTION_NAME, embedding_model:str=EMBEDDING_MODEL,
+            embeddings:Embeddings|None=None, lexical_index_path:str|None=VECTOR_STORE["lexical_index_path"]
         ):
+        """
+        Initializes the AstraDB vector store client.
+
+        Args:
+            collection_name (str): Name of the AstraDB collection.
+            embedding_model (str): Jina embedding model name, used when `embeddings` is not given.
+            embeddings (Embeddings, optional): Pre-built embeddings client to reuse. Defaults to None.
+            lexical_index_path (str, optional): BM25 index kept in sync with ingestion and deletes, if one was built there.
+        """
         try:
-            jina_embeddings = JinaEmbeddings(
+            self.lexical_index_path = lexical_index_path
+            self.embeddings = embeddings or JinaEmbeddings(
                 model_name=embedding_model
             )
             self.vector_store = AstraDBVectorStore(
                 collection_name=collection_name,
-                embedding=jina_embeddings
+                embedding=self.embeddings
             )
 
             logging.info(f"AstraDB initialized with collection: {collection_name} and embedding model: {embedding_model}")
@@ -29,50 +46,147 @@ class AstraDB:
             logging.error("Failed to initialize AstraDBVectorStore")
             logging.error(app_exc)
 
-    def rag_retrieve(self, query:str, k:int=4):
+    def rag_retrieve(self, query:str, k:int=4, filter:dict|None=None):
         """
         Retrieves relevant documents from the AstraDB vector store based on the input query.
 
         Args:
             query (str): The input query string.
             k (int): The number of top relevant documents to retrieve. Default is 4.
+            filter (dict, optional): Metadata filter to restrict the search. If it matches nothing, an unfiltered search is run instead.
 
         Returns:
             list: A list of retrieved documents.
         """
         try:
-            docs = self.vector_store.similarity_search(query, k=k)
+            docs = self.vector_store.similarity_search(query, k=k, filter=filter)
+            if filter and not docs:
+                logging.info("Metadata filter %s matched no documents, retrying unfiltered", filter)
+                docs = self.vector_store.similarity_search(query, k=k)
 
             return docs
         
         except Exception as e:
-            app_exc = CustomException(e, sys)
+            app_exc = CustomException(e, sys, stage="retrieval")
             logging.error("Failed to retrieve documents from AstraDBVectorStore")
             logging.error(app_exc)
     
-    def ingestion(self, data:list, type:str='document'):
+    async def arag_retrieve(self, query:str, k:int=4, filter:dict|None=None):
         """
-        Ingests a list of texts into the AstraDB vector store.
+        Async version of `rag_retrieve`, so the graph can retrieve without blocking the event loop.
 
         Args:
-            texts (list[dict]): A list of texts to be ingested.
-            ids (list[str], optional): A list of IDs corresponding to the texts. Defaults to None.
+            query (str): The input query string.
+            k (int): The number of top relevant documents to retrieve. Default is 4.
+            filter (dict, optional): Metadata filter to restrict the search. If it matches nothing, an unfiltered search is run instead.
 
         Returns:
-            None
+            list: A list of retrieved documents.
         """
         try:
-            if type == 'document':
-                logging.info(f"Ingesting {len(data)} documents into AstraDBVectorStore")
-                self.vector_store.add_documents(data)
-            elif type == 'text':
-                logging.info(f"Ingesting {len(data)} texts into AstraDBVectorStore")
-                self.vector_store.add_texts(data)
-            else:
-                logging.error("Invalid type. Must be 'document' or 'text'.")
-                raise ValueError("Invalid type. Must be 'document' or 'text'.")
-            
+            docs = await self.vector_store.asimilarity_search(query, k=k, filter=filter)
+            if filter and not docs:
+                logging.info("Metadata filter %s matched no documents, retrying unfiltered", filter)
+                docs = await self.vector_store.asimilarity_search(query, k=k)
+
+            return docs
+
         except Exception as e:
-            app_exc = CustomException(e, sys)
+            app_exc = CustomException(e, sys, stage="retrieval")
+            logging.error("Failed to retrieve documents from AstraDBVectorStore")
+            logging.error(app_exc)
+
+    def _write_batch(self, batch:list[Document]):
+        ids = [doc.id for doc in batch]
+        self.vector_store.add_texts(
+            [doc.page_content for doc in batch], metadatas=[doc.metadata for doc in batch],
+            ids=ids if all(ids) else None
+        )
+
+    def ingest_batches(
+            self, documents:Iterable[Document], batch_size:int=INGESTION["batch_size"],
+            max_concurrency:int=INGESTION["max_concurrency"], max_retries:int=INGESTION["max_retries"],
+            on_written:Callable[[list[Document]], None]|None=None
+        ) -> dict:
+        """
+        Embeds and upserts documents in batches with bounded concurrency.
+
+        Documents are pulled from the iterable as batches complete, so a generator such as
+        `pdf_chunker.iter_documents` is ingested without holding the corpus in memory. Documents
+        carrying an `id` are upserted under it.
+
+        Args:
+            documents (Iterable[Document]): Documents to be ingested.
+            batch_size (int): Documents per embedding and insert request.
+            max_concurrency (int): Batches in flight.
+            max_retries (int): Attempts per batch.
+            on_written (Callable[[list[Document]], None], optional): Called with each batch once it is written.
+
+        Returns:
+            dict: Ingestion counters and throughput (docs/sec, embeddings/sec).
+
+        Raises:
+            CustomException: If a batch still fails after `max_retries` attempts.
+        """
+        # Written chunks are only kept for a BM25 index to apply them to, which holds every chunk anyway
+        written = [] if has_lexical_index(self.lexical_index_path) else None
+
+        def write_batch(batch:list[Document]):
+            self._write_batch(batch)
+            if written is not None:
+                written.extend(batch)
+
+        stats = ingest_in_batches(documents, write_batch, batch_size, max_concurrency, max_retries, on_written=on_written)
+        if stats.documents:
+            update_lexical_index(self.lexical_index_path, documents=written or ())
+            mark_collection_updated(SEMANTIC_CACHE["version_file"])
+
+        summary = stats.as_dict()
+        if stats.failed_batches:
+            app_exc = CustomException(
+                RuntimeError(f"{stats.failed_batches} batches ({stats.failed_documents} documents) failed to ingest: {summary}"), sys
+            )
             logging.error("Failed to ingest data into AstraDBVectorStore")
-            logging.error(app_exc)
\ No newline at end of file
+            logging.error(app_exc)
+            raise app_exc
+        return summary
+
+    def delete(self, ids:list[str]):
+        """
+        Deletes documents from the AstraDB vector store by id.
+
+        Args:
+            ids (list[str]): Ids of the documents to delete.
+        """
+        if not ids:
+            return
+        try:
+            logging.info(f"Deleting {len(ids)} documents from AstraDBVectorStore")
+            self.vector_store.delete(ids=ids)
+            update_lexical_index(self.lexical_index_path, deleted_ids=ids)
+            mark_collection_updated(SEMANTIC_CACHE["version_file"])
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Failed to delete documents from AstraDBVectorStore")
+            logging.error(app_exc)
+            raise app_exc
+
+    def ingestion(self, data:list, type:str='document') -> dict:
+        """
+        Ingests a list of documents or texts into the AstraDB vector store in batches.
+
+        Args:
+            data (list): Documents or texts to be ingested.
+            type (str): Either 'document' or 'text'. Defaults to 'document'.
+
+        Returns:
+            dict: Ingestion counters and throughput, see `ingest_batches`.
+        """
+        if type == 'text':
+            data = [Document(page_content=text) for text in data]
+        elif type != 'document':
+            logging.error("Invalid type. Must be 'document' or 'text'.")
+            raise ValueError("Invalid type. Must be 'document' or 'text'.")
+
+        logging.info(f"Ingesting {len(data)} {type}s into AstraDBVectorStore")
+        return self.ingest_batches(data)
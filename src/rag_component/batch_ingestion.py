@@ -0,0 +1,147 @@
+"""
+Batched, concurrent ingestion of chunked documents into the configured vector store.
+
+Usage:
+    python -m src.rag_component.batch_ingestion --manifest artifact/pdfs/manifest.json
+"""
+from langchain_core.documents import Document
+
+from src.rag_component import INGESTION
+
+from logger.custom_logger import CustomLogger
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+import argparse, json, threading, time
+
+logging = CustomLogger().get_logger(__file__)
+
+
+def batched(documents:Iterable[Document], batch_size:int) -> Iterator[list[Document]]:
+    """Yields consecutive lists of at most `batch_size` documents without materializing the iterable."""
+    iterator = iter(documents)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+class IngestionStats:
+    """Thread-safe counters and throughput of one batched ingestion run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.documents = 0
+        self.batches = 0
+        self.embeddings = 0
+        self.retries = 0
+        self.failed_batches = 0
+        self.failed_documents = 0
+        self.failed_sources: set[str] = set()
+
+    def record(self, batch:list[Document], attempts:int, ok:bool):
+        with self._lock:
+            self.embeddings += len(batch) * attempts
+            self.retries += attempts - 1
+            if ok:
+                self.batches += 1
+                self.documents += len(batch)
+            else:
+                self.failed_batches += 1
+                self.failed_documents += len(batch)
+                self.failed_sources.update(str(doc.metadata.get("source")) for doc in batch)
+
+    def as_dict(self) -> dict:
+        seconds = time.perf_counter() - self.start
+        return {
+            "documents": self.documents,
+            "batches": self.batches,
+            "embeddings": self.embeddings,
+            "retries": self.retries,
+            "failed_batches": self.failed_batches,
+            "failed_documents": self.failed_documents,
+            "seconds": seconds,
+            "docs_per_second": self.documents / seconds if seconds else 0.0,
+            "embeddings_per_second": self.embeddings / seconds if seconds else 0.0,
+        }
+
+
+def ingest_in_batches(
+        documents:Iterable[Document], write_batch:Callable[[list[Document]], None],
+        batch_size:int=INGESTION["batch_size"], max_concurrency:int=INGESTION["max_concurrency"],
+        max_retries:int=INGESTION["max_retries"], progress_every:int=INGESTION["progress_every"],
+        on_written:Callable[[list[Document]], None]|None=None
+    ) -> IngestionStats:
+    """
+    Feeds documents to `write_batch` in batches on a bounded thread pool.
+
+    Batches are pulled from the iterable only when a worker is free, so at most `max_concurrency`
+    batches are held in memory at once however large the corpus is. A batch that raises is retried
+    on its own with exponential backoff; batches that still fail are counted, not re-raised.
+
+    Args:
+        documents (Iterable[Document]): The documents, e.g. the `iter_documents` generator.
+        write_batch (Callable[[list[Document]], None]): Embeds and upserts one batch.
+        batch_size (int): Documents per batch.
+        max_concurrency (int): Batches written concurrently.
+        max_retries (int): Attempts per batch.
+        progress_every (int): Log throughput every this many batches.
+        on_written (Callable[[list[Document]], None], optional): Called with each batch once it is written.
+
+    Returns:
+        IngestionStats: Counters and throughput of the run.
+    """
+    stats = IngestionStats()
+
+    def run(batch:list[Document]):
+        for attempt in range(1, max_retries + 1):
+            try:
+                write_batch(batch)
+            except Exception as e:
+                logging.warning(f"Ingestion batch of {len(batch)} documents failed (attempt {attempt}/{max_retries}): {e}")
+                if attempt < max_retries:
+                    time.sleep(min(0.5 * 2 ** attempt, 10.0))
+                continue
+            stats.record(batch, attempt, ok=True)
+            if on_written is not None:
+                on_written(batch)
+            return
+        stats.record(batch, max_retries, ok=False)
+
+    def report():
+        progress = stats.as_dict()
+        logging.info(
+            f"Ingested {progress['documents']} documents in {progress['batches']} batches "
+            f"({progress['docs_per_second']:.1f} docs/s, {progress['embeddings_per_second']:.1f} embeddings/s, "
+            f"{progress['failed_batches']} failed batches)"
+        )
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        pending = set()
+        for submitted, batch in enumerate(batched(documents, batch_size), start=1):
+            if len(pending) >= max_concurrency:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending.add(executor.submit(run, batch))
+            if submitted % progress_every == 0:
+                report()
+        wait(pending)
+
+    report()
+    return stats
+
+
+if __name__ == "__main__":
+    from src.rag_component.connection_pool import get_vector_db
+    from src.rag_component.pdf_chunker import iter_documents, manifest_sources
+    from src.rag_component import DOWNLOADER
+
+    parser = argparse.ArgumentParser(description="Chunk the downloaded PDFs and ingest them into the vector store.")
+    parser.add_argument("--manifest", default=DOWNLOADER["manifest_path"], help="Downloader manifest.")
+    parser.add_argument("--batch-size", type=int, default=INGESTION["batch_size"])
+    parser.add_argument("--concurrency", type=int, default=INGESTION["max_concurrency"])
+    args = parser.parse_args()
+
+    summary = get_vector_db().ingest_batches(
+        iter_documents(manifest_sources(args.manifest)), batch_size=args.batch_size, max_concurrency=args.concurrency
+    )
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,185 @@
+from langchain_community.embeddings import JinaEmbeddings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.rag_component import COLLECTION_NAME, EMBEDDING_MODEL, HTTP_POOL, EMBEDDING_CACHE, QUICK_QUERIES, VECTOR_STORE
+from src.rag_component.astradb import AstraDB
+from src.rag_component.local_index import LocalIndex
+from src.rag_component.hybrid_retriever import HybridRetriever
+from src.rag_component.lexical_index import load_lexical_index
+from src.rag_component.embedding_cache import CachedEmbeddings, build_cached_embeddings
+
+from logger.custom_logger import CustomLogger
+from exception.custom_exception import CustomException
+
+import sys, threading, time
+
+logging = CustomLogger().get_logger(__file__)
+
+
+def mount_keep_alive_adapter(session, pool_connections:int=4, pool_maxsize:int=32, max_retries:int=2):
+    """
+    Mounts a pooled keep-alive HTTP adapter on a requests session.
+
+    Args:
+        session (requests.Session): The session to configure.
+        pool_connections (int): Number of host pools to cache. Defaults to 4.
+        pool_maxsize (int): Maximum connections kept alive per host. Defaults to 32.
+        max_retries (int): Retries on connection errors and 429/5xx responses. Defaults to 2; 0 leaves
+            retrying to the caller and returns 429/5xx responses as they are.
+
+    Returns:
+        requests.Session: The same session, for chaining.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=0.2,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,
+    ) if max_retries else 0
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RetrieverPool:
+    """
+    Process-wide holder of the vector store client.
+
+    The embeddings client, its HTTP session and the vector store handle are
+    created once and shared by every graph node and tool, so a chat turn only pays
+    for the similarity search itself. The backend (AstraDB or the local index) is
+    selected by `vector_store.backend` in config.yaml, and `vector_store.retrieval_mode: hybrid`
+    fuses it with the BM25 index.
+
+    A failed build is remembered for `retry_seconds`: calls in that window fail fast with the
+    same error instead of each constructing a new client against a backend that is down.
+    """
+
+    def __init__(
+            self, collection_name:str=COLLECTION_NAME, embedding_model:str=EMBEDDING_MODEL,
+            http_pool:dict=HTTP_POOL, embedding_cache:dict=EMBEDDING_CACHE, vector_store:dict=VECTOR_STORE,
+            retry_seconds:float=10.0
+        ):
+        self.collection_name = collection_name
+        self.vector_store = vector_store
+        self.embedding_model = embedding_model
+        self.http_pool = http_pool
+        self.embedding_cache = embedding_cache
+        self.retry_seconds = retry_seconds
+        self._vector_db = None
+        self._failure: CustomException|None = None
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _build(self) -> AstraDB | LocalIndex | HybridRetriever:
+        embeddings = JinaEmbeddings(model_name=self.embedding_model)
+        mount_keep_alive_adapter(embeddings.session, **self.http_pool)
+        return self._backend(build_cached_embeddings(embeddings, self.embedding_model, self.embedding_cache))
+
+    def _backend(self, embeddings=None) -> AstraDB | LocalIndex | HybridRetriever:
+        if self.vector_store["backend"] == "local":
+            vector_db = LocalIndex(
+                index_path=self.vector_store["local_index_path"],
+                embedding_model=self.embedding_model,
+                embeddings=embeddings,
+            )
+        else:
+            vector_db = AstraDB(
+                collection_name=self.collection_name,
+                embedding_model=self.embedding_model,
+                embeddings=embeddings,
+            )
+
+        if self.vector_store.get("retrieval_mode") == "hybrid":
+            path = self.vector_store["lexical_index_path"]
+            return HybridRetriever(vector_db, load_lexical_index(path), lexical_index_path=path)
+        return vector_db
+
+    def get(self) -> AstraDB | LocalIndex | HybridRetriever:
+        """
+        Returns the shared vector store client, creating it on first use.
+
+        Returns:
+            AstraDB | LocalIndex | HybridRetriever: The shared vector store client.
+
+        Raises:
+            CustomException: If the client failed to initialize, within `retry_seconds` of the
+                failure without trying again.
+        """
+        if self._vector_db is not None:
+            return self._vector_db
+
+        with self._lock:
+            if self._vector_db is not None:
+                return self._vector_db
+            if self._failure is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+                raise self._failure
+
+            try:
+                vector_db = self._build()
+                if not hasattr(vector_db, "vector_store"):
+                    raise RuntimeError(f"Vector store client for collection {self.collection_name} failed to initialize")
+            except Exception as e:
+                self._failure = CustomException(e, sys)
+                self._failed_at = time.monotonic()
+                logging.error(f"Failed to build pooled vector store client, retrying in {self.retry_seconds}s")
+                logging.error(self._failure)
+                raise self._failure
+
+            logging.info(f"Retriever pool ready for collection: {self.collection_name}")
+            self._vector_db = vector_db
+            self._failure = None
+            return vector_db
+
+    def warm_up(self, queries:list[str]=QUICK_QUERIES) -> bool:
+        """
+        Creates the shared client eagerly, typically at application startup, and
+        pre-warms the query embedding cache.
+
+        Args:
+            queries (list[str]): Queries to pre-embed. Defaults to the quick-query templates.
+
+        Returns:
+            bool: True if the client is ready.
+        """
+        try:
+            vector_db = self.get()
+        except CustomException:
+            return False
+
+        if queries and isinstance(vector_db.embeddings, CachedEmbeddings):
+            try:
+                vector_db.embeddings.warm(queries)
+            except Exception as e:
+                app_exc = CustomException(e, sys)
+                logging.error("Failed to pre-warm the embedding cache")
+                logging.error(app_exc)
+        return True
+
+    def cache_stats(self) -> dict:
+        """Returns the embedding cache counters, or an empty dict when caching is disabled."""
+        vector_db = self._vector_db
+        if vector_db is not None and isinstance(vector_db.embeddings, CachedEmbeddings):
+            return vector_db.embeddings.stats()
+        return {}
+
+    def reset(self):
+        """Drops the shared client, and any remembered failure, so the next call builds a fresh one."""
+        with self._lock:
+            self._vector_db = None
+            self._failure = None
+
+
+_pool = RetrieverPool()
+
+
+def get_retriever_pool() -> RetrieverPool:
+    """Returns the process-wide retriever pool."""
+    return _pool
+
+
+def get_vector_db() -> AstraDB | LocalIndex | HybridRetriever:
+    """Returns the shared vector store client from the process-wide pool."""
+    return _pool.get()
@@ -0,0 +1,123 @@
+from src.rag_component import DOCUMENT_CATALOG
+from src.rag_component.query_analyzer import QueryAnalyzer, load_catalog, parse_plan_key
+
+from logger.custom_logger import CustomLogger
+
+from collections import defaultdict
+from functools import lru_cache
+import os, re
+
+logging = CustomLogger().get_logger(__file__)
+
+# Phrasings of "give me the document/link" requests that the catalog can answer exactly
+DOWNLOAD_INTENT = re.compile(
+    r"\b(download|link|links|url|pdf|where (can|do) i (find|get)|send me|give me|"
+    r"available documents|all documents)\b",
+    re.IGNORECASE,
+)
+ALL_DOCUMENTS = re.compile(r"\b(all|every|available)\b.*\bdocuments?\b", re.IGNORECASE)
+# Questions about what the documents say need RAG, even when they name a document
+CONTENT_INTENT = re.compile(
+    r"\b(details?|benefits?|cover(ed|age)?|exclusions?|compare|difference|explain|premium|claim|fill)\b",
+    re.IGNORECASE,
+)
+
+
+class DocumentCatalog:
+    """
+    Inverted index over the statewise document catalog.
+
+    Every (plan key, category, URL) triple is a row; postings map plan keys, plan names, state
+    groups and categories to row ids, so resolving a query is a few set intersections.
+    """
+
+    def __init__(self, catalog:dict[str, dict[str, list[str]]], max_plans:int=2):
+        """
+        Args:
+            catalog (dict): The `data` mapping of the statewise JSON.
+            max_plans (int): Maximum number of plan keys a query may resolve to and still be answered directly. Defaults to 2.
+        """
+        self.max_plans = max_plans
+        self.analyzer = QueryAnalyzer(catalog)
+        self.rows: list[tuple[str, str, str]] = []
+        self._postings: dict[tuple[str, str], set[int]] = defaultdict(set)
+
+        for plan_key, categories in catalog.items():
+            plan, state_group, _ = parse_plan_key(plan_key)
+            for category, urls in categories.items():
+                for url in urls:
+                    row = len(self.rows)
+                    self.rows.append((plan_key, category, url))
+                    self._postings[("plan_key", plan_key)].add(row)
+                    self._postings[("plan", plan)].add(row)
+                    self._postings[("state", state_group)].add(row)
+                    self._postings[("category", category)].add(row)
+
+    def _union(self, field:str, values:list[str]) -> set[int]:
+        return set().union(*(self._postings.get((field, value), set()) for value in values))
+
+    def search(
+            self, plan_keys:list[str] | None = None, plans:list[str] | None = None,
+            states:list[str] | None = None, categories:list[str] | None = None
+        ) -> list[tuple[str, str, str]]:
+        """
+        Returns catalog rows matching every given field; a field left empty is not restricted.
+
+        Args:
+            plan_keys (list[str], optional): Catalog keys, e.g. "Tuhade Lai- Punjab".
+            plans (list[str], optional): Plan names, e.g. "Aapke Liye".
+            states (list[str], optional): State groups, e.g. "Bihar & Jharkhand".
+            categories (list[str], optional): Document categories, e.g. "Brochure".
+
+        Returns:
+            list[tuple[str, str, str]]: Matching (plan key, category, URL) rows in catalog order.
+        """
+        rows = set(range(len(self.rows)))
+        for field, values in (("plan_key", plan_keys), ("plan", plans), ("state", states), ("category", categories)):
+            if values:
+                rows &= self._union(field, values)
+        return [self.rows[row] for row in sorted(rows)]
+
+    def resolve(self, query:str) -> str | None:
+        """
+        Answers a document/link request straight from the catalog.
+
+        Only queries with a download intent, no question about the document contents, at most
+        `max_plans` matching catalog rows and either a category or a request for all documents are
+        answered; everything else returns None so the caller can fall back to RAG.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            str | None: A markdown answer listing the matching documents, or None.
+        """
+        if not DOWNLOAD_INTENT.search(query) or CONTENT_INTENT.search(query):
+            return None
+
+        analysis = self.analyzer.analyze(query)
+        plan_keys, categories = analysis["plan_keys"], analysis["categories"]
+        if not plan_keys or len(plan_keys) > self.max_plans:
+            return None
+        if not categories and not ALL_DOCUMENTS.search(query):
+            return None
+
+        rows = self.search(plan_keys=plan_keys, categories=categories)
+        if not rows:
+            return None
+
+        lines = []
+        for plan_key in plan_keys:
+            lines.append(f"**{plan_key}**")
+            for row_plan_key, category, url in rows:
+                if row_plan_key == plan_key:
+                    lines.append(f"- {category}: [{os.path.basename(url)}]({url})")
+        return "\n".join(lines)
+
+
+@lru_cache(maxsize=1)
+def get_document_catalog() -> DocumentCatalog | None:
+    """Returns the process-wide document catalog, or None when it is disabled in config.yaml."""
+    if not DOCUMENT_CATALOG["enabled"]:
+        return None
+    return DocumentCatalog(load_catalog(), max_plans=DOCUMENT_CATALOG["max_plans"])
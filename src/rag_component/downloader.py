@@ -0,0 +1,279 @@
+"""
+Downloads the statewise policy documents concurrently, resumably and incrementally.
+
+Usage:
+    python -m src.rag_component.downloader --workers 8
+    python -m src.rag_component.downloader --dataset data/bajaj_insurance_documents_statewise.json --force
+"""
+import requests
+
+from src.rag_component import DATASET, DOWNLOADER
+from src.rag_component.connection_pool import mount_keep_alive_adapter
+from src.rag_component.query_analyzer import load_catalog
+
+from logger.custom_logger import CustomLogger
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse, hashlib, json, os, threading, time
+
+logging = CustomLogger().get_logger(__file__)
+
+
+def document_targets(catalog:dict[str, dict[str, list[str]]]) -> list[tuple[str, str, str]]:
+    """Returns the (plan key, category, URL) triples of every PDF in the statewise catalog."""
+    return [
+        (plan_key, category, url)
+        for plan_key, categories in catalog.items()
+        for category, urls in categories.items()
+        for url in urls
+        if url.lower().endswith(".pdf")
+    ]
+
+
+def local_path(download_dir:str, plan_key:str, category:str, url:str) -> str:
+    """Returns where a document is stored: `<plan key>/<Category>_<file name>`, as in the download notebook."""
+    plan_dir = plan_key.replace(" ", "_").replace("&", "and")
+    return os.path.join(download_dir, plan_dir, f"{category.replace(' ', '_')}_{os.path.basename(url)}")
+
+
+def file_sha256(path:str, chunk_size:int=1 << 20) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class DownloadManifest:
+    """
+    JSON manifest of downloaded documents keyed by URL.
+
+    Each entry keeps the local path, SHA-256 checksum, size, the server validators (ETag and
+    Last-Modified) used for conditional requests, and the catalog plan key and category.
+    """
+
+    def __init__(self, path:str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, url:str) -> dict:
+        with self._lock:
+            return dict(self.entries.get(url, {}))
+
+    def update(self, url:str, **fields):
+        with self._lock:
+            self.entries.setdefault(url, {}).update(fields)
+
+    def save(self):
+        """Writes the manifest atomically, so an interrupted run never leaves it half-written."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+class PDFDownloader:
+    """
+    Concurrent document downloader over one pooled keep-alive session.
+
+    - Files already in the manifest are re-requested with `If-None-Match`/`If-Modified-Since`,
+      so unchanged documents cost a 304 and no body.
+    - Bodies stream into `<file>.part`; after a failure the next attempt (or the next run)
+      resumes with `Range` + `If-Range`, and restarts cleanly if the server's copy changed.
+    - Every completed file is checksummed into the manifest.
+    """
+
+    def __init__(
+            self, download_dir:str=DOWNLOADER["download_dir"], manifest_path:str=DOWNLOADER["manifest_path"],
+            max_workers:int=DOWNLOADER["max_workers"], pool_maxsize:int=DOWNLOADER["pool_maxsize"],
+            timeout:float=DOWNLOADER["timeout"], max_retries:int=DOWNLOADER["max_retries"],
+            chunk_size:int=DOWNLOADER["chunk_size"], session:requests.Session|None=None
+        ):
+        """
+        Args:
+            download_dir (str): Directory documents are stored under.
+            manifest_path (str): Path of the JSON manifest.
+            max_workers (int): Concurrent downloads.
+            pool_maxsize (int): Keep-alive connections per host.
+            timeout (float): Connect/read timeout in seconds.
+            max_retries (int): Attempts per file before it is reported as failed.
+            chunk_size (int): Streaming block size in bytes.
+            session (requests.Session, optional): Session to use. Defaults to a new pooled session.
+        """
+        self.download_dir = download_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.chunk_size = chunk_size
+        self.manifest = DownloadManifest(manifest_path)
+        # Retries belong to `download`, which resumes from the partial file, not to the adapter
+        self.session = session or mount_keep_alive_adapter(
+            requests.Session(), pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0
+        )
+
+    @staticmethod
+    def _validator(response:requests.Response) -> str | None:
+        # If-Range only accepts strong ETags or a Last-Modified date
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            return etag
+        return response.headers.get("Last-Modified")
+
+    @staticmethod
+    def _retryable(error:Exception) -> bool:
+        """
+        Connection errors, timeouts, broken bodies, 5xx and 429 can pass on retry; other 4xx and local I/O errors will not.
+
+        A `RetryError` is a 429/5xx that an injected session's adapter already gave up retrying.
+        """
+        if isinstance(error, requests.HTTPError):
+            status = error.response.status_code if error.response is not None else None
+            return status is None or status == 429 or status >= 500
+        return isinstance(error, (
+            requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, requests.exceptions.RetryError
+        ))
+
+    def _fetch(self, plan_key:str, category:str, url:str, force:bool) -> dict:
+        path = local_path(self.download_dir, plan_key, category, url)
+        part_path = f"{path}.part"
+        entry = self.manifest.get(url)
+        headers = {}
+
+        if not force and entry.get("sha256") and os.path.exists(path):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if offset and entry.get("partial_validator"):
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = entry["partial_validator"]
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304:
+                return {"url": url, "path": path, "status": "unchanged", "bytes": 0}
+            if response.status_code == 416 and offset:
+                # The partial file no longer fits the remote document, so start it over
+                os.remove(part_path)
+                self.manifest.update(url, partial_validator=None)
+                return self._fetch(plan_key, category, url, force)
+            response.raise_for_status()
+
+            resumed = response.status_code == 206
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.manifest.update(url, partial_validator=self._validator(response))
+
+            sha = hashlib.sha256()
+            if resumed:
+                with open(part_path, "rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        sha.update(block)
+            received = 0
+            with open(part_path, "ab" if resumed else "wb") as f:
+                for block in response.iter_content(chunk_size=self.chunk_size):
+                    f.write(block)
+                    sha.update(block)
+                    received += len(block)
+
+            expected = response.headers.get("Content-Length")
+            if expected is not None and received != int(expected):
+                raise requests.ConnectionError(f"Incomplete body for {url}: {received} of {expected} bytes")
+
+            os.replace(part_path, path)
+            checksum = sha.hexdigest()
+            status = "unchanged" if checksum == entry.get("sha256") else "resumed" if resumed else "downloaded"
+            self.manifest.update(
+                url, path=path, plan_key=plan_key, category=category, sha256=checksum,
+                size=os.path.getsize(path), etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"), partial_validator=None,
+            )
+            return {"url": url, "path": path, "status": status, "bytes": received}
+
+    def download(self, plan_key:str, category:str, url:str, force:bool=False) -> dict:
+        """
+        Downloads one document, retrying transient failures (connection errors, timeouts, 5xx, 429)
+        from the partial file; other 4xx responses fail immediately.
+
+        Args:
+            plan_key (str): Catalog plan key the document belongs to.
+            category (str): Document category, e.g. "Brochure".
+            url (str): Document URL.
+            force (bool): Skip conditional request validators. Defaults to False.
+
+        Returns:
+            dict: `url`, `path`, `status` ("downloaded", "resumed", "unchanged" or "failed") and `bytes` received.
+        """
+        error = None
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return self._fetch(plan_key, category, url, force)
+            except (requests.RequestException, OSError) as e:
+                error = e
+                if not self._retryable(e):
+                    logging.warning(f"Download failed for {url}, not retrying: {e}")
+                    break
+                logging.warning(f"Download attempt {attempt}/{self.max_retries} failed for {url}: {e}")
+                if attempt < self.max_retries:
+                    time.sleep(min(0.2 * 2 ** attempt, 5.0))
+        return {"url": url, "path": None, "status": "failed", "bytes": 0, "error": str(error)}
+
+    def download_all(self, targets:list[tuple[str, str, str]], force:bool=False) -> dict:
+        """
+        Downloads documents concurrently and saves the manifest, also when interrupted.
+
+        Args:
+            targets (list[tuple[str, str, str]]): (plan key, category, URL) triples.
+            force (bool): Skip conditional request validators. Defaults to False.
+
+        Returns:
+            dict: Status counts, bytes received, elapsed seconds and the failed URLs.
+        """
+        start = time.perf_counter()
+        statuses, received, failed = Counter(), 0, []
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self.download, *target, force=force) for target in targets]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    result = future.result()
+                    statuses[result["status"]] += 1
+                    received += result["bytes"]
+                    if result["status"] == "failed":
+                        failed.append(result["url"])
+                    if done % 25 == 0:
+                        self.manifest.save()
+        finally:
+            self.manifest.save()
+
+        summary = {
+            **{status: statuses.get(status, 0) for status in ("downloaded", "resumed", "unchanged", "failed")},
+            "bytes": received,
+            "seconds": time.perf_counter() - start,
+            "failed_urls": failed,
+        }
+        logging.info(
+            f"Downloaded {summary['downloaded']} new, {summary['resumed']} resumed, {summary['unchanged']} unchanged, "
+            f"{summary['failed']} failed ({received / 2**20:.1f} MiB in {summary['seconds']:.1f}s)"
+        )
+        return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the statewise policy documents.")
+    parser.add_argument("--dataset", default=DATASET, help="Statewise catalog JSON.")
+    parser.add_argument("--output", default=DOWNLOADER["download_dir"], help="Download directory.")
+    parser.add_argument("--manifest", default=DOWNLOADER["manifest_path"], help="Manifest path.")
+    parser.add_argument("--workers", type=int, default=DOWNLOADER["max_workers"])
+    parser.add_argument("--force", action="store_true", help="Re-download without conditional requests.")
+    args = parser.parse_args()
+
+    downloader = PDFDownloader(download_dir=args.output, manifest_path=args.manifest, max_workers=args.workers)
+    summary = downloader.download_all(document_targets(load_catalog(args.dataset)), force=args.force)
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,270 @@
+from langchain_core.embeddings import Embeddings
+
+from tracing.tracer import get_tracer
+from logger.custom_logger import CustomLogger
+from exception.custom_exception import CustomException
+
+from array import array
+from collections import OrderedDict
+import os, re, sqlite3, sys, threading, time
+
+logging = CustomLogger().get_logger(__file__)
+tracer = get_tracer()
+
+
+def normalize_query(text:str) -> str:
+    """Lower-cases a query and collapses whitespace so trivially different spellings share a cache key."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class InMemoryEmbeddingCache:
+    """Thread-safe LRU cache of query embeddings with a per-entry time-to-live."""
+
+    def __init__(self, max_size:int=2048, ttl_seconds:float=86400):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key:str) -> list[float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, vector = entry
+            if self.ttl_seconds and time.monotonic() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def set(self, key:str, vector:list[float]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteEmbeddingCache:
+    """On-disk embedding cache that survives process restarts."""
+
+    def __init__(self, path:str, ttl_seconds:float=86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, created_at REAL, vector BLOB)"
+        )
+        self._conn.commit()
+
+    def get(self, key:str) -> list[float] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        created_at, blob = row
+        if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+            return None
+        return array("d", blob).tolist()
+
+    def set(self, key:str, vector:list[float]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, created_at, vector) VALUES (?, ?, ?)",
+                (key, time.time(), array("d", vector).tobytes()),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves repeated queries from a memory tier and an optional disk tier.
+
+    Only `embed_query` is cached; `embed_documents` is used for ingestion and goes straight to the
+    wrapped model. Keys combine the embedding model name with the normalized query text.
+    """
+
+    def __init__(
+            self, embeddings:Embeddings, model_name:str,
+            memory_cache:InMemoryEmbeddingCache|None=None, disk_cache:SQLiteEmbeddingCache|None=None
+        ):
+        """
+        Args:
+            embeddings (Embeddings): The embeddings model to wrap.
+            model_name (str): Embedding model name, part of every cache key.
+            memory_cache (InMemoryEmbeddingCache, optional): In-process tier. Defaults to a new LRU cache.
+            disk_cache (SQLiteEmbeddingCache, optional): Persistent tier. Defaults to None.
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory_cache = memory_cache or InMemoryEmbeddingCache()
+        self.disk_cache = disk_cache
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Expose attributes of the wrapped client (e.g. the HTTP session).
+        embeddings = self.__dict__.get("embeddings")
+        if embeddings is None:
+            raise AttributeError(name)
+        return getattr(embeddings, name)
+
+    def cache_key(self, text:str) -> str:
+        return f"{self.model_name}::{normalize_query(text)}"
+
+    def _lookup(self, key:str) -> list[float] | None:
+        vector = self.memory_cache.get(key)
+        if vector is not None:
+            self._count(hit=True)
+            return vector
+
+        if self.disk_cache is not None:
+            try:
+                vector = self.disk_cache.get(key)
+            except Exception as e:
+                app_exc = CustomException(e, sys)
+                logging.error("Failed to read embedding cache from disk")
+                logging.error(app_exc)
+                vector = None
+            if vector is not None:
+                self._count(hit=True, disk=True)
+                self.memory_cache.set(key, vector)
+                return vector
+
+        self._count(hit=False)
+        return None
+
+    def _count(self, hit:bool, disk:bool=False):
+        # Lookups run concurrently from the API worker threads, and `+=` on an attribute is not atomic
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+                self.disk_hits += disk
+            else:
+                self.misses += 1
+
+    def _store(self, key:str, vector:list[float]):
+        self.memory_cache.set(key, vector)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(key, vector)
+            except Exception as e:
+                app_exc = CustomException(e, sys)
+                logging.error("Failed to write embedding cache to disk")
+                logging.error(app_exc)
+
+    def embed_query(self, text:str) -> list[float]:
+        with tracer.span("embedding.query") as span:
+            key = self.cache_key(text)
+            vector = self._lookup(key)
+            span.set_attribute("embedding.cache_hit", vector is not None)
+            if vector is None:
+                vector = self.embeddings.embed_query(text)
+                self._store(key, vector)
+            return vector
+
+    async def aembed_query(self, text:str) -> list[float]:
+        with tracer.span("embedding.query") as span:
+            key = self.cache_key(text)
+            vector = self._lookup(key)
+            span.set_attribute("embedding.cache_hit", vector is not None)
+            if vector is None:
+                vector = await self.embeddings.aembed_query(text)
+                self._store(key, vector)
+            return vector
+
+    def embed_documents(self, texts:list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts:list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def warm(self, queries:list[str]) -> int:
+        """
+        Pre-computes embeddings for the given queries.
+
+        Each query goes through the wrapped model's `embed_query`, so the cached vector is the one
+        a live lookup would have computed (some models embed queries and documents differently).
+
+        Args:
+            queries (list[str]): Queries to pre-warm, e.g. the quick-query templates.
+
+        Returns:
+            int: Number of queries that were embedded (i.e. not already cached).
+        """
+        pending = {}
+        for query in queries:
+            key = self.cache_key(query)
+            if self.memory_cache.get(key) is not None:
+                continue
+            vector = self.disk_cache.get(key) if self.disk_cache is not None else None
+            if vector is not None:
+                self.memory_cache.set(key, vector)
+            else:
+                pending.setdefault(key, query)
+
+        for key, query in pending.items():
+            self._store(key, self.embeddings.embed_query(query))
+
+        logging.info(f"Embedding cache warmed with {len(pending)} new queries out of {len(queries)}")
+        return len(pending)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current memory tier size."""
+        with self._stats_lock:
+            hits, disk_hits, misses = self.hits, self.disk_hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": len(self.memory_cache),
+        }
+
+
+def build_cached_embeddings(embeddings:Embeddings, model_name:str, cache_config:dict) -> Embeddings:
+    """
+    Wraps an embeddings client according to the `embedding_cache` section of config.yaml.
+
+    Args:
+        embeddings (Embeddings): The embeddings client to wrap.
+        model_name (str): Embedding model name.
+        cache_config (dict): The `embedding_cache` configuration.
+
+    Returns:
+        Embeddings: The cached wrapper, or `embeddings` unchanged when caching is disabled.
+    """
+    if not cache_config.get("enabled", False):
+        return embeddings
+
+    memory_cache = InMemoryEmbeddingCache(
+        max_size=cache_config.get("max_size", 2048),
+        ttl_seconds=cache_config.get("ttl_seconds", 86400),
+    )
+    disk_cache = None
+    if cache_config.get("disk_path"):
+        disk_cache = SQLiteEmbeddingCache(
+            cache_config["disk_path"], ttl_seconds=cache_config.get("ttl_seconds", 86400)
+        )
+    return CachedEmbeddings(embeddings, model_name, memory_cache=memory_cache, disk_cache=disk_cache)
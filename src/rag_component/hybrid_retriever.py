@@ -0,0 +1,158 @@
+from langchain_core.documents import Document
+
+from src.rag_component import SEMANTIC_CACHE, VECTOR_STORE
+from src.rag_component.astradb import AstraDB
+from src.rag_component.local_index import LocalIndex
+from src.rag_component.lexical_index import BM25Index, load_lexical_index
+from src.rag_component.semantic_cache import collection_version
+
+from logger.custom_logger import CustomLogger
+from exception.custom_exception import CustomException
+
+import asyncio, sys, threading
+
+logging = CustomLogger().get_logger(__file__)
+
+
+def reciprocal_rank_fusion(rankings:list[list[Document]], k:int=4, rrf_k:int=60) -> list[Document]:
+    """
+    Fuses ranked result lists by reciprocal rank: a document scores `sum(1 / (rrf_k + rank))`.
+
+    Documents are matched across lists by their text, since the vector store and the lexical
+    index hold the same chunks.
+
+    Args:
+        rankings (list[list[Document]]): Result lists, best first.
+        k (int): The number of documents to return. Default is 4.
+        rrf_k (int): Rank damping constant. Default is 60.
+
+    Returns:
+        list[Document]: The top-k fused documents.
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            scores[doc.page_content] = scores.get(doc.page_content, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(doc.page_content, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+
+class HybridRetriever:
+    """
+    Vector search fused with BM25 keyword search, behind the same `rag_retrieve` interface as `AstraDB`.
+
+    Rare plan names ("Aponar Babe", "Adomgidamak") are matched exactly by the lexical index even
+    when the dense embeddings miss them. Both searches fetch `k * candidate_factor` candidates with
+    the same metadata filter and the lists are fused by reciprocal rank. Every other attribute
+    (`ingestion`, `embeddings`, ...) is delegated to the wrapped vector store client.
+
+    Ingestion and deletes update the persisted BM25 index before bumping the collection version;
+    a retriever given `lexical_index_path` re-loads it before the next search after a bump.
+    """
+
+    def __init__(
+            self, vector_db:AstraDB | LocalIndex, lexical_index:BM25Index|None=None,
+            rrf_k:int=VECTOR_STORE["rrf_k"], candidate_factor:int=VECTOR_STORE["candidate_factor"],
+            lexical_index_path:str|None=None, version_file:str=SEMANTIC_CACHE["version_file"]
+        ):
+        """
+        Args:
+            vector_db (AstraDB | LocalIndex): Vector store client to fuse with.
+            lexical_index (BM25Index, optional): BM25 index over the same chunks. Without one, retrieval is vector-only.
+            rrf_k (int): Reciprocal-rank fusion damping constant.
+            candidate_factor (int): Candidates fetched per search, as a multiple of k.
+            lexical_index_path (str, optional): Directory `lexical_index` was loaded from, re-loaded when the collection changes.
+            version_file (str): Collection version marker shared with ingestion.
+        """
+        self.vector_db = vector_db
+        self.lexical_index = lexical_index
+        self.rrf_k = rrf_k
+        self.candidate_factor = candidate_factor
+        self.lexical_index_path = lexical_index_path
+        self.version_file = version_file
+        self._version = collection_version(version_file)
+        self._reload_lock = threading.Lock()
+
+    def __getattr__(self, name:str):
+        if name == "vector_db":
+            raise AttributeError(name)
+        return getattr(self.vector_db, name)
+
+    def _refresh(self):
+        """Re-loads the BM25 index if ingestion has bumped the collection version since it was loaded."""
+        if self.lexical_index_path is None:
+            return
+        version = collection_version(self.version_file)
+        if version == self._version:
+            return
+        with self._reload_lock:
+            if version == self._version:
+                return
+            try:
+                self.lexical_index = load_lexical_index(self.lexical_index_path)
+                self._version = version
+            except Exception as e:
+                # A version swapped in mid-load; keep searching the previous one and retry next time
+                app_exc = CustomException(e, sys)
+                logging.error("Failed to re-load the lexical index, keeping the previous version")
+                logging.error(app_exc)
+
+    def lexical_retrieve(self, query:str, k:int, filter:dict|None=None) -> list[Document]:
+        """BM25 search, falling back to an unfiltered search when the filter matches nothing."""
+        if self.lexical_index is None:
+            return []
+        try:
+            docs = self.lexical_index.search(query, k=k, filter=filter)
+            if filter and not docs:
+                docs = self.lexical_index.search(query, k=k)
+            return docs
+        except Exception as e:
+            app_exc = CustomException(e, sys, stage="retrieval")
+            logging.error("Failed to retrieve documents from the lexical index")
+            logging.error(app_exc)
+            return []
+
+    def rag_retrieve(self, query:str, k:int=4, filter:dict|None=None):
+        """
+        Retrieves relevant documents by fusing vector and BM25 search.
+
+        Args:
+            query (str): The input query string.
+            k (int): The number of top relevant documents to retrieve. Default is 4.
+            filter (dict, optional): Metadata filter to restrict the search. If it matches nothing, an unfiltered search is run instead.
+
+        Returns:
+            list: A list of retrieved documents.
+        """
+        self._refresh()
+        if self.lexical_index is None:
+            return self.vector_db.rag_retrieve(query, k=k, filter=filter)
+
+        candidates = k * self.candidate_factor
+        vector_docs = self.vector_db.rag_retrieve(query, k=candidates, filter=filter) or []
+        lexical_docs = self.lexical_retrieve(query, candidates, filter)
+        return reciprocal_rank_fusion([vector_docs, lexical_docs], k=k, rrf_k=self.rrf_k)
+
+    async def arag_retrieve(self, query:str, k:int=4, filter:dict|None=None):
+        """
+        Async version of `rag_retrieve`; the vector and BM25 searches run concurrently.
+
+        Args:
+            query (str): The input query string.
+            k (int): The number of top relevant documents to retrieve. Default is 4.
+            filter (dict, optional): Metadata filter to restrict the search. If it matches nothing, an unfiltered search is run instead.
+
+        Returns:
+            list: A list of retrieved documents.
+        """
+        self._refresh()
+        if self.lexical_index is None:
+            return await self.vector_db.arag_retrieve(query, k=k, filter=filter)
+
+        candidates = k * self.candidate_factor
+        vector_docs, lexical_docs = await asyncio.gather(
+            self.vector_db.arag_retrieve(query, k=candidates, filter=filter),
+            asyncio.to_thread(self.lexical_retrieve, query, candidates, filter),
+        )
+        return reciprocal_rank_fusion([vector_docs or [], lexical_docs], k=k, rrf_k=self.rrf_k)
@@ -0,0 +1,177 @@
+"""
+Incremental re-ingestion: only chunks whose content changed are re-embedded and upserted.
+
+Usage:
+    python -m src.rag_component.incremental_ingestion
+    python -m src.rag_component.incremental_ingestion --dataset data/bajaj_insurance_documents_statewise.json --force
+"""
+from langchain_core.documents import Document
+
+from src.rag_component import CHUNKING, DATASET, DOWNLOADER, INGESTION
+from src.rag_component.astradb import AstraDB
+from src.rag_component.local_index import LocalIndex
+from src.rag_component.downloader import document_targets
+from src.rag_component.pdf_chunker import iter_documents, manifest_sources
+from src.rag_component.query_analyzer import load_catalog
+
+from logger.custom_logger import CustomLogger
+
+from typing import Iterable, Iterator
+import argparse, hashlib, json, os, threading, time, uuid
+
+logging = CustomLogger().get_logger(__file__)
+
+
+def chunk_id(source:str, page:int, start_index:int) -> str:
+    """Returns a stable id for a chunk, derived from its source URL, page and offset within the page."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#page={page}&offset={start_index}"))
+
+
+def content_hash(doc:Document) -> str:
+    """Returns the SHA-256 of a chunk's text and metadata, so a re-tagged chunk is re-upserted too."""
+    payload = json.dumps({"text": doc.page_content, "metadata": doc.metadata}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IngestionManifest:
+    """
+    JSON manifest of what the vector store holds.
+
+    `documents` maps each source URL to the file checksum and chunking settings it was last
+    ingested with, and `chunks` maps each chunk id to its source URL and content hash.
+    """
+
+    def __init__(self, path:str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.documents: dict[str, dict] = {}
+        self.chunks: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+            self.documents = payload.get("documents", {})
+            self.chunks = payload.get("chunks", {})
+
+    def chunk_hash(self, doc_id:str) -> str | None:
+        return self.chunks.get(doc_id, {}).get("hash")
+
+    def record_chunks(self, docs:list[Document]):
+        with self._lock:
+            for doc in docs:
+                self.chunks[doc.id] = {"source": doc.metadata.get("source"), "hash": content_hash(doc)}
+
+    def remove_chunks(self, ids:Iterable[str]):
+        with self._lock:
+            for doc_id in ids:
+                self.chunks.pop(doc_id, None)
+
+    def save(self):
+        """Writes the manifest atomically, so an interrupted run never leaves it half-written."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"documents": self.documents, "chunks": self.chunks}, f, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def incremental_ingest(
+        vector_db:AstraDB | LocalIndex, sources:list[dict], live_urls:set[str],
+        manifest_path:str=INGESTION["manifest_path"], chunk_size:int=CHUNKING["chunk_size"],
+        chunk_overlap:int=CHUNKING["chunk_overlap"], force:bool=False
+    ) -> dict:
+    """
+    Brings the vector store in line with the downloaded documents, embedding as little as possible.
+
+    - Documents whose file checksum and chunking settings match the manifest are not parsed at all.
+    - Chunks of the other documents get deterministic ids; only those whose content hash changed
+      are embedded and upserted.
+    - Chunks that a re-parsed document no longer produces, and every chunk of a document that
+      dropped out of the statewise catalog, are deleted.
+
+    The manifest records each batch once it is written, so an interrupted run resumes where it stopped.
+
+    Args:
+        vector_db (AstraDB | LocalIndex): Vector store to update.
+        sources (list[dict]): Downloaded documents, as returned by `manifest_sources`.
+        live_urls (set[str]): Document URLs currently listed in the statewise catalog.
+        manifest_path (str): Path of the ingestion manifest.
+        chunk_size (int): Maximum characters per chunk.
+        chunk_overlap (int): Characters shared by consecutive chunks of a page.
+        force (bool): Re-parse every document. Unchanged chunks are still not re-embedded. Defaults to False.
+
+    Returns:
+        dict: Document and chunk counts (`parsed`, `skipped`, `upserted`, `unchanged`, `deleted`) and the ingestion throughput.
+    """
+    start = time.perf_counter()
+    manifest = IngestionManifest(manifest_path)
+    settings = [chunk_size, chunk_overlap]
+
+    sources = [source for source in sources if source["url"] in live_urls]
+    changed = [
+        source for source in sources
+        if force or manifest.documents.get(source["url"]) != {"sha256": source.get("sha256"), "chunking": settings}
+    ]
+    seen: set[str] = set()
+    unchanged = 0
+
+    def pending_chunks() -> Iterator[Document]:
+        nonlocal unchanged
+        for doc in iter_documents(changed, chunk_size, chunk_overlap):
+            doc.id = chunk_id(doc.metadata["source"], doc.metadata["page"], doc.metadata["start_index"])
+            seen.add(doc.id)
+            if manifest.chunk_hash(doc.id) == content_hash(doc):
+                unchanged += 1
+                continue
+            yield doc
+
+    try:
+        summary = vector_db.ingest_batches(pending_chunks(), on_written=manifest.record_chunks)
+    finally:
+        manifest.save()
+
+    changed_urls = {source["url"] for source in changed}
+    stale = [
+        doc_id for doc_id, entry in manifest.chunks.items()
+        if entry["source"] not in live_urls or (entry["source"] in changed_urls and doc_id not in seen)
+    ]
+    vector_db.delete(stale)
+    manifest.remove_chunks(stale)
+
+    for source in changed:
+        manifest.documents[source["url"]] = {"sha256": source.get("sha256"), "chunking": settings}
+    for url in set(manifest.documents) - live_urls:
+        del manifest.documents[url]
+    manifest.save()
+
+    summary = {
+        "parsed": len(changed),
+        "skipped": len(sources) - len(changed),
+        "upserted": summary["documents"],
+        "unchanged": unchanged,
+        "deleted": len(stale),
+        **{key: summary[key] for key in ("embeddings", "retries", "docs_per_second", "embeddings_per_second")},
+        "seconds": time.perf_counter() - start,
+    }
+    logging.info(
+        f"Incremental ingestion parsed {summary['parsed']} documents ({summary['skipped']} skipped), upserted "
+        f"{summary['upserted']} chunks ({summary['unchanged']} unchanged) and deleted {summary['deleted']} in {summary['seconds']:.1f}s"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    from src.rag_component.connection_pool import get_vector_db
+
+    parser = argparse.ArgumentParser(description="Incrementally ingest the downloaded PDFs into the vector store.")
+    parser.add_argument("--dataset", default=DATASET, help="Statewise catalog JSON.")
+    parser.add_argument("--manifest", default=DOWNLOADER["manifest_path"], help="Downloader manifest.")
+    parser.add_argument("--ingestion-manifest", default=INGESTION["manifest_path"], help="Ingestion manifest.")
+    parser.add_argument("--force", action="store_true", help="Re-parse every document.")
+    args = parser.parse_args()
+
+    live_urls = {url for _, _, url in document_targets(load_catalog(args.dataset))}
+    summary = incremental_ingest(
+        get_vector_db(), manifest_sources(args.manifest), live_urls, manifest_path=args.ingestion_manifest, force=args.force
+    )
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,309 @@
+"""
+BM25 lexical index over the ingested chunks.
+
+Usage:
+    python -m src.rag_component.lexical_index --chunks artifact/chunks.jsonl
+    python -m src.rag_component.lexical_index --from-local-index
+"""
+from langchain_core.documents import Document
+
+from src.rag_component import VECTOR_STORE
+from src.rag_component.numpy_store import read_texts, staged_index, write_texts
+
+from logger.custom_logger import CustomLogger
+
+import numpy as np
+
+from collections import Counter
+from typing import Any, Iterable
+import argparse, itertools, json, os, re, time
+
+logging = CustomLogger().get_logger(__file__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text:str) -> list[str]:
+    """Lower-cased word tokens; plan names such as "Adomgidamak" stay single tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a compact inverted index.
+
+    Postings are stored in CSR form: `indptr[t]:indptr[t + 1]` slices the `postings` (document
+    rows, int32) and `frequencies` (term counts, uint16) of term `t`. A query gathers the slices of
+    its terms and scores them with one `np.bincount`, so the cost is proportional to the postings
+    touched rather than to the corpus size.
+    """
+
+    def __init__(self, k1:float=1.5, b:float=0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.postings = np.zeros(0, dtype=np.int32)
+        self.frequencies = np.zeros(0, dtype=np.uint16)
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self._ids: list[str|None] = []
+        self._texts: list[str] = []
+        self._columns: dict[str, list] = {}
+        self._column_arrays: dict[str, np.ndarray] = {}
+        self._prepare()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _prepare(self):
+        # Per-term idf and per-document length normalization are fixed once the index is built
+        size = len(self.lengths)
+        document_frequency = np.diff(self.indptr).astype(np.float32)
+        self.idf = np.log1p((size - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+        average = self.lengths.mean() if size else 1.0
+        self.norms = (self.k1 * (1 - self.b + self.b * self.lengths / average)).astype(np.float32)
+
+    @classmethod
+    def from_documents(cls, documents:Iterable[Document], k1:float=1.5, b:float=0.75) -> "BM25Index":
+        """
+        Builds an index from documents, keeping their ids, texts and metadata for retrieval.
+
+        Args:
+            documents (Iterable[Document]): The chunks to index.
+            k1 (float): Term frequency saturation. Defaults to 1.5.
+            b (float): Length normalization strength. Defaults to 0.75.
+
+        Returns:
+            BM25Index: The built index.
+        """
+        index = cls(k1, b)
+        terms, rows, counts, lengths = [], [], [], []
+        for row, doc in enumerate(documents):
+            tokens = tokenize(doc.page_content)
+            for term, count in Counter(tokens).items():
+                terms.append(index.vocabulary.setdefault(term, len(index.vocabulary)))
+                rows.append(row)
+                counts.append(count)
+            lengths.append(len(tokens))
+            index._ids.append(doc.id)
+            index._texts.append(doc.page_content)
+            for key in doc.metadata.keys() - index._columns.keys():
+                index._columns[key] = [None] * row
+            for key, column in index._columns.items():
+                column.append(doc.metadata.get(key))
+
+        terms = np.asarray(terms, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        index.indptr = np.zeros(len(index.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(index.vocabulary)), out=index.indptr[1:])
+        index.postings = np.asarray(rows, dtype=np.int32)[order]
+        index.frequencies = np.minimum(np.asarray(counts, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16)[order]
+        index.lengths = np.asarray(lengths, dtype=np.float32)
+        index._prepare()
+        return index
+
+    def updated(self, documents:Iterable[Document]=(), deleted_ids:Iterable[str]=()) -> "BM25Index":
+        """
+        Returns a rebuilt index with documents added and ids removed; a document whose id is already indexed replaces it.
+
+        Args:
+            documents (Iterable[Document]): The chunks to add.
+            deleted_ids (Iterable[str]): Ids of the chunks to remove.
+
+        Returns:
+            BM25Index: The new index; this one is left unchanged for concurrent searches.
+        """
+        documents = list(documents)
+        drop = set(deleted_ids) | {doc.id for doc in documents if doc.id}
+        kept = (self._document(row) for row in range(len(self)) if self._ids[row] not in drop)
+        return BM25Index.from_documents(itertools.chain(kept, documents), self.k1, self.b)
+
+    def _column(self, key:str) -> np.ndarray:
+        array = self._column_arrays.get(key)
+        if array is None:
+            array = np.empty(len(self), dtype=object)
+            array[:] = self._columns.get(key, [None] * len(self))
+            self._column_arrays[key] = array
+        return array
+
+    def _filter_mask(self, filter:dict[str, Any]) -> np.ndarray:
+        """Evaluates an equality filter; a list value (or `{"$in": [...]}`) matches any of its items."""
+        mask = np.ones(len(self), dtype=bool)
+        for key, value in filter.items():
+            if isinstance(value, dict) and "$in" in value:
+                value = value["$in"]
+            column = self._column(key)
+            if isinstance(value, (list, tuple, set)):
+                mask &= np.isin(column, list(value))
+            else:
+                mask &= column == value
+        return mask
+
+    def _document(self, row:int) -> Document:
+        return Document(
+            id=self._ids[row],
+            page_content=self._texts[row],
+            metadata={key: column[row] for key, column in self._columns.items() if column[row] is not None},
+        )
+
+    def scores(self, query:str) -> np.ndarray:
+        """Returns the BM25 score of every document for a query."""
+        terms = {self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary}
+        if not terms:
+            return np.zeros(len(self), dtype=np.float32)
+
+        slices = [np.arange(self.indptr[term], self.indptr[term + 1]) for term in terms]
+        positions = np.concatenate(slices)
+        rows = self.postings[positions]
+        frequencies = self.frequencies[positions].astype(np.float32)
+        idf = np.repeat(self.idf[list(terms)], [len(s) for s in slices])
+        weights = idf * frequencies * (self.k1 + 1) / (frequencies + self.norms[rows])
+        return np.bincount(rows, weights=weights, minlength=len(self)).astype(np.float32)
+
+    def search_with_score(self, query:str, k:int=4, filter:dict[str, Any]|None=None) -> list[tuple[Document, float]]:
+        """
+        Returns the top-k documents matching at least one query term, best first.
+
+        Args:
+            query (str): The input query string.
+            k (int): The number of documents to return. Default is 4.
+            filter (dict, optional): Metadata filter, same format as the vector stores.
+
+        Returns:
+            list[tuple[Document, float]]: Documents with their BM25 scores.
+        """
+        if not len(self):
+            return []
+        scores = self.scores(query)
+        if filter:
+            scores = np.where(self._filter_mask(filter), scores, 0.0)
+
+        matches = np.flatnonzero(scores > 0)
+        if not len(matches):
+            return []
+        k = min(k, len(matches))
+        top = matches[np.argpartition(-scores[matches], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self._document(row), float(scores[row])) for row in top]
+
+    def search(self, query:str, k:int=4, filter:dict[str, Any]|None=None) -> list[Document]:
+        return [doc for doc, _ in self.search_with_score(query, k=k, filter=filter)]
+
+    def save(self, path:str):
+        """
+        Writes the index to a directory: postings arrays in `bm25.npz`, the texts as `texts.bin`
+        with `offsets.npy`, and vocabulary, ids and metadata columns in `meta.json`. The files are
+        swapped in atomically, like the vector index.
+
+        Args:
+            path (str): Target directory.
+        """
+        with staged_index(path) as staging:
+            np.savez(
+                os.path.join(staging, "bm25.npz"), indptr=self.indptr, postings=self.postings,
+                frequencies=self.frequencies, lengths=self.lengths,
+            )
+            write_texts(staging, self._texts)
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "k1": self.k1, "b": self.b, "vocabulary": list(self.vocabulary),
+                    "ids": self._ids, "columns": self._columns,
+                }, f)
+
+    @classmethod
+    def load(cls, path:str) -> "BM25Index":
+        """
+        Loads an index written by `save`.
+
+        Args:
+            path (str): Index directory.
+
+        Returns:
+            BM25Index: The loaded index.
+
+        Raises:
+            ValueError: If the files belong to different versions, i.e. the index was swapped mid-load.
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            payload = json.load(f)
+        index = cls(payload["k1"], payload["b"])
+        with np.load(os.path.join(path, "bm25.npz")) as arrays:
+            index.indptr = arrays["indptr"]
+            index.postings = arrays["postings"]
+            index.frequencies = arrays["frequencies"]
+            index.lengths = arrays["lengths"]
+        index.vocabulary = {term: position for position, term in enumerate(payload["vocabulary"])}
+        index._ids = payload["ids"]
+        index._texts = list(read_texts(path))
+        index._columns = payload["columns"]
+        if not len(index.lengths) == len(index._texts) == len(index._ids):
+            raise ValueError(f"Index files in {path} are from different versions, it is being rewritten")
+        index._prepare()
+        return index
+
+
+def has_lexical_index(path:str|None) -> bool:
+    """Returns whether a BM25 index has been built at `path`."""
+    return path is not None and os.path.exists(os.path.join(path, "bm25.npz"))
+
+
+def load_lexical_index(path:str) -> BM25Index | None:
+    """Loads the BM25 index at `path`, or returns None when none has been built."""
+    if not has_lexical_index(path):
+        logging.warning(f"No BM25 index at {path}, hybrid retrieval falls back to vector search only")
+        return None
+    index = BM25Index.load(path)
+    logging.info(f"Loaded BM25 index of {len(index)} chunks from {path}")
+    return index
+
+
+def update_lexical_index(path:str|None, documents:Iterable[Document]=(), deleted_ids:Iterable[str]=()):
+    """
+    Applies ingested and deleted chunks to the BM25 index persisted at `path`.
+
+    Called by the vector stores before they bump the collection version, so a hybrid retriever
+    that re-loads on the bump finds the same chunks in both indexes. Does nothing when no BM25
+    index has been built there.
+
+    Args:
+        path (str, optional): BM25 index directory; None disables the update.
+        documents (Iterable[Document]): Chunks that were written.
+        deleted_ids (Iterable[str]): Ids of the chunks that were deleted.
+    """
+    if not has_lexical_index(path):
+        return
+    start = time.perf_counter()
+    index = BM25Index.load(path).updated(documents, deleted_ids)
+    index.save(path)
+    logging.info(f"Updated BM25 index at {path} to {len(index)} chunks in {time.perf_counter() - start:.1f}s")
+
+
+def read_chunks(path:str) -> Iterable[Document]:
+    """Yields the documents of a JSON lines file written by `pdf_chunker`."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield Document(page_content=record["page_content"], metadata=record["metadata"], id=record.get("id"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the BM25 index used by hybrid retrieval.")
+    parser.add_argument("--chunks", default="artifact/chunks.jsonl", help="Chunked documents (JSON lines).")
+    parser.add_argument("--from-local-index", action="store_true", help="Index the texts of the local vector index instead.")
+    parser.add_argument("--output", default=VECTOR_STORE["lexical_index_path"], help="Index directory.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.from_local_index:
+        from src.rag_component.numpy_store import NumpyVectorStore
+        store = NumpyVectorStore.load(VECTOR_STORE["local_index_path"], embedding=None)
+        documents = (store._document(row) for row in range(len(store)))
+    else:
+        documents = read_chunks(args.chunks)
+
+    index = BM25Index.from_documents(documents)
+    index.save(args.output)
+    logging.info(
+        f"Built BM25 index of {len(index)} chunks and {len(index.vocabulary)} terms "
+        f"at {args.output} in {time.perf_counter() - start:.1f}s"
+    )
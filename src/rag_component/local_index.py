@@ -0,0 +1,255 @@
+from langchain_community.embeddings import JinaEmbeddings
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.rag_component import EMBEDDING_MODEL, INGESTION, SEMANTIC_CACHE, VECTOR_STORE
+from src.rag_component.batch_ingestion import ingest_in_batches
+from src.rag_component.lexical_index import has_lexical_index, update_lexical_index
+from src.rag_component.numpy_store import NumpyVectorStore, staged_index
+from src.rag_component.quantized_index import MmapVectorStore, write_quantized
+from src.rag_component.semantic_cache import collection_version, mark_collection_updated
+
+from logger.custom_logger import CustomLogger
+from exception.custom_exception import CustomException
+
+from typing import Callable, Iterable
+import os, sys, threading
+
+logging = CustomLogger().get_logger(__file__)
+
+
+class LocalIndex:
+    """Local drop-in replacement for `AstraDB` exposing the same `rag_retrieve`/`ingestion` interface."""
+
+    def __init__(
+            self, index_path:str=VECTOR_STORE["local_index_path"], embedding_model:str=EMBEDDING_MODEL,
+            embeddings:Embeddings|None=None, quantization:str=VECTOR_STORE["quantization"],
+            rescore_factor:int=VECTOR_STORE["rescore_factor"], version_file:str=SEMANTIC_CACHE["version_file"],
+            lexical_index_path:str|None=VECTOR_STORE["lexical_index_path"]
+        ):
+        """
+        Initializes the local vector index, loading it from `index_path` when it exists.
+
+        Writes swap the index files in atomically and touch `version_file`; every process re-opens
+        its copy of the index before the next search once the version has changed.
+
+        Args:
+            index_path (str): Directory the index is persisted to.
+            embedding_model (str): Jina embedding model name, used when `embeddings` is not given.
+            embeddings (Embeddings, optional): Pre-built embeddings client to reuse. Defaults to None.
+            quantization (str): "none", "float16" or "int8". Quantized indexes are memory-mapped and shared between processes.
+            rescore_factor (int): Candidate multiplier for full-precision rescoring of quantized search.
+            version_file (str): Collection version marker shared with ingestion and the semantic cache.
+            lexical_index_path (str, optional): BM25 index kept in sync with ingestion and deletes, if one was built there.
+        """
+        try:
+            self.index_path = index_path
+            self.quantization = quantization
+            self.rescore_factor = rescore_factor
+            self.version_file = version_file
+            self.lexical_index_path = lexical_index_path
+            self._reopen_lock = threading.Lock()
+            self._version = collection_version(version_file)
+            self.embeddings = embeddings or JinaEmbeddings(
+                model_name=embedding_model
+            )
+            self.vector_store = self._open()
+
+            logging.info(f"Local index initialized from: {index_path} with {len(self.vector_store)} documents")
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Failed to initialize local vector index")
+            logging.error(app_exc)
+
+    def _open(self) -> NumpyVectorStore:
+        if not os.path.exists(os.path.join(self.index_path, "embeddings.npy")):
+            return NumpyVectorStore(self.embeddings)
+        if self.quantization == "none":
+            return NumpyVectorStore.load(self.index_path, self.embeddings)
+
+        if not os.path.exists(os.path.join(self.index_path, "quantized.npy")):
+            write_quantized(self.index_path, self.quantization)
+        return MmapVectorStore.load(self.index_path, self.embeddings, rescore_factor=self.rescore_factor)
+
+    def _persist(self, vector_store:NumpyVectorStore, documents:list[Document]=(), deleted_ids:list[str]=()):
+        """
+        Writes the index with its quantized copy to a staging directory, swaps it in and re-opens
+        it, then applies the same change to the BM25 index before bumping the collection version.
+        """
+        with staged_index(self.index_path) as staging:
+            vector_store.save(staging)
+            if self.quantization != "none":
+                write_quantized(staging, self.quantization)
+        self.vector_store = self._open()
+        update_lexical_index(self.lexical_index_path, documents, deleted_ids)
+        mark_collection_updated(self.version_file)
+        self._version = collection_version(self.version_file)
+
+    def _refresh(self):
+        """Re-opens the index if another process (or ingestion run) has published a new version."""
+        version = collection_version(self.version_file)
+        if version == self._version:
+            return
+        with self._reopen_lock:
+            if version == self._version:
+                return
+            if not os.path.exists(os.path.join(self.index_path, "embeddings.npy")):
+                # Nothing was ever persisted here, so the in-memory store is the only copy
+                self._version = version
+                return
+            try:
+                self.vector_store = self._open()
+                self._version = version
+                logging.info(f"Re-opened local index at {self.index_path} with {len(self.vector_store)} documents")
+            except Exception as e:
+                # A version swapped in mid-load; keep searching the previous one and retry next time
+                app_exc = CustomException(e, sys)
+                logging.error("Failed to re-open local index, keeping the previous version")
+                logging.error(app_exc)
+
+    def rag_retrieve(self, query:str, k:int=4, filter:dict|None=None):
+        """
+        Retrieves relevant documents from the local index based on the input query.
+
+        Args:
+            query (str): The input query string.
+            k (int): The number of top relevant documents to retrieve. Default is 4.
+            filter (dict, optional): Metadata filter to restrict the search. If it matches nothing, an unfiltered search is run instead.
+
+        Returns:
+            list: A list of retrieved documents.
+        """
+        try:
+            self._refresh()
+            docs = self.vector_store.similarity_search(query, k=k, filter=filter)
+            if filter and not docs:
+                logging.info("Metadata filter %s matched no documents, retrying unfiltered", filter)
+                docs = self.vector_store.similarity_search(query, k=k)
+
+            return docs
+
+        except Exception as e:
+            app_exc = CustomException(e, sys, stage="retrieval")
+            logging.error("Failed to retrieve documents from local index")
+            logging.error(app_exc)
+
+    async def arag_retrieve(self, query:str, k:int=4, filter:dict|None=None):
+        """
+        Async version of `rag_retrieve`, so the graph can retrieve without blocking the event loop.
+
+        Args:
+            query (str): The input query string.
+            k (int): The number of top relevant documents to retrieve. Default is 4.
+            filter (dict, optional): Metadata filter to restrict the search. If it matches nothing, an unfiltered search is run instead.
+
+        Returns:
+            list: A list of retrieved documents.
+        """
+        try:
+            self._refresh()
+            docs = await self.vector_store.asimilarity_search(query, k=k, filter=filter)
+            if filter and not docs:
+                logging.info("Metadata filter %s matched no documents, retrying unfiltered", filter)
+                docs = await self.vector_store.asimilarity_search(query, k=k)
+
+            return docs
+
+        except Exception as e:
+            app_exc = CustomException(e, sys, stage="retrieval")
+            logging.error("Failed to retrieve documents from local index")
+            logging.error(app_exc)
+
+    def ingest_batches(
+            self, documents:Iterable[Document], batch_size:int=INGESTION["batch_size"],
+            max_concurrency:int=INGESTION["max_concurrency"], max_retries:int=INGESTION["max_retries"],
+            on_written:Callable[[list[Document]], None]|None=None
+        ) -> dict:
+        """
+        Embeds documents in concurrent batches into the local index and persists it once at the end.
+
+        Args:
+            documents (Iterable[Document]): Documents to be ingested.
+            batch_size (int): Documents per embedding request.
+            max_concurrency (int): Batches in flight.
+            max_retries (int): Attempts per batch.
+            on_written (Callable[[list[Document]], None], optional): Called with each batch once it is written.
+
+        Returns:
+            dict: Ingestion counters and throughput (docs/sec, embeddings/sec).
+
+        Raises:
+            CustomException: If a batch still fails after `max_retries` attempts.
+        """
+        # A memory-mapped index is read-only, so ingest into a full-precision copy and re-open it
+        vector_store = self.vector_store
+        if isinstance(vector_store, MmapVectorStore):
+            vector_store = NumpyVectorStore.load(self.index_path, self.embeddings)
+
+        # Written chunks are only kept for a BM25 index to apply them to, which holds every chunk anyway
+        written = [] if has_lexical_index(self.lexical_index_path) else None
+
+        def write_batch(batch:list[Document]):
+            ids = [doc.id for doc in batch]
+            vector_store.add_texts(
+                [doc.page_content for doc in batch], metadatas=[doc.metadata for doc in batch],
+                ids=ids if all(ids) else None
+            )
+            if written is not None:
+                written.extend(batch)
+
+        stats = ingest_in_batches(documents, write_batch, batch_size, max_concurrency, max_retries, on_written=on_written)
+        if stats.documents:
+            self._persist(vector_store, documents=written or ())
+
+        summary = stats.as_dict()
+        if stats.failed_batches:
+            app_exc = CustomException(
+                RuntimeError(f"{stats.failed_batches} batches ({stats.failed_documents} documents) failed to ingest: {summary}"), sys
+            )
+            logging.error("Failed to ingest data into local index")
+            logging.error(app_exc)
+            raise app_exc
+        return summary
+
+    def delete(self, ids:list[str]):
+        """
+        Deletes documents from the local index by id and persists it.
+
+        Args:
+            ids (list[str]): Ids of the documents to delete.
+        """
+        if not ids:
+            return
+        try:
+            vector_store = self.vector_store
+            if isinstance(vector_store, MmapVectorStore):
+                vector_store = NumpyVectorStore.load(self.index_path, self.embeddings)
+
+            logging.info(f"Deleting {len(ids)} documents from local index")
+            vector_store.delete(ids)
+            self._persist(vector_store, deleted_ids=ids)
+        except Exception as e:
+            app_exc = CustomException(e, sys)
+            logging.error("Failed to delete documents from local index")
+            logging.error(app_exc)
+            raise app_exc
+
+    def ingestion(self, data:list, type:str='document') -> dict:
+        """
+        Ingests a list of documents or texts into the local index in batches and persists it.
+
+        Args:
+            data (list): Documents or texts to be ingested.
+            type (str): Either 'document' or 'text'. Defaults to 'document'.
+
+        Returns:
+            dict: Ingestion counters and throughput, see `ingest_batches`.
+        """
+        if type == 'text':
+            data = [Document(page_content=text) for text in data]
+        elif type != 'document':
+            logging.error("Invalid type. Must be 'document' or 'text'.")
+            raise ValueError("Invalid type. Must be 'document' or 'text'.")
+
+        logging.info(f"Ingesting {len(data)} {type}s into local index")
+        return self.ingest_batches(data)
@@ -0,0 +1,285 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+import numpy as np
+
+from contextlib import contextmanager
+from typing import Any, Iterable
+import json, os, shutil, tempfile, threading, uuid
+
+INDEX_FILES = ("embeddings.npy", "quantized.npy", "scales.npy", "bm25.npz", "offsets.npy", "texts.bin", "meta.json")
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector store backed by a NumPy matrix of L2-normalized embeddings.
+
+    Texts, ids and metadata are stored column by column so metadata filters are evaluated as
+    vectorized comparisons, and top-k selection uses `np.argpartition` instead of a full sort.
+    """
+
+    def __init__(self, embedding:Embeddings):
+        self.embedding = embedding
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._columns: dict[str, list] = {}
+        self._column_arrays: dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _append(self, vectors:np.ndarray, texts:list[str], metadatas:list[dict], ids:list[str]):
+        with self._lock:
+            # Adding an id that is already stored replaces it, so re-ingesting a chunk is an upsert
+            replaced = set(ids).intersection(self._ids)
+            if replaced:
+                self.delete(list(replaced))
+
+            needed = self._size + len(vectors)
+            if self._matrix.shape[1] != vectors.shape[1] and self._size == 0:
+                self._matrix = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            if needed > self._matrix.shape[0]:
+                capacity = max(needed, 2 * self._matrix.shape[0], 64)
+                grown = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+
+            self._matrix[self._size:needed] = vectors
+            for key in {key for metadata in metadatas for key in metadata} - self._columns.keys():
+                self._columns[key] = [None] * self._size
+            for key, column in self._columns.items():
+                column.extend(metadata.get(key) for metadata in metadatas)
+
+            self._texts.extend(texts)
+            self._ids.extend(ids)
+            self._size = needed
+            self._column_arrays.clear()
+
+    def add_texts(
+            self, texts:Iterable[str], metadatas:list[dict]|None=None, ids:list[str]|None=None, **kwargs:Any
+        ) -> list[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        if not texts:
+            return []
+
+        vectors = self._normalize(self.embedding.embed_documents(texts))
+        self._append(vectors, texts, metadatas, ids)
+        return ids
+
+    def add_embeddings(
+            self, texts:list[str], embeddings:list[list[float]], metadatas:list[dict]|None=None,
+            ids:list[str]|None=None
+        ) -> list[str]:
+        """Adds pre-computed embeddings without calling the embedding model."""
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        if texts:
+            self._append(self._normalize(embeddings), list(texts), metadatas, ids)
+        return ids
+
+    def delete(self, ids:list[str]|None=None, **kwargs:Any) -> bool:
+        with self._lock:
+            if ids is None:
+                keep = np.zeros(self._size, dtype=bool)
+            else:
+                drop = set(ids)
+                keep = np.fromiter((doc_id not in drop for doc_id in self._ids), dtype=bool, count=self._size)
+
+            rows = np.flatnonzero(keep)
+            self._matrix = np.ascontiguousarray(self._matrix[rows])
+            self._ids = [self._ids[row] for row in rows]
+            self._texts = [self._texts[row] for row in rows]
+            self._columns = {key: [column[row] for row in rows] for key, column in self._columns.items()}
+            self._size = len(rows)
+            self._column_arrays.clear()
+            return True
+
+    def _column(self, key:str) -> np.ndarray:
+        array = self._column_arrays.get(key)
+        if array is None:
+            array = np.empty(self._size, dtype=object)
+            array[:] = self._columns.get(key, [None] * self._size)
+            self._column_arrays[key] = array
+        return array
+
+    def _filter_mask(self, filter:dict[str, Any]) -> np.ndarray:
+        """Evaluates an equality filter; a list value (or `{"$in": [...]}`) matches any of its items."""
+        mask = np.ones(self._size, dtype=bool)
+        for key, value in filter.items():
+            if isinstance(value, dict) and "$in" in value:
+                value = value["$in"]
+            column = self._column(key)
+            if isinstance(value, (list, tuple, set)):
+                mask &= np.isin(column, list(value))
+            else:
+                mask &= column == value
+        return mask
+
+    def similarity_search_with_score_by_vector(
+            self, embedding:list[float], k:int=4, filter:dict[str, Any]|None=None
+        ) -> list[tuple[Document, float]]:
+        query = self._normalize(embedding)[0]
+        with self._lock:
+            if self._size == 0:
+                return []
+
+            scores = self._matrix[:self._size] @ query
+            if filter:
+                scores = np.where(self._filter_mask(filter), scores, -np.inf)
+
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            return [(self._document(row), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def _document(self, row:int) -> Document:
+        return Document(
+            id=self._ids[row],
+            page_content=self._texts[row],
+            metadata={key: column[row] for key, column in self._columns.items() if column[row] is not None},
+        )
+
+    def similarity_search_by_vector(
+            self, embedding:list[float], k:int=4, filter:dict[str, Any]|None=None, **kwargs:Any
+        ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(
+            self, query:str, k:int=4, filter:dict[str, Any]|None=None, **kwargs:Any
+        ) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search(
+            self, query:str, k:int=4, filter:dict[str, Any]|None=None, **kwargs:Any
+        ) -> list[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k=k, filter=filter)
+
+    @classmethod
+    def from_texts(
+            cls, texts:list[str], embedding:Embeddings, metadatas:list[dict]|None=None,
+            ids:list[str]|None=None, **kwargs:Any
+        ) -> "NumpyVectorStore":
+        store = cls(embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    def save(self, path:str):
+        """
+        Writes the index to a directory: `embeddings.npy`, the texts as `texts.bin` with
+        `offsets.npy`, and ids plus metadata columns in `meta.json`.
+
+        The files are written to a staging directory and swapped in with `os.replace`, so
+        processes that memory-map the previous version are never exposed to a half-written file.
+
+        Args:
+            path (str): Target directory.
+        """
+        with self._lock, staged_index(path) as staging:
+            np.save(os.path.join(staging, "embeddings.npy"), self._matrix[:self._size])
+            write_texts(staging, self._texts)
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "columns": self._columns}, f)
+
+    @classmethod
+    def load(cls, path:str, embedding:Embeddings) -> "NumpyVectorStore":
+        """
+        Loads an index written by `save`.
+
+        Args:
+            path (str): Index directory.
+            embedding (Embeddings): Embeddings client used for queries.
+
+        Returns:
+            NumpyVectorStore: The loaded store.
+
+        Raises:
+            ValueError: If the files belong to different versions, i.e. the index was swapped mid-load.
+        """
+        store = cls(embedding)
+        matrix = np.load(os.path.join(path, "embeddings.npy"))
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            payload = json.load(f)
+        store._matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        store._size = len(payload["ids"])
+        store._ids = payload["ids"]
+        store._texts = list(read_texts(path))
+        store._columns = payload["columns"]
+        if not len(store._matrix) == len(store._texts) == store._size:
+            raise ValueError(f"Index files in {path} are from different versions, it is being rewritten")
+        return store
+
+
+@contextmanager
+def staged_index(path:str):
+    """
+    Yields a staging directory inside `path` to write index files to, then publishes them into `path`.
+
+    Nothing is published if the block raises.
+    """
+    os.makedirs(path, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=path)
+    try:
+        yield staging
+        publish_index(staging, path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def publish_index(staging:str, path:str):
+    """
+    Moves the index files written to `staging` into `path`, replacing each one atomically.
+
+    Files are replaced rather than rewritten in place: a process that memory-maps the previous
+    version keeps reading its unlinked files instead of crashing with SIGBUS, until it re-opens
+    the index. Quantized files left over from the previous version are removed.
+    """
+    staged = set(os.listdir(staging))
+    for name in INDEX_FILES:
+        if name in staged:
+            os.replace(os.path.join(staging, name), os.path.join(path, name))
+
+    stale = set()
+    if "embeddings.npy" in staged and "quantized.npy" not in staged:
+        stale = {"quantized.npy", "scales.npy"}
+    elif "quantized.npy" in staged and "scales.npy" not in staged:
+        stale = {"scales.npy"}
+    for name in stale:
+        if os.path.exists(os.path.join(path, name)):
+            os.remove(os.path.join(path, name))
+
+
+def write_texts(path:str, texts:list[str]):
+    """Writes texts as one UTF-8 blob (`texts.bin`) plus an int64 offsets array (`offsets.npy`)."""
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(blob) for blob in encoded], out=offsets[1:])
+    with open(os.path.join(path, "texts.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+
+
+def read_texts(path:str):
+    """Yields the texts written by `write_texts`."""
+    offsets = np.load(os.path.join(path, "offsets.npy"))
+    with open(os.path.join(path, "texts.bin"), "rb") as f:
+        blob = f.read()
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        yield blob[start:end].decode("utf-8")
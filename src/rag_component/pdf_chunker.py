@@ -0,0 +1,137 @@
+"""
+Parses downloaded policy documents into metadata-tagged chunks for ingestion.
+
+Usage:
+    python -m src.rag_component.pdf_chunker --output artifact/chunks.jsonl
+"""
+import pymupdf
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.rag_component import CHUNKING, DOWNLOADER
+from src.rag_component.query_analyzer import parse_plan_key
+
+from logger.custom_logger import CustomLogger
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from typing import Iterable, Iterator
+import argparse, json, os, time
+
+logging = CustomLogger().get_logger(__file__)
+
+
+def manifest_sources(manifest_path:str=DOWNLOADER["manifest_path"]) -> list[dict]:
+    """Returns the downloaded documents (`path`, `plan_key`, `category`, `url`, `sha256`) recorded in the downloader manifest."""
+    with open(manifest_path, encoding="utf-8") as f:
+        entries = json.load(f)
+    return [
+        {"path": entry["path"], "plan_key": entry["plan_key"], "category": entry["category"], "url": url, "sha256": entry.get("sha256")}
+        for url, entry in sorted(entries.items())
+        if entry.get("path") and os.path.exists(entry["path"])
+    ]
+
+
+@lru_cache(maxsize=8)
+def _splitter(chunk_size:int, chunk_overlap:int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
+
+
+def _page_count(path:str) -> int:
+    with pymupdf.open(path) as pdf:
+        return pdf.page_count
+
+
+def _chunk_pages(source:dict, first_page:int, last_page:int, chunk_size:int, chunk_overlap:int) -> list[tuple[str, dict]]:
+    """
+    Worker task: extracts pages [first_page, last_page) of one PDF and chunks each page.
+
+    Runs in a child process and returns plain (text, metadata) pairs, which pickle cheaply.
+    """
+    plan, state, _ = parse_plan_key(source["plan_key"])
+    splitter = _splitter(chunk_size, chunk_overlap)
+    chunks = []
+    with pymupdf.open(source["path"]) as pdf:
+        for number in range(first_page, last_page):
+            text = pdf[number].get_text("text")
+            if not text.strip():
+                continue
+            for chunk in splitter.create_documents([text]):
+                chunks.append((chunk.page_content, {
+                    "plan": plan,
+                    "state": state,
+                    "plan_key": source["plan_key"],
+                    "category": source["category"],
+                    "page": number + 1,
+                    "start_index": chunk.metadata["start_index"],
+                    "source": source["url"],
+                }))
+    return chunks
+
+
+def iter_documents(
+        sources:Iterable[dict], chunk_size:int=CHUNKING["chunk_size"], chunk_overlap:int=CHUNKING["chunk_overlap"],
+        max_workers:int|None=CHUNKING["max_workers"], pages_per_task:int=CHUNKING["pages_per_task"]
+    ) -> Iterator[Document]:
+    """
+    Streams chunked `Document`s parsed from PDFs on a process pool.
+
+    Each PDF is split into page ranges of `pages_per_task`, so a long policy wording is parsed by
+    several processes at once. At most `2 * max_workers` tasks are in flight, which bounds memory
+    regardless of corpus size; chunks are yielded as their task completes. Metadata carries the
+    `plan`, `state` and `category` fields the query analyzer filters on, plus `plan_key`, `page`
+    (1-based), `start_index` within the page and the `source` URL.
+
+    Args:
+        sources (Iterable[dict]): Documents with `path`, `plan_key`, `category` and `url`, e.g. from `manifest_sources`.
+        chunk_size (int): Maximum characters per chunk.
+        chunk_overlap (int): Characters shared by consecutive chunks of a page.
+        max_workers (int, optional): Parser processes. Defaults to the CPU count.
+        pages_per_task (int): Pages per worker task.
+
+    Yields:
+        Document: One chunk with its metadata.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    tasks = (
+        (source, first, min(first + pages_per_task, pages))
+        for source in sources
+        for pages in [_page_count(source["path"])]
+        for first in range(0, pages, pages_per_task)
+    )
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for source, first, last in tasks:
+            pending.add(executor.submit(_chunk_pages, source, first, last, chunk_size, chunk_overlap))
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for text, metadata in future.result():
+                        yield Document(page_content=text, metadata=metadata)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for text, metadata in future.result():
+                    yield Document(page_content=text, metadata=metadata)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse downloaded PDFs into chunked documents (JSON lines).")
+    parser.add_argument("--manifest", default=DOWNLOADER["manifest_path"], help="Downloader manifest.")
+    parser.add_argument("--output", default="artifact/chunks.jsonl", help="Output JSON lines file.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNKING["chunk_size"])
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNKING["chunk_overlap"])
+    parser.add_argument("--workers", type=int, default=CHUNKING["max_workers"])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sources = manifest_sources(args.manifest)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    count = 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        for doc in iter_documents(sources, args.chunk_size, args.chunk_overlap, args.workers):
+            f.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False) + "\n")
+            count += 1
+    logging.info(f"Wrote {count} chunks from {len(sources)} documents to {args.output} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,165 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+import numpy as np
+
+from src.rag_component.numpy_store import NumpyVectorStore, staged_index
+
+from logger.custom_logger import CustomLogger
+
+from typing import Any
+import json, os
+
+logging = CustomLogger().get_logger(__file__)
+
+QUANTIZATIONS = ("float16", "int8")
+
+
+class ReadOnlyIndexError(TypeError):
+    """Raised when a memory-mapped index is asked to add, delete or save documents."""
+
+
+def quantize(matrix:np.ndarray, quantization:str="int8") -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Quantizes a matrix of L2-normalized embeddings.
+
+    int8 uses symmetric per-row scaling (`row ~= codes * scale`); float16 is a plain cast.
+
+    Args:
+        matrix (np.ndarray): float32 embeddings, one row per document.
+        quantization (str): Either "int8" or "float16". Defaults to "int8".
+
+    Returns:
+        tuple[np.ndarray, np.ndarray | None]: The quantized codes and the per-row scales (None for float16).
+    """
+    if quantization == "float16":
+        return matrix.astype(np.float16), None
+    if quantization != "int8":
+        raise ValueError(f"Unsupported quantization: {quantization}. Must be one of {QUANTIZATIONS}.")
+
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def write_quantized(path:str, quantization:str="int8"):
+    """
+    Adds the quantized copy (`quantized.npy`, plus `scales.npy` for int8) to an index saved by
+    `NumpyVectorStore.save`, swapping the files in atomically like `save` does.
+
+    Args:
+        path (str): Index directory.
+        quantization (str): Either "int8" or "float16". Defaults to "int8".
+    """
+    matrix = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+    codes, scales = quantize(np.asarray(matrix, dtype=np.float32), quantization)
+    with staged_index(path) as staging:
+        np.save(os.path.join(staging, "quantized.npy"), codes)
+        if scales is not None:
+            np.save(os.path.join(staging, "scales.npy"), scales)
+    logging.info(f"Wrote {quantization} quantized index with {len(codes)} rows to {path}")
+
+
+class MmapVectorStore(NumpyVectorStore):
+    """
+    Read-only vector store that memory-maps a persisted index so worker processes share it through
+    the page cache.
+
+    Search scans the compact quantized matrix, keeps `k * rescore_factor` candidates and rescores
+    them against the float32 rows, so only the candidate rows of the full-precision file are read.
+    """
+
+    scan_block_rows = 4096
+
+    def __init__(self, embedding:Embeddings, rescore_factor:int=4):
+        super().__init__(embedding)
+        self.rescore_factor = rescore_factor
+        self._codes = None
+        self._scales = None
+        self._offsets = None
+        self._blob = None
+
+    @classmethod
+    def load(cls, path:str, embedding:Embeddings, rescore_factor:int=4) -> "MmapVectorStore":
+        """
+        Opens an index written by `NumpyVectorStore.save` and `write_quantized`.
+
+        Args:
+            path (str): Index directory.
+            embedding (Embeddings): Embeddings client used for queries.
+            rescore_factor (int): Candidate multiplier for full-precision rescoring. Defaults to 4.
+
+        Returns:
+            MmapVectorStore: The memory-mapped store.
+
+        Raises:
+            ValueError: If the files belong to different versions, i.e. the index was swapped mid-load.
+        """
+        store = cls(embedding, rescore_factor=rescore_factor)
+        store._matrix = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        store._codes = np.load(os.path.join(path, "quantized.npy"), mmap_mode="r")
+        if os.path.exists(os.path.join(path, "scales.npy")):
+            store._scales = np.load(os.path.join(path, "scales.npy"))
+        store._offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        store._blob = np.memmap(os.path.join(path, "texts.bin"), dtype=np.uint8, mode="r") \
+            if os.path.getsize(os.path.join(path, "texts.bin")) else np.zeros(0, dtype=np.uint8)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            payload = json.load(f)
+        store._ids = payload["ids"]
+        store._columns = payload["columns"]
+        store._size = len(store._ids)
+        if not len(store._matrix) == len(store._codes) == len(store._offsets) - 1 == store._size:
+            raise ValueError(f"Index files in {path} are from different versions, it is being rewritten")
+        return store
+
+    def _approximate_scores(self, query:np.ndarray) -> np.ndarray:
+        # Scan in blocks so the float32 upcast never materializes the whole matrix at once
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, self.scan_block_rows):
+            end = min(start + self.scan_block_rows, self._size)
+            scores[start:end] = self._codes[start:end].astype(np.float32) @ query
+        if self._scales is not None:
+            scores *= self._scales
+        return scores
+
+    def similarity_search_with_score_by_vector(
+            self, embedding:list[float], k:int=4, filter:dict[str, Any]|None=None
+        ) -> list[tuple[Document, float]]:
+        query = self._normalize(embedding)[0]
+        if self._size == 0:
+            return []
+
+        scores = self._approximate_scores(query)
+        if filter:
+            scores = np.where(self._filter_mask(filter), scores, -np.inf)
+
+        candidates = min(k * self.rescore_factor, self._size)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = np.sort(top[np.isfinite(scores[top])])
+        if len(top) == 0:
+            return []
+
+        exact = np.asarray(self._matrix[top], dtype=np.float32) @ query
+        order = np.argsort(-exact)[:k]
+        return [(self._document(int(top[i])), float(exact[i])) for i in order]
+
+    def _document(self, row:int) -> Document:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return Document(
+            id=self._ids[row],
+            page_content=bytes(self._blob[start:end]).decode("utf-8"),
+            metadata={key: column[row] for key, column in self._columns.items() if column[row] is not None},
+        )
+
+    def add_texts(self, *args, **kwargs):
+        raise ReadOnlyIndexError("MmapVectorStore is read-only; ingest through LocalIndex instead.")
+
+    def add_embeddings(self, *args, **kwargs):
+        raise ReadOnlyIndexError("MmapVectorStore is read-only; ingest through LocalIndex instead.")
+
+    def delete(self, *args, **kwargs):
+        raise ReadOnlyIndexError("MmapVectorStore is read-only; ingest through LocalIndex instead.")
+
+    def save(self, path:str):
+        raise ReadOnlyIndexError("MmapVectorStore is read-only; ingest through LocalIndex instead.")
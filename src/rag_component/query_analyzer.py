@@ -0,0 +1,149 @@
+from src.rag_component import DATASET
+
+from logger.custom_logger import CustomLogger
+
+from functools import lru_cache
+import json, re
+
+logging = CustomLogger().get_logger(__file__)
+
+# Phrases users type for each document category of the statewise catalog
+CATEGORY_ALIASES = {
+    "Brochure": ["brochure", "brochures", "prospectus", "leaflet"],
+    "Customer Information Sheet": ["customer information sheet", "cis", "information sheet"],
+    "Policy Wordings": ["policy wordings", "policy wording", "wordings", "wording", "policy document"],
+    "Proposal Form": ["proposal form", "proposal forms", "proposal", "application form"],
+}
+
+# Upper-case abbreviations, matched case-sensitively so words like "up" or "mp3" do not trigger them
+STATE_ABBREVIATIONS = {
+    "AP": "Andhra Pradesh", "UP": "Uttar Pradesh", "MP": "Madhya Pradesh", "HP": "Himachal Pradesh",
+    "TN": "Tamil Nadu", "WB": "West Bengal", "J&K": "Jammu & Kashmir", "JK": "Jammu & Kashmir",
+}
+
+
+def parse_plan_key(plan_key:str) -> tuple[str, str, list[str]]:
+    """
+    Splits a statewise catalog key into plan name, state group and individual state names.
+
+    Example:
+        "Ningalkkayi- Kerala (incl. Lakshadweep)" -> ("Ningalkkayi", "Kerala (incl. Lakshadweep)", ["Kerala", "Lakshadweep"])
+
+    Args:
+        plan_key (str): A key of the `data` mapping in the statewise JSON.
+
+    Returns:
+        tuple[str, str, list[str]]: The plan name, the state group and the states it covers.
+    """
+    plan, _, state_group = plan_key.partition("-")
+    plan, state_group = plan.strip(), state_group.strip()
+
+    states = []
+    included = re.findall(r"\(incl\.\s*([^)]*)\)", state_group)
+    for part in re.split(r"&|,", re.sub(r"\(incl\.[^)]*\)", "", state_group)) + included:
+        part = part.strip()
+        if part:
+            states.append(part)
+    return plan, state_group, states
+
+
+def load_catalog(dataset_path:str=DATASET) -> dict[str, dict[str, list[str]]]:
+    """Loads the `data` mapping (plan key -> category -> URLs) of the statewise JSON."""
+    with open(dataset_path, encoding="utf-8") as f:
+        return json.load(f)["data"]
+
+
+class QueryAnalyzer:
+    """
+    Extracts plan, state and document category mentions from a query.
+
+    The lookup is built once from the statewise JSON and compiled into a single regular
+    expression, so analysing a query is one regex scan.
+    """
+
+    def __init__(self, catalog:dict[str, dict[str, list[str]]]):
+        self.plan_keys = list(catalog)
+        self.plan_of: dict[str, str] = {}
+        self.state_of: dict[str, str] = {}
+        self._aliases: dict[str, tuple[str, str]] = {}
+
+        for plan_key in self.plan_keys:
+            plan, state_group, states = parse_plan_key(plan_key)
+            self.plan_of[plan_key] = plan
+            self.state_of[plan_key] = state_group
+            self._aliases.setdefault(plan.lower(), ("plan", plan))
+            self._aliases.setdefault(state_group.lower(), ("state", state_group))
+            for state in states:
+                self._aliases.setdefault(state.lower(), ("state", state))
+
+        for category, aliases in CATEGORY_ALIASES.items():
+            for alias in aliases:
+                self._aliases.setdefault(alias, ("category", category))
+
+        alternatives = sorted(self._aliases, key=len, reverse=True)
+        self._pattern = re.compile(r"(?<!\w)(" + "|".join(map(re.escape, alternatives)) + r")(?!\w)")
+        self._abbreviations = re.compile(
+            r"(?<![\w&])(" + "|".join(map(re.escape, STATE_ABBREVIATIONS)) + r")(?![\w&])"
+        )
+
+    def analyze(self, query:str) -> dict[str, list[str]]:
+        """
+        Finds the plan keys, plan names, state groups and categories mentioned in a query.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            dict[str, list[str]]: `plan_keys` (catalog rows matching every plan/state mention), `plans`, `states` and `categories`.
+        """
+        plans, states, categories = set(), set(), set()
+        for match in self._pattern.finditer(re.sub(r"\s+", " ", query.lower())):
+            kind, value = self._aliases[match.group(1)]
+            {"plan": plans, "state": states, "category": categories}[kind].add(value)
+        for match in self._abbreviations.finditer(query):
+            states.add(STATE_ABBREVIATIONS[match.group(1)])
+
+        plan_keys = []
+        if plans or states:
+            plan_keys = [
+                plan_key for plan_key in self.plan_keys
+                if (not plans or self.plan_of[plan_key] in plans)
+                and (not states or any(state in self.state_of[plan_key] for state in states))
+            ]
+
+        return {
+            "plan_keys": plan_keys,
+            "plans": sorted(plans),
+            "states": sorted({self.state_of[plan_key] for plan_key in plan_keys}),
+            "categories": sorted(categories),
+        }
+
+    def to_filter(self, query:str) -> dict | None:
+        """
+        Builds a vector store metadata filter on the `plan`, `state` and `category` fields.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            dict | None: The metadata filter, or None when the query mentions nothing from the catalog.
+        """
+        analysis = self.analyze(query)
+        filter = {}
+        if analysis["plan_keys"]:
+            plans = sorted({self.plan_of[plan_key] for plan_key in analysis["plan_keys"]})
+            filter["plan"] = plans[0] if len(plans) == 1 else {"$in": plans}
+            filter["state"] = analysis["states"][0] if len(analysis["states"]) == 1 else {"$in": analysis["states"]}
+        if analysis["categories"]:
+            categories = analysis["categories"]
+            filter["category"] = categories[0] if len(categories) == 1 else {"$in": categories}
+
+        if filter:
+            logging.info("Query analyzer derived metadata filter: %s", filter)
+        return filter or None
+
+
+@lru_cache(maxsize=1)
+def get_query_analyzer() -> QueryAnalyzer:
+    """Returns the process-wide query analyzer built from the statewise dataset."""
+    return QueryAnalyzer(load_catalog())
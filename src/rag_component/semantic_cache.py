@@ -0,0 +1,183 @@
+import numpy as np
+
+from src.rag_component import SEMANTIC_CACHE
+
+from logger.custom_logger import CustomLogger
+
+import json, os, threading, time
+
+logging = CustomLogger().get_logger(__file__)
+
+
+def collection_version(version_file:str) -> int:
+    """Returns the current collection version, i.e. the modification time of the version marker file."""
+    try:
+        return os.stat(version_file).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def mark_collection_updated(version_file:str):
+    """Touches the version marker file so every process drops answers cached before a re-ingestion."""
+    os.makedirs(os.path.dirname(version_file) or ".", exist_ok=True)
+    with open(version_file, "w") as f:
+        f.write(str(time.time()))
+
+
+class SemanticCache:
+    """
+    Bounded cache of answered queries, looked up by cosine similarity of the query embedding.
+
+    Embeddings are kept L2-normalized in a preallocated float32 matrix so a lookup is a single
+    matrix-vector product. When full, the least recently used entry is overwritten.
+
+    Queries about different plans or states can embed almost identically ("sum insured of plan A
+    in Kerala" vs "... in Goa"), so each entry also keeps the entities extracted from its query
+    and only entries with exactly the same entities can be hits.
+    """
+
+    def __init__(
+            self, threshold:float=0.92, max_size:int=1024, ttl_seconds:float=3600,
+            version_file:str|None=None
+        ):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity for a cached answer to be reused. Defaults to 0.92.
+            max_size (int): Maximum number of cached answers. Defaults to 1024.
+            ttl_seconds (float): Lifetime of a cached answer, 0 disables expiry. Defaults to 3600.
+            version_file (str, optional): Collection version marker shared with ingestion. Defaults to None.
+        """
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.version_file = version_file
+        self._lock = threading.Lock()
+        self._reset()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def _reset(self):
+        self._matrix = None
+        self._entries: list[dict] = []
+        self._created_at = np.zeros(self.max_size, dtype=np.float64)
+        self._last_used = np.zeros(self.max_size, dtype=np.float64)
+        self._entity_keys = np.empty(self.max_size, dtype=object)
+        self._version = collection_version(self.version_file) if self.version_file else 0
+
+    def _check_version(self):
+        if self.version_file:
+            version = collection_version(self.version_file)
+            if version != self._version:
+                logging.info("Collection re-ingested, invalidating semantic cache")
+                self._reset()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _entity_key(entities:dict|None) -> str:
+        return json.dumps(entities or {}, sort_keys=True)
+
+    def lookup(self, embedding, entities:dict|None=None) -> dict | None:
+        """
+        Returns the cached entry closest to `embedding` if it is within the similarity threshold.
+
+        Args:
+            embedding (list[float]): The query embedding.
+            entities (dict, optional): Plans, states and categories mentioned in the query; only entries stored with the same entities match.
+
+        Returns:
+            dict | None: The cached entry with `query`, `answer`, `context`, `entities`, `latency` and `similarity`, or None.
+        """
+        vector = self._normalize(embedding)
+        key = self._entity_key(entities)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            size = len(self._entries)
+            if size == 0:
+                self.misses += 1
+                return None
+
+            scores = self._matrix[:size] @ vector
+            scores[self._entity_keys[:size] != key] = -np.inf
+            if self.ttl_seconds:
+                scores[now - self._created_at[:size] > self.ttl_seconds] = -np.inf
+
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._last_used[best] = now
+            entry = self._entries[best]
+            self.hits += 1
+            self.saved_seconds += entry["latency"]
+            return {**entry, "similarity": float(scores[best])}
+
+    def store(self, embedding, query:str, answer:str, context:str, latency:float=0.0, entities:dict|None=None):
+        """
+        Caches an answer for the query embedding.
+
+        Args:
+            embedding (list[float]): The query embedding.
+            query (str): The original query.
+            answer (str): The generated answer.
+            context (str): The retrieved context the answer was generated from.
+            latency (float): Seconds spent producing the answer, credited on every later hit.
+            entities (dict, optional): Plans, states and categories mentioned in the query, see `lookup`.
+        """
+        vector = self._normalize(embedding)
+        now = time.time()
+        entry = {"query": query, "answer": answer, "context": context, "entities": entities or {}, "latency": latency}
+        with self._lock:
+            self._check_version()
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+
+            size = len(self._entries)
+            if size < self.max_size:
+                row = size
+                self._entries.append(entry)
+            else:
+                row = int(np.argmin(self._last_used))
+                self._entries[row] = entry
+
+            self._matrix[row] = vector
+            self._entity_keys[row] = self._entity_key(entities)
+            self._created_at[row] = now
+            self._last_used[row] = now
+
+    def invalidate(self):
+        """Drops every cached answer, e.g. after the collection was re-ingested in this process."""
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> dict:
+        """Returns hit rate and the generation latency saved by cache hits."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "size": len(self._entries),
+        }
+
+
+_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE["threshold"],
+    max_size=SEMANTIC_CACHE["max_size"],
+    ttl_seconds=SEMANTIC_CACHE["ttl_seconds"],
+    version_file=SEMANTIC_CACHE["version_file"],
+) if SEMANTIC_CACHE["enabled"] else None
+
+
+def get_semantic_cache() -> SemanticCache | None:
+    """Returns the process-wide semantic answer cache, or None when it is disabled in config.yaml."""
+    return _cache
@@ -1,6 +1,6 @@
 import streamlit as st, logging, time, base64
 from PIL import Image, ImageEnhance
-from src.agent_component.graph_builder import build_insurance_agent_graph 
+from streamlit_app.chat_session import initialize_session_state, load_insurance_agent, stream_message
 from streamlit_pills import pills
 
 # Configure logging
@@ -90,67 +90,6 @@ def load_and_enhance_image(image_path, enhance=False):
     return img
 
 
-@st.cache_data(show_spinner=False)
-def on_chat_submit(chat_input):
-    """
-    Handle chat input submissions and interact with the OpenAI API.
-
-    Parameters:
-    - chat_input (str): The chat input from the user.
-
-    Returns:
-    - None: Updates the chat history in Streamlit's session state.
-    """
-    user_input = chat_input.strip().lower()
-
-    try:
-        agent = build_insurance_agent_graph()
-        response = agent.invoke(
-            {
-                "query": user_input
-            }
-        )
-        # Here comess assitant code
-        assistant_reply = response["messages"][-1].content
-
-        st.session_state.history.append({"role": "user", "content": user_input})
-        st.session_state.history.append({"role": "assistant", "content": assistant_reply})
-
-        return assistant_reply
-    except Exception as e:
-        logging.error(f"Error occurred: {e}")
-        st.error(f"Error occurred: {str(e)}")
-
-
-
-def initialize_session_state():
-    """Initialize session state variables."""
-    if "history" not in st.session_state:
-        st.session_state.history = []
-    if "finance_agent" not in st.session_state:
-        st.session_state.finance_agent = build_insurance_agent_graph()
-    if "chat_input" not in st.session_state:
-        st.session_state.chat_input = ""
-
-
-
-def stream_message():
-    
-    for message , metadata in st.session_state.finance_agent.stream(
-        {
-            "query":st.session_state.chat_input
-        },
-        stream_mode="messages"
-        
-    ):
-        if metadata['langgraph_step'] == 1 and message.content != "":
-            yield message.content
-
-        if metadata['langgraph_step'] != 1 and metadata['langgraph_node'] == "reasoner":
-            yield message.content
-    
-                
-
 def main():
     """
     Display Streamlit updates and handle the chat interface.
@@ -268,6 +207,8 @@ def main():
 
 
     initialize_session_state()
+    # Cached per process: only the first session builds the graph, behind the loading spinner
+    load_insurance_agent()
 
     if not st.session_state.history:
         initial_bot_message = "Hello! I am Finance Assistant. How can I assist you with finance today?"
@@ -317,7 +258,10 @@ def main():
         
         try:
             with st.chat_message("assistant", avatar=ASSISTANT_ICON):
-                assistant_reply = st.write_stream(stream_message)
+                placeholder = st.empty()
+                assistant_reply = ""
+                for assistant_reply in stream_message():
+                    placeholder.markdown(assistant_reply)
             
             st.session_state.history.append(
                 {
@@ -1,7 +1,8 @@
 import streamlit as st, logging, time, base64
 from PIL import Image, ImageEnhance
-from src.agent_component.graph_builder import build_insurance_agent_graph 
+from streamlit_app.chat_session import initialize_session_state, load_insurance_agent, stream_message
 from streamlit_pills import pills
+from src.rag_component import QUICK_QUERIES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,23 +17,7 @@ st.set_page_config(
 NUMBER_OF_MESSAGES_TO_DISPLAY = 20
 USER_ICON = "static/img/stuser.png"
 ASSISTANT_ICON = "static/img/stassisstant.png"
-TEMPLATES = [
-    "What is the Aapke Liye health insurance plan for my state?",
-    "Show me the Mee Kosam plan brochure and policy details for Andhra Pradesh",
-    "What documents do I need for Nimagagi health insurance proposal in Karnataka?",
-    "How do I download the policy wordings for Aponar Babe plan in Assam?",
-    "What are the benefits covered under Tuhade Lai Punjab health plan?",
-    "Compare Aapke Liye plans for Uttar Pradesh vs Madhya Pradesh",
-    "Where can I find the Customer Information Sheet for my regional plan?",
-    "What is the difference between brochure and prospectus documents?",
-    "How to fill the digital proposal form for Ungalukkaga Tamil Nadu plan?",
-    "Show me all available documents for Ningalkkayi Kerala health insurance",
-    "What regional language options are available for insurance documents?",
-    "Explain the Tujya Khatir Goa plan coverage and exclusions",
-    "How do I get the policy wordings in my local language?",
-    "What is covered under Adomgidamak Manipur health insurance plan?",
-    "Where can I download the latest proposal form for my state plan?"
-]
+TEMPLATES = QUICK_QUERIES
 
 st.markdown("""
     <style>
@@ -68,6 +53,7 @@ st.title("🛡️ Bajaj Allianz Insurance AI Assistant")
 st.header("🏥 Get instant help with health insurance 💼, claims guidance 📋, and policy information 📑")
 
 
+@st.cache_data(show_spinner=False)
 def img_to_base64(image_path):
     """Convert image to base64."""
     try:
@@ -110,64 +96,6 @@ def load_and_enhance_image(image_path, enhance=False):
     return img
 
 
-@st.cache_data(show_spinner=False)
-def on_chat_submit(chat_input):
-    """
-    Handle chat input submissions and interact with the Insurance AI Agent.
-
-    Parameters:
-    - chat_input (str): The chat input from the user.
-
-    Returns:
-    - None: Updates the chat history in Streamlit's session state.
-    """
-    user_input = chat_input.strip()
-
-    try:
-        agent = build_insurance_agent_graph()
-        response = agent.invoke(
-            {
-                "query": user_input
-            }
-        )
-        # Here comes insurance assistant code
-        assistant_reply = response["messages"][-1].content
-
-        st.session_state.history.append({"role": "user", "content": user_input})
-        st.session_state.history.append({"role": "assistant", "content": assistant_reply})
-
-        return assistant_reply
-    except Exception as e:
-        logging.error(f"Error occurred: {e}")
-        st.error(f"Error occurred: {str(e)}")
-
-
-
-def initialize_session_state():
-    """Initialize session state variables."""
-    if "history" not in st.session_state:
-        st.session_state.history = []
-    if "insurance_agent" not in st.session_state:
-        st.session_state.insurance_agent = build_insurance_agent_graph()
-    if "chat_input" not in st.session_state:
-        st.session_state.chat_input = ""
-
-
-
-def stream_message():
-    
-    for message , metadata in st.session_state.insurance_agent.stream(
-        {
-            "query":st.session_state.chat_input
-        },
-        stream_mode="messages"
-        
-    ):
-        if metadata['langgraph_node'] == "insurance_agent":
-            yield message.content
-    
-                
-
 def main():
     """
     Display Streamlit updates and handle the chat interface for Bajaj Allianz Insurance.
@@ -301,6 +229,8 @@ def main():
 
 
     initialize_session_state()
+    # Cached per process: only the first session builds the graph, behind the loading spinner
+    load_insurance_agent()
 
     if not st.session_state.history:
         initial_bot_message = "Hello! I am your Bajaj Allianz Insurance Assistant. How can I help you with your insurance needs today? 🛡️"
@@ -318,7 +248,7 @@ def main():
     chat_in = st.chat_input("Ask me about Bajaj Allianz insurance plans, claims, or any insurance-related questions")
 
     # Display chat history
-    for msg in st.session_state.history:
+    for msg in st.session_state.history[-NUMBER_OF_MESSAGES_TO_DISPLAY:]:
         avatar = ASSISTANT_ICON if msg["role"]=="assistant" else USER_ICON
         with st.chat_message(msg["role"], avatar=avatar):
             st.write(msg["content"])
@@ -350,7 +280,10 @@ def main():
         
         try:
             with st.chat_message("assistant", avatar=ASSISTANT_ICON):
-                assistant_reply = st.write_stream(stream_message)
+                placeholder = st.empty()
+                assistant_reply = ""
+                for assistant_reply in stream_message():
+                    placeholder.markdown(assistant_reply)
             
             st.session_state.history.append(
                 {
@@ -0,0 +1,88 @@
+"""
+Agent session helpers shared by the Streamlit apps: the process-wide agent graph, per-session
+state and answer streaming.
+"""
+import streamlit as st, logging
+from src.agent_component.graph_builder import get_insurance_agent_graph
+
+
+@st.cache_resource(show_spinner="Loading the insurance assistant...")
+def load_insurance_agent():
+    """
+    Returns the compiled insurance agent graph, shared by every session of this server process.
+
+    The graph holds the vector store, embedding and LLM clients, so caching it as a resource keeps
+    one copy per process instead of one per browser tab. A failed build raises, so it is not cached.
+    """
+    agent = get_insurance_agent_graph()
+    if agent is None:
+        raise RuntimeError("Failed to build insurance agent graph")
+    return agent
+
+
+def on_chat_submit(chat_input):
+    """
+    Handle chat input submissions and interact with the Insurance AI Agent.
+
+    Parameters:
+    - chat_input (str): The chat input from the user.
+
+    Returns:
+    - None: Updates the chat history in Streamlit's session state.
+    """
+    user_input = chat_input.strip()
+
+    try:
+        agent = load_insurance_agent()
+        response = agent.invoke(
+            {
+                "query": user_input
+            }
+        )
+        # Here comes insurance assistant code
+        answer = response.get("answer", "")
+        assistant_reply = answer.content if hasattr(answer, "content") else answer
+
+        st.session_state.history.append({"role": "user", "content": user_input})
+        st.session_state.history.append({"role": "assistant", "content": assistant_reply})
+
+        return assistant_reply
+    except Exception as e:
+        logging.error(f"Error occurred: {e}")
+        st.error(f"Error occurred: {str(e)}")
+
+
+def initialize_session_state():
+    """Initialize per-user session state; the agent itself is shared through `load_insurance_agent`."""
+    if "history" not in st.session_state:
+        st.session_state.history = []
+    if "chat_input" not in st.session_state:
+        st.session_state.chat_input = ""
+
+
+def stream_message():
+    """Yields the answer streamed so far, starting over when the model streaming it fails and the next model takes over."""
+    answer = ""
+    message_id = None
+    for mode, chunk in load_insurance_agent().stream(
+        {
+            "query":st.session_state.chat_input
+        },
+        stream_mode=["messages", "updates"]
+    ):
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata['langgraph_node'] == "insurance_agent" and message.content:
+                # A new message id means the next model's answer replaces a failed partial one
+                if message_id != message.id:
+                    answer = ""
+                message_id = message.id
+                answer += message.content
+                yield answer
+
+        # Answers served from the catalog or the semantic cache never reach the LLM, so they arrive as a state update
+        else:
+            for node in ("catalog_lookup", "semantic_cache_lookup"):
+                if (chunk.get(node) or {}).get("answer"):
+                    answer = chunk[node]["answer"]
+                    yield answer
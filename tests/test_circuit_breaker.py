@@ -0,0 +1,77 @@
+"""
+Tests of the per-model circuit breaker's probe accounting and of breakers built from `Agents` settings.
+
+Run with `python -m unittest discover tests`.
+"""
+from src.agent_component import CIRCUIT_BREAKER
+from src.agent_component.agent import Agents
+from src.agent_component.circuit_breaker import HALF_OPEN, CircuitBreaker, get_circuit_breaker
+
+import unittest
+
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("model", consecutive_failures=1, open_seconds=0, half_open_max_calls=1)
+    breaker.record_failure(0.0, "injected")
+    assert breaker.state == HALF_OPEN
+    return breaker
+
+
+class ReleaseOnlyFreesProbes(unittest.TestCase):
+
+    def test_closed_call_releases_no_probe_slot(self):
+        breaker = CircuitBreaker("model", consecutive_failures=1, open_seconds=0, half_open_max_calls=1)
+        closed_call = breaker.allow()
+        breaker.record_failure(0.0, "injected")
+        probe = breaker.allow()
+        self.assertIsNotNone(probe)
+
+        # The call admitted while closed is abandoned; the probe it did not hold must stay taken
+        breaker.release(closed_call)
+        self.assertIsNone(breaker.allow())
+        breaker.release(probe)
+        self.assertIsNotNone(breaker.allow())
+
+    def test_probe_of_an_earlier_period_releases_nothing(self):
+        breaker = half_open_breaker()
+        stale_probe = breaker.allow()
+        breaker.record_failure(0.0, "injected")
+        current_probe = breaker.allow()
+        self.assertIsNotNone(current_probe)
+
+        breaker.release(stale_probe)
+        self.assertIsNone(breaker.allow())
+
+    def test_release_is_idempotent(self):
+        breaker = CircuitBreaker("model", consecutive_failures=1, open_seconds=0, half_open_max_calls=2)
+        breaker.record_failure(0.0, "injected")
+        probe, other = breaker.allow(), breaker.allow()
+        breaker.release(probe)
+        breaker.release(probe)
+        self.assertIsNotNone(breaker.allow())
+        self.assertIsNone(breaker.allow())
+        self.assertIsNotNone(other)
+
+
+class AgentsHonourBreakerSettings(unittest.TestCase):
+
+    def agent(self, circuit_breaker:dict) -> Agents:
+        return Agents(llm_models=["settings-model"], vector_db=object(), semantic_cache=None, circuit_breaker=circuit_breaker)
+
+    def test_config_settings_share_the_process_wide_breaker(self):
+        self.assertIs(self.agent(CIRCUIT_BREAKER).breaker("settings-model"), get_circuit_breaker("settings-model"))
+
+    def test_injected_settings_build_breakers_of_their_own(self):
+        agent = self.agent({**CIRCUIT_BREAKER, "consecutive_failures": 1, "open_seconds": 60})
+        breaker = agent.breaker("settings-model")
+        self.assertIsNot(breaker, get_circuit_breaker("settings-model"))
+        self.assertIs(agent.breaker("settings-model"), breaker)
+        breaker.record_failure(0.0, "injected")
+        self.assertEqual(agent.model_health()["settings-model"]["state"], "open")
+
+    def test_disabled(self):
+        self.assertIsNone(self.agent({**CIRCUIT_BREAKER, "enabled": False}).breaker("settings-model"))
+
+
+if __name__ == "__main__":
+    unittest.main()
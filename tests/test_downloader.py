@@ -0,0 +1,142 @@
+"""
+Tests of `PDFDownloader` against a local HTTP stand-in for the document server.
+
+Run with `python -m unittest discover tests`.
+"""
+from src.rag_component.downloader import PDFDownloader
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib, os, shutil, tempfile, threading, unittest
+
+DOCUMENT = bytes(range(256)) * 1024
+ETAG = '"doc-v1"'
+
+
+class DocumentServer(ThreadingHTTPServer):
+    """
+    Serves `DOCUMENT` under a few scripted paths:
+
+    - `/flaky.pdf` answers 503 to its first request, then the document.
+    - `/missing.pdf` always answers 404.
+    - `/unavailable.pdf` always answers 503.
+    - `/interrupted.pdf` drops the connection halfway through its first body, then honours `Range`.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), DocumentHandler)
+        self.requests = Counter()
+        self.range_headers = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class DocumentHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests[self.path] += 1
+        attempt = self.server.requests[self.path]
+
+        if self.path == "/missing.pdf":
+            return self.send_error(404)
+        if self.path == "/unavailable.pdf":
+            return self.send_error(503)
+        if self.path == "/flaky.pdf" and attempt == 1:
+            return self.send_error(503)
+        if self.path == "/interrupted.pdf" and attempt == 1:
+            self.send_document(200, DOCUMENT)
+            self.wfile.write(DOCUMENT[:len(DOCUMENT) // 2])
+            self.close_connection = True
+            return
+
+        requested = self.headers.get("Range")
+        if requested and self.headers.get("If-Range") == ETAG:
+            self.server.range_headers.append(requested)
+            offset = int(requested.removeprefix("bytes=").rstrip("-"))
+            self.send_document(206, DOCUMENT[offset:], content_range=f"bytes {offset}-{len(DOCUMENT) - 1}/{len(DOCUMENT)}")
+            self.wfile.write(DOCUMENT[offset:])
+            return
+        self.send_document(200, DOCUMENT)
+        self.wfile.write(DOCUMENT)
+
+    def send_document(self, status:int, body:bytes, content_range:str|None=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(DOCUMENT) if status == 200 else len(body)))
+        self.send_header("ETag", ETAG)
+        if content_range:
+            self.send_header("Content-Range", content_range)
+        self.end_headers()
+
+
+class DownloaderAgainstLocalServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = DocumentServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.server.range_headers.clear()
+        self.directory = tempfile.mkdtemp()
+        self.downloader = PDFDownloader(
+            download_dir=self.directory, manifest_path=os.path.join(self.directory, "manifest.json"),
+            max_workers=2, timeout=5, max_retries=3,
+        )
+
+    def tearDown(self):
+        self.downloader.session.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def download(self, name:str) -> dict:
+        return self.downloader.download("Test Plan", "Brochure", f"{self.server.base_url}/{name}")
+
+    def assert_document(self, result:dict):
+        with open(result["path"], "rb") as f:
+            self.assertEqual(hashlib.sha256(f.read()).hexdigest(), hashlib.sha256(DOCUMENT).hexdigest())
+        self.assertEqual(self.downloader.manifest.get(result["url"])["sha256"], hashlib.sha256(DOCUMENT).hexdigest())
+
+    def test_server_error_is_retried(self):
+        result = self.download("flaky.pdf")
+        self.assertEqual(result["status"], "downloaded")
+        self.assertEqual(self.server.requests["/flaky.pdf"], 2)
+        self.assert_document(result)
+
+    def test_server_errors_are_retried_by_the_downloader_only(self):
+        self.downloader.max_retries = 2
+        result = self.download("unavailable.pdf")
+        self.assertEqual(result["status"], "failed")
+        # One request per downloader attempt; the session's adapter does not retry on top of them
+        self.assertEqual(self.server.requests["/unavailable.pdf"], self.downloader.max_retries)
+
+    def test_not_found_fails_without_retrying(self):
+        result = self.download("missing.pdf")
+        self.assertEqual(result["status"], "failed")
+        self.assertIsNone(result["path"])
+        self.assertEqual(self.server.requests["/missing.pdf"], 1)
+
+    def test_interrupted_download_resumes_from_the_partial_file(self):
+        result = self.download("interrupted.pdf")
+        self.assertEqual(result["status"], "resumed")
+        self.assertEqual(self.server.requests["/interrupted.pdf"], 2)
+        self.assertEqual(len(self.server.range_headers), 1)
+        self.assertGreater(int(self.server.range_headers[0].removeprefix("bytes=").rstrip("-")), 0)
+        # Only the remainder was transferred on the resuming request
+        self.assertLess(result["bytes"], len(DOCUMENT))
+        self.assert_document(result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Timing tests of hedged model fallback on the offline fake chat models.
+
+Run with `python -m unittest discover tests`.
+"""
+from benchmarks.fakes import FakeLLMRegistry, build_offline_agent
+
+import asyncio, time, unittest
+
+DEADLINE = 0.5
+HEDGING = {"enabled": True, "first_token_deadline": DEADLINE, "max_parallel": 2}
+PROFILES = {"slow": {"latency": 3.0}, "open": {"latency": 0.05}, "fast": {"latency": 0.05}}
+
+
+class HedgingSkipsOpenBreakers(unittest.TestCase):
+    """A model whose breaker is open must not cost the fallback another `first_token_deadline`."""
+
+    def setUp(self):
+        # Circuit breakers are process-wide, so every test gets model names of its own
+        self.models = {role: f"{self.id()}-{role}" for role in PROFILES}
+        registry = FakeLLMRegistry(
+            {"jitter": 0.0, "tokens_per_second": 200, "answer_tokens": 5},
+            {self.models[role]: profile for role, profile in PROFILES.items()},
+        )
+        self.agent = build_offline_agent(registry, hedging=HEDGING, llm_models=list(self.models.values()))
+        breaker = self.agent.breaker(self.models["open"])
+        for _ in range(breaker.consecutive_failures):
+            breaker.record_failure(0.0, "injected")
+        self.assertFalse(breaker.allow())
+
+    def assert_hedged_once(self, response, elapsed:float):
+        self.assertIsNotNone(response)
+        self.assertEqual(self.agent.breaker(self.models["fast"]).snapshot()["calls"], 1)
+        # One deadline to hedge away from the slow model; a second one would mean the open model was waited on
+        self.assertLess(elapsed, 2 * DEADLINE)
+
+    def test_sync(self):
+        start = time.perf_counter()
+        response = self.agent.hedged_response("What does the plan cover?", self.agent.llm_models)
+        self.assert_hedged_once(response, time.perf_counter() - start)
+
+    def test_async(self):
+        start = time.perf_counter()
+        response = asyncio.run(self.agent.ahedged_response("What does the plan cover?", self.agent.llm_models))
+        self.assert_hedged_once(response, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    unittest.main()
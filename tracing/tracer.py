@@ -0,0 +1,394 @@
+"""
+Spans and metrics for the insurance agent pipeline.
+
+Spans nest through context variables, so a span opened in a graph node is the parent of the
+spans opened by the retrieval and model calls it makes, also across the hedging threads and
+asyncio tasks. Finished spans feed Prometheus-style metrics and are exported to a pluggable sink.
+"""
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from src.utils import load_config
+
+from logger.custom_logger import CustomLogger
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Iterator
+import asyncio, json, os, threading, time
+
+logging = CustomLogger().get_logger(__file__)
+
+TRACING = load_config('config/config.yaml')['tracing']
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32)
+
+
+class Span:
+    """One timed operation with attributes, exported in the OpenTelemetry span layout."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_time", "end_time", "attributes", "status", "_start")
+
+    def __init__(self, name:str, parent:"Span|None"=None, attributes:dict|None=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.attributes = dict(attributes or {})
+        self.status = "UNSET"
+        self._start = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end (or to now, while the span is open)."""
+        end = self.end_time if self.end_time is not None else time.time_ns()
+        return (end - self.start_time) / 1e9
+
+    def set_attribute(self, key:str, value:Any):
+        self.attributes[key] = value
+
+    def increment(self, key:str, amount:float=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def elapsed(self) -> float:
+        """Seconds since the span started, on the monotonic clock."""
+        return time.perf_counter() - self._start
+
+    def record_error(self, error:BaseException):
+        self.status = "ERROR"
+        self.attributes.setdefault("error.type", type(error).__name__)
+
+    def to_otel(self) -> dict:
+        return {
+            "name": self.name,
+            "context": {"trace_id": self.trace_id, "span_id": self.span_id},
+            "parent_id": self.parent_id,
+            "start_time_unix_nano": self.start_time,
+            "end_time_unix_nano": self.end_time,
+            "attributes": self.attributes,
+            "status": {"status_code": self.status},
+        }
+
+
+class NoopSpan:
+    """Stand-in returned while tracing is disabled."""
+
+    def set_attribute(self, key:str, value:Any):
+        pass
+
+    def increment(self, key:str, amount:float=1):
+        pass
+
+    def elapsed(self) -> float:
+        return 0.0
+
+    def record_error(self, error:BaseException):
+        pass
+
+
+_NOOP_SPAN = NoopSpan()
+_current: ContextVar[Span|None] = ContextVar("current_span", default=None)
+
+
+class SpanSink:
+    """Destination of finished spans. Subclass and pass to `Tracer.set_sink` to export elsewhere."""
+
+    def export(self, span:Span):
+        raise NotImplementedError
+
+
+class InMemorySink(SpanSink):
+    """Keeps the most recent finished spans in memory, e.g. for tests and benchmarks."""
+
+    def __init__(self, max_spans:int=10000):
+        self.max_spans = max_spans
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span:Span):
+        with self._lock:
+            self.spans.append(span)
+            if len(self.spans) > self.max_spans:
+                del self.spans[:len(self.spans) - self.max_spans]
+
+    def find(self, name:str) -> list[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class LogSink(SpanSink):
+    """Writes spans as JSON lines through the queued logger, so exporting stays off the request path."""
+
+    def __init__(self):
+        self.logger = CustomLogger().get_logger("tracing.spans")
+
+    def export(self, span:Span):
+        self.logger.info("%s", _LazyJson(span))
+
+
+class _LazyJson:
+    # Serialized by the log listener thread, not by the thread that ended the span
+    __slots__ = ("span",)
+
+    def __init__(self, span:Span):
+        self.span = span
+
+    def __str__(self):
+        return json.dumps(self.span.to_otel(), default=str)
+
+
+class Metrics:
+    """Thread-safe counters and histograms keyed by metric name and labels, rendered in the Prometheus text format."""
+
+    def __init__(self, namespace:str="insurance_agent"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, tuple[tuple, dict[tuple, list]]] = {}
+        self._help: dict[str, str] = {}
+
+    def inc(self, name:str, amount:float=1.0, help:str="", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name:str, value:float, buckets:tuple=LATENCY_BUCKETS, help:str="", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help)
+            bounds, series = self._histograms.setdefault(name, (buckets, {}))
+            # [per-bucket counts..., +Inf count, sum]
+            values = series.setdefault(key, [0] * (len(bounds) + 1) + [0.0])
+            values[bisect_left(bounds, value)] += 1
+            values[-1] += value
+
+    @staticmethod
+    def _labels(key:tuple, extra:tuple=()) -> str:
+        pairs = [*key, *extra]
+        if not pairs:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{label}="{value}"' for (label, _), value in zip(pairs, escaped)) + "}"
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.namespace}_{name}"
+                lines += [f"# HELP {metric} {self._help.get(name) or name}", f"# TYPE {metric} counter"]
+                lines += [f"{metric}{self._labels(key)} {value}" for key, value in sorted(series.items())]
+            for name, (bounds, series) in sorted(self._histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                lines += [f"# HELP {metric} {self._help.get(name) or name}", f"# TYPE {metric} histogram"]
+                for key, values in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip([*bounds, "+Inf"], values[:-1]):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{self._labels(key, (('le', bound),))} {cumulative}")
+                    lines.append(f"{metric}_sum{self._labels(key)} {values[-1]}")
+                    lines.append(f"{metric}_count{self._labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+class Tracer:
+    """
+    Creates spans and turns finished ones into metrics.
+
+    - every span: `span_duration_seconds{span}`
+    - `llm.attempt`: `llm_attempts_total{model, outcome}`, `llm_tokens_total{model, type}`,
+      `llm_cost_usd_total{model}` from `pricing`, and `llm_time_to_first_token_seconds{model}`
+    - `llm.generate`: `llm_fallback_attempts` (models tried per answer)
+    - `retrieval.search`: `retrieved_documents`
+    """
+
+    def __init__(self, enabled:bool=True, sink:SpanSink|None=None, pricing:dict|None=None):
+        """
+        Args:
+            enabled (bool): Record spans and metrics. Defaults to True.
+            sink (SpanSink, optional): Where finished spans are exported. Defaults to none.
+            pricing (dict, optional): `{model: [input, output]}` in USD per million tokens.
+        """
+        self.enabled = enabled
+        self.sink = sink
+        self.pricing = pricing or {}
+        self.metrics = Metrics()
+
+    def set_sink(self, sink:SpanSink|None):
+        self.sink = sink
+
+    @staticmethod
+    def current_span() -> Span|NoopSpan:
+        return _current.get() or _NOOP_SPAN
+
+    def set_attribute(self, key:str, value:Any):
+        """Sets an attribute on the innermost open span, if any."""
+        self.current_span().set_attribute(key, value)
+
+    @contextmanager
+    def span(self, name:str, **attributes) -> Iterator[Span|NoopSpan]:
+        """
+        Opens a child of the current span (or a new trace) for the duration of the block.
+
+        An exception leaving the block marks the span as an error with its type and is re-raised.
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        span = Span(name, _current.get(), attributes)
+        token = _current.set(span)
+        try:
+            yield span
+            if span.status == "UNSET":
+                span.status = "OK"
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current.reset(token)
+            self.end(span)
+
+    def end(self, span:Span):
+        span.end_time = time.time_ns()
+        try:
+            self._record_metrics(span)
+            if self.sink is not None:
+                self.sink.export(span)
+        except Exception as e:
+            logging.warning(f"Failed to export span {span.name}: {e}")
+
+    def traced(self, name:str|None=None):
+        """Decorator that runs a sync or async function inside a span named after it."""
+        def decorator(func):
+            span_name = name or func.__name__
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def cost(self, model:str, input_tokens:int, output_tokens:int) -> float:
+        """Returns the USD cost of a model call from `pricing`, 0 for unpriced models."""
+        input_price, output_price = self.pricing.get(model) or (0.0, 0.0)
+        return (input_tokens * input_price + output_tokens * output_price) / 1e6
+
+    def _record_metrics(self, span:Span):
+        attributes = span.attributes
+        self.metrics.observe("span_duration_seconds", span.duration, help="Duration of pipeline spans", span=span.name)
+
+        if span.name == "llm.attempt":
+            model = attributes.get("llm.model", "unknown")
+            self.metrics.inc(
+                "llm_attempts_total", help="Model attempts by outcome", model=model, outcome=attributes.get("llm.outcome", "unknown")
+            )
+            input_tokens, output_tokens = attributes.get("llm.input_tokens", 0), attributes.get("llm.output_tokens", 0)
+            if input_tokens:
+                self.metrics.inc("llm_tokens_total", input_tokens, help="Tokens sent and generated", model=model, type="input")
+            if output_tokens:
+                self.metrics.inc("llm_tokens_total", output_tokens, help="Tokens sent and generated", model=model, type="output")
+            if input_tokens or output_tokens:
+                self.metrics.inc("llm_cost_usd_total", self.cost(model, input_tokens, output_tokens), help="Estimated model cost", model=model)
+            if attributes.get("llm.time_to_first_token") is not None:
+                self.metrics.observe(
+                    "llm_time_to_first_token_seconds", attributes["llm.time_to_first_token"], help="Time to first streamed token", model=model
+                )
+
+        elif span.name == "llm.generate":
+            self.metrics.observe(
+                "llm_fallback_attempts", attributes.get("llm.attempts", 0), buckets=COUNT_BUCKETS, help="Models tried per answer"
+            )
+
+        elif span.name == "retrieval.search":
+            self.metrics.observe(
+                "retrieved_documents", attributes.get("retrieval.documents", 0), buckets=COUNT_BUCKETS, help="Documents retrieved per query"
+            )
+
+    def render_prometheus(self) -> str:
+        return self.metrics.render()
+
+
+class UsageCallback(BaseCallbackHandler):
+    """
+    Records the token usage of one model call on its `llm.attempt` span.
+
+    Providers that report no usage get estimates of about four characters per token.
+    """
+
+    run_inline = True
+
+    def __init__(self, span:Span|NoopSpan):
+        self.span = span
+        self.prompt_chars = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.prompt_chars = sum(len(str(message.content)) for batch in messages for message in batch)
+
+    def on_llm_end(self, response:LLMResult, **kwargs):
+        usage, text = None, ""
+        for generations in response.generations:
+            for generation in generations:
+                text += generation.text
+                usage = usage or getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if not usage:
+            usage = (response.llm_output or {}).get("token_usage")
+        if usage:
+            self.span.set_attribute("llm.input_tokens", int(usage.get("input_tokens", usage.get("prompt_tokens", 0))))
+            self.span.set_attribute("llm.output_tokens", int(usage.get("output_tokens", usage.get("completion_tokens", 0))))
+        else:
+            self.span.set_attribute("llm.input_tokens", -(-self.prompt_chars // 4))
+            self.span.set_attribute("llm.output_tokens", -(-len(text) // 4))
+            self.span.set_attribute("llm.tokens_estimated", True)
+
+
+def with_callback(run_config:dict, handler:BaseCallbackHandler) -> dict:
+    """Returns a copy of a runnable config with one more callback handler, whatever form its callbacks take."""
+    callbacks = run_config.get("callbacks")
+    if callbacks is None:
+        callbacks = [handler]
+    elif isinstance(callbacks, list):
+        callbacks = [*callbacks, handler]
+    else:
+        callbacks = callbacks.copy()
+        callbacks.add_handler(handler, inherit=True)
+    return {**run_config, "callbacks": callbacks}
+
+
+def build_sink(name:str|None) -> SpanSink|None:
+    return {"memory": InMemorySink, "log": LogSink}.get(name or "none", lambda: None)()
+
+
+_tracer = Tracer(
+    enabled=TRACING["enabled"],
+    sink=build_sink(TRACING["sink"]),
+    pricing={model: tuple(prices) for model, prices in (TRACING.get("pricing") or {}).items()},
+)
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer."""
+    return _tracer